@@ -0,0 +1,91 @@
+"""
+JUSTICIA.ar - Análisis de Texto de Casos
+Representación de un caso con sus textos normalizados y las palabras clave
+encontradas, construida una vez y compartida por el clasificador y el motor
+de decisión.
+"""
+import re
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from palabras_clave import BuscadorPalabras
+
+CAMPOS_TEXTO = ('descripcion_hechos', 'pruebas')
+
+# Palabras que el motor de decisión consulta, por campo. Se agregan al buscador
+# del clasificador para que el texto se recorra una sola vez por caso.
+PALABRAS_MOTOR: Dict[str, Iterable[str]] = {
+    'pruebas': ('pagaré',),
+}
+
+_PATRON_TOKEN = re.compile(r'\w+')
+
+# Palabras frecuentes que no distinguen un caso de otro (normalizadas, sin tildes)
+PALABRAS_VACIAS = frozenset("""
+    como cual cuando desde donde durante entre esta este esto estos estas hasta
+    mismo misma para pero porque segun sobre solo tambien tiene tienen todo todos
+    fue fueron habia hace sido sera siendo cuyo cuya dicho dicha ante bajo tras
+    actor actora demandado demandada parte partes caso suma monto pesos fecha
+""".split())
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas sin tildes ni diacríticos: 'Pagaré' y 'PAGARE' -> 'pagare'"""
+    if texto.isascii():
+        return texto.lower()
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def es_termino_significativo(token: str) -> bool:
+    """Palabra normalizada útil para comparar textos (ni corta, ni numérica, ni vacía)"""
+    return len(token) > 3 and not token.isdigit() and token not in PALABRAS_VACIAS
+
+
+def terminos_significativos(texto: str) -> List[str]:
+    """Palabras significativas del texto normalizado, en orden y con repeticiones"""
+    return [t for t in _PATRON_TOKEN.findall(normalizar_texto(texto)) if es_termino_significativo(t)]
+
+
+class CasoAnalizado:
+    """
+    Caso con sus campos de texto normalizados y el conjunto de palabras clave
+    (normalizadas) que aparece en cada uno.
+
+    Se construye con el buscador del programa de reglas vigente; `contiene`
+    consulta ese resultado y solo recorre el texto de nuevo para palabras que
+    el buscador no conoce.
+    """
+
+    __slots__ = ('caso', 'buscador', 'textos', 'coincidencias', '_tokens')
+
+    def __init__(self, caso: Dict, buscador: Optional[BuscadorPalabras] = None,
+                 campos: Iterable[str] = CAMPOS_TEXTO):
+        self.caso = caso
+        self.buscador = buscador
+        self.textos: Dict[str, str] = {
+            campo: normalizar_texto(caso.get(campo) or '') for campo in campos
+        }
+        self.coincidencias: Dict[str, Set[str]] = {
+            campo: buscador.buscar(texto) if buscador else set()
+            for campo, texto in self.textos.items()
+        }
+        self._tokens: Dict[str, FrozenSet[str]] = {}
+
+    def contiene(self, campo: str, palabra: str) -> bool:
+        """Indica si `palabra` (sin importar tildes ni mayúsculas) aparece en `campo`"""
+        palabra = normalizar_texto(palabra)
+        if self.buscador and palabra in self.buscador.palabras and campo in self.coincidencias:
+            return palabra in self.coincidencias[campo]
+        if campo not in self.textos:
+            self.textos[campo] = normalizar_texto(self.caso.get(campo) or '')
+        return palabra in self.textos[campo]
+
+    def tokens(self, campo: str) -> FrozenSet[str]:
+        """Palabras sueltas normalizadas del campo"""
+        if campo not in self._tokens:
+            texto = self.textos.get(campo)
+            if texto is None:
+                texto = normalizar_texto(self.caso.get(campo) or '')
+            self._tokens[campo] = frozenset(_PATRON_TOKEN.findall(texto))
+        return self._tokens[campo]
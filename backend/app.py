@@ -2,36 +2,106 @@
 JUSTICIA.ar - API Backend
 Servidor Flask con endpoints para el sistema de resolución asistida
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import sqlite3
 from datetime import datetime
+import base64
 import json
+import os
 
+from conexion import obtener_gestor
 from clasificador import ClasificadorCasos
-from motor_decision import MotorDecision
+from expedientes import AsignadorExpedientes
+from estadisticas import EstadisticasCasos
+from cache_respuestas import CacheRespuestas
+from exportacion import Exportador, FORMATOS, validar_fecha
+from trabajos import ColaTrabajos
+from sombra import EvaluadorSombra
+from motor_decision import MotorDecision, datos_para_decision
+from barrido import BarridoNivel1, TAMANO_BLOQUE
+from plantillas import columnas_decision, obtener_plantillas
 
 app = Flask(__name__)
 CORS(app)  # Permitir peticiones desde el frontend
 
-DB_PATH = 'justicia.db'
+DB_PATH = os.environ.get('JUSTICIA_DB', 'justicia.db')
 
 # Inicializar componentes
+db = obtener_gestor(DB_PATH)
+asignador_expedientes = AsignadorExpedientes(DB_PATH)
+estadisticas = EstadisticasCasos(DB_PATH)
+cache_referencia = CacheRespuestas(DB_PATH)
+plantillas = obtener_plantillas(DB_PATH)
+exportador = Exportador(DB_PATH)
+cola_trabajos = ColaTrabajos(DB_PATH, hilos=int(os.environ.get('TRABAJOS_HILOS', 2)))
 clasificador = ClasificadorCasos(DB_PATH)
-motor_decision = MotorDecision(DB_PATH)
+evaluador_sombra = EvaluadorSombra(DB_PATH, capacidad=int(os.environ.get('SOMBRA_CAPACIDAD', 1000)))
+motor_decision = MotorDecision(DB_PATH, busqueda_precedentes=os.environ.get('PRECEDENTES_BUSQUEDA', 'texto'))
 
 # ===== UTILIDADES =====
 
-def get_db():
-    """Obtiene conexión a la base de datos"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Para acceder por nombre de columna
-    return conn
-
 def dict_from_row(row):
     """Convierte Row de sqlite3 a diccionario"""
     return dict(zip(row.keys(), row))
 
+def respuesta_cacheada(tabla, variante, construir):
+    """
+    Sirve una respuesta de datos de referencia desde la caché con ETag;
+    responde 304 si el cliente ya tiene la versión vigente (If-None-Match).
+    """
+    cuerpo, etag = cache_referencia.obtener(tabla, variante, construir)
+    
+    if request.if_none_match.contains(etag):
+        respuesta = Response(status=304)
+    else:
+        respuesta = Response(cuerpo, status=200, mimetype='application/json')
+    respuesta.set_etag(etag)
+    respuesta.headers['Cache-Control'] = 'no-cache'  # Revalidar siempre (barato: 304)
+    return respuesta
+
+CAMPOS_REQUERIDOS = ['tipo_caso', 'actor_id', 'demandado_nombre', 
+                     'monto_reclamado', 'descripcion_hechos']
+CAMPOS_TEXTO = ['demandado_nombre', 'descripcion_hechos', 'pruebas']
+TIPOS_CASO = ('daños_perjuicios', 'incumplimiento_contractual', 'cobro_suma_dinero')
+MAX_CASOS_LOTE = 1000
+MAX_LIMITE_LISTADO = 500
+MAX_BLOQUE_BARRIDO = 5000
+# Casos por petición síncrona y por trabajo encolado: un tramo termina muy
+# por debajo del timeout del worker y del plazo de la cola de trabajos
+MAX_CASOS_TRAMO_BARRIDO = 2000
+
+def codificar_cursor(fecha_ingreso, caso_id):
+    """Codifica la posición (fecha_ingreso, id) como cursor opaco"""
+    crudo = json.dumps([fecha_ingreso, caso_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor):
+    """Decodifica un cursor opaco. Lanza ValueError si es inválido"""
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        fecha_ingreso, caso_id = json.loads(crudo)
+    except Exception:
+        raise ValueError('Cursor inválido')
+    if not isinstance(fecha_ingreso, str) or not isinstance(caso_id, int):
+        raise ValueError('Cursor inválido')
+    return fecha_ingreso, caso_id
+
+def validar_caso(data):
+    """Valida un caso entrante. Retorna el mensaje de error o None si es válido"""
+    if not isinstance(data, dict):
+        return 'Cada caso debe ser un objeto JSON'
+    for campo in CAMPOS_REQUERIDOS:
+        if campo not in data:
+            return f'Campo requerido faltante: {campo}'
+    if data['tipo_caso'] not in TIPOS_CASO:
+        return f"Tipo de caso inválido: {data['tipo_caso']}"
+    if isinstance(data['monto_reclamado'], bool) or not isinstance(data['monto_reclamado'], (int, float)):
+        return 'El monto reclamado debe ser numérico'
+    for campo in CAMPOS_TEXTO:
+        if campo in data and not isinstance(data[campo], str):
+            return f'El campo {campo} debe ser texto'
+    return None
+
 # ===== ENDPOINTS - CASOS =====
 
 @app.route('/api/casos', methods=['POST'])
@@ -43,60 +113,166 @@ def crear_caso():
         data = request.json
         
         # Validar datos requeridos
-        campos_requeridos = ['tipo_caso', 'actor_id', 'demandado_nombre', 
-                            'monto_reclamado', 'descripcion_hechos']
-        for campo in campos_requeridos:
-            if campo not in data:
-                return jsonify({'error': f'Campo requerido faltante: {campo}'}), 400
+        error = validar_caso(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Clasificar el caso
-        nivel, confianza, justificacion = clasificador.clasificar_caso(data)
+        clasificacion = clasificador.clasificar_caso(data)
+        nivel = clasificacion.nivel
         
         # Guardar en BD
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        # Generar número de expediente
-        cursor.execute("SELECT COUNT(*) as total FROM casos")
-        total_casos = cursor.fetchone()['total']
-        numero_expediente = f"JUS-{datetime.now().year}-{total_casos + 1:05d}"
+        with db.transaccion(inmediata=True) as conn:
+            cursor = conn.cursor()
+            
+            # Generar número de expediente
+            numero_expediente = asignador_expedientes.reservar()[0]
+            
+            cursor.execute("""
+                INSERT INTO casos (
+                    numero_expediente, tipo_caso, actor_id, demandado_nombre,
+                    monto_reclamado, descripcion_hechos, pruebas,
+                    nivel_clasificacion, estado
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'clasificado')
+            """, (
+                numero_expediente,
+                data['tipo_caso'],
+                data['actor_id'],
+                data['demandado_nombre'],
+                data['monto_reclamado'],
+                data['descripcion_hechos'],
+                data.get('pruebas', ''),
+                nivel
+            ))
+            
+            caso_id = cursor.lastrowid
+            
+            # Registrar auditoría
+            cursor.execute("""
+                INSERT INTO auditoria (caso_id, tipo_evento, descripcion, usuario_id)
+                VALUES (?, 'clasificacion', ?, ?)
+            """, (caso_id, f"Caso clasificado como Nivel {nivel}", data['actor_id']))
         
-        cursor.execute("""
-            INSERT INTO casos (
-                numero_expediente, tipo_caso, actor_id, demandado_nombre,
-                monto_reclamado, descripcion_hechos, pruebas,
-                nivel_clasificacion, estado
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'clasificado')
-        """, (
-            numero_expediente,
-            data['tipo_caso'],
-            data['actor_id'],
-            data['demandado_nombre'],
-            data['monto_reclamado'],
-            data['descripcion_hechos'],
-            data.get('pruebas', ''),
-            nivel
-        ))
+        # Criterios candidatos: se evalúan en segundo plano, fuera de esta petición
+        evaluador_sombra.enviar(caso_id, data, nivel)
         
-        caso_id = cursor.lastrowid
+        respuesta = {
+            'success': True,
+            'caso_id': caso_id,
+            'numero_expediente': numero_expediente,
+            'nivel': nivel,
+            'confianza': clasificacion.confianza,
+            'puntos': clasificacion.puntos,
+            'factores': clasificacion.factores
+        }
+        # El texto de la justificación solo se genera si se pide
+        if request.args.get('justificacion') in ('1', 'true'):
+            respuesta['justificacion'] = clasificador.justificacion(clasificacion)
         
-        # Registrar auditoría
-        cursor.execute("""
-            INSERT INTO auditoria (caso_id, tipo_evento, descripcion, usuario_id)
-            VALUES (?, 'clasificacion', ?, ?)
-        """, (caso_id, f"Caso clasificado como Nivel {nivel}", data['actor_id']))
+        return jsonify(respuesta), 201
         
-        conn.commit()
-        conn.close()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/casos/lote', methods=['POST'])
+def crear_casos_lote():
+    """
+    Ingresa un lote de casos (arreglo JSON o NDJSON, un caso por línea).
+    
+    Todos los casos válidos se clasifican y se insertan en una única
+    transacción; los inválidos se informan en su posición sin abortar el lote.
+    """
+    try:
+        # Parsear el cuerpo: arreglo JSON o NDJSON
+        items = []
+        if request.is_json:
+            data = request.get_json(silent=True)
+            if not isinstance(data, list):
+                return jsonify({'error': 'Se esperaba un arreglo JSON de casos'}), 400
+            items = [(caso, None) for caso in data]
+        else:
+            for linea in request.get_data(as_text=True).splitlines():
+                if not linea.strip():
+                    continue
+                try:
+                    items.append((json.loads(linea), None))
+                except ValueError as e:
+                    items.append((None, f'JSON inválido: {e}'))
+        
+        if not items:
+            return jsonify({'error': 'El lote está vacío'}), 400
+        if len(items) > MAX_CASOS_LOTE:
+            return jsonify({'error': f'El lote supera el máximo de {MAX_CASOS_LOTE} casos'}), 413
+        
+        # Validar y clasificar (en bloque) fuera de la transacción
+        resultados = []
+        pendientes = []  # (indice, caso)
+        for indice, (caso, error) in enumerate(items):
+            error = error or validar_caso(caso)
+            if error:
+                resultados.append({'indice': indice, 'success': False, 'error': error})
+                continue
+            pendientes.append((indice, caso))
+            resultados.append(None)
+        
+        clasificaciones = clasificador.clasificar_lote([caso for _, caso in pendientes])
+        validos = [  # (indice, caso, nivel, confianza)
+            (indice, caso, clasificacion.nivel, clasificacion.confianza)
+            for (indice, caso), clasificacion in zip(pendientes, clasificaciones)
+        ]
+        
+        # Insertar casos y auditoría en una sola transacción
+        if validos:
+            with db.transaccion(inmediata=True) as conn:
+                cursor = conn.cursor()
+                numeros = asignador_expedientes.reservar(len(validos))
+                
+                # Una inserción por caso: la auditoría necesita el id de cada uno
+                ids = {}
+                for numero, (_, caso, nivel, _) in zip(numeros, validos):
+                    cursor.execute("""
+                        INSERT INTO casos (
+                            numero_expediente, tipo_caso, actor_id, demandado_nombre,
+                            monto_reclamado, descripcion_hechos, pruebas,
+                            nivel_clasificacion, estado
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'clasificado')
+                    """, (
+                        numero,
+                        caso['tipo_caso'],
+                        caso['actor_id'],
+                        caso['demandado_nombre'],
+                        caso['monto_reclamado'],
+                        caso['descripcion_hechos'],
+                        caso.get('pruebas', ''),
+                        nivel
+                    ))
+                    ids[numero] = cursor.lastrowid
+                
+                cursor.executemany("""
+                    INSERT INTO auditoria (caso_id, tipo_evento, descripcion, usuario_id)
+                    VALUES (?, 'clasificacion', ?, ?)
+                """, [
+                    (ids[numero], f"Caso clasificado como Nivel {nivel}", caso['actor_id'])
+                    for numero, (_, caso, nivel, _) in zip(numeros, validos)
+                ])
+            
+            for numero, (indice, caso, nivel, confianza) in zip(numeros, validos):
+                evaluador_sombra.enviar(ids[numero], caso, nivel)
+                resultados[indice] = {
+                    'indice': indice,
+                    'success': True,
+                    'caso_id': ids[numero],
+                    'numero_expediente': numero,
+                    'nivel': nivel,
+                    'confianza': confianza
+                }
         
         return jsonify({
             'success': True,
-            'caso_id': caso_id,
-            'numero_expediente': numero_expediente,
-            'nivel': nivel,
-            'confianza': confianza,
-            'justificacion': justificacion
-        }), 201
+            'creados': len(validos),
+            'rechazados': len(items) - len(validos),
+            'resultados': resultados
+        }), 201 if validos else 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -105,33 +281,31 @@ def crear_caso():
 def obtener_caso(caso_id):
     """Obtiene detalles de un caso específico"""
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT c.*, u.nombre as actor_nombre, u.email as actor_email
-            FROM casos c
-            JOIN usuarios u ON c.actor_id = u.id
-            WHERE c.id = ?
-        """, (caso_id,))
-        
-        caso = cursor.fetchone()
-        
-        if not caso:
-            return jsonify({'error': 'Caso no encontrado'}), 404
-        
-        # Obtener decisión si existe
-        cursor.execute("""
-            SELECT * FROM decisiones WHERE caso_id = ? ORDER BY fecha_decision DESC LIMIT 1
-        """, (caso_id,))
-        
-        decision = cursor.fetchone()
-        
-        conn.close()
+        with db.conexion() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT c.*, u.nombre as actor_nombre, u.email as actor_email
+                FROM casos c
+                JOIN usuarios u ON c.actor_id = u.id
+                WHERE c.id = ?
+            """, (caso_id,))
+            
+            caso = cursor.fetchone()
+            
+            if not caso:
+                return jsonify({'error': 'Caso no encontrado'}), 404
+            
+            # Obtener decisión si existe
+            cursor.execute("""
+                SELECT * FROM decisiones WHERE caso_id = ? ORDER BY fecha_decision DESC LIMIT 1
+            """, (caso_id,))
+            
+            decision = cursor.fetchone()
         
         resultado = {
             'caso': dict_from_row(caso),
-            'decision': dict_from_row(decision) if decision else None
+            'decision': plantillas.completar_decision(dict_from_row(decision)) if decision else None
         }
         
         return jsonify(resultado), 200
@@ -141,24 +315,37 @@ def obtener_caso(caso_id):
 
 @app.route('/api/casos', methods=['GET'])
 def listar_casos():
-    """Lista todos los casos con filtros opcionales"""
+    """
+    Lista casos con filtros opcionales, paginados por cursor.
+    
+    Los casos se ordenan por (fecha_ingreso, id) descendente; `next_cursor`
+    apunta al último caso devuelto y se pasa como `?cursor=` para obtener la
+    página siguiente. Cada página cuesta lo mismo sin importar su profundidad.
+    """
     try:
         # Parámetros de filtro
         estado = request.args.get('estado')
         nivel = request.args.get('nivel')
-        limit = request.args.get('limit', 50, type=int)
-        
-        conn = get_db()
-        cursor = conn.cursor()
+        limit = max(1, min(request.args.get('limit', 50, type=int), MAX_LIMITE_LISTADO))
+        cursor_param = request.args.get('cursor')
         
+        # CROSS JOIN fija a casos como tabla exterior para recorrer el índice en orden
         query = """
             SELECT c.*, u.nombre as actor_nombre
             FROM casos c
-            JOIN usuarios u ON c.actor_id = u.id
+            CROSS JOIN usuarios u ON c.actor_id = u.id
             WHERE 1=1
         """
         params = []
         
+        if cursor_param:
+            try:
+                fecha_cursor, id_cursor = decodificar_cursor(cursor_param)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            query += " AND (c.fecha_ingreso, c.id) < (?, ?)"
+            params.extend([fecha_cursor, id_cursor])
+        
         if estado:
             query += " AND c.estado = ?"
             params.append(estado)
@@ -167,17 +354,22 @@ def listar_casos():
             query += " AND c.nivel_clasificacion = ?"
             params.append(nivel)
         
-        query += " ORDER BY c.fecha_ingreso DESC LIMIT ?"
-        params.append(limit)
+        query += " ORDER BY c.fecha_ingreso DESC, c.id DESC LIMIT ?"
+        params.append(limit + 1)  # Una fila extra indica si hay página siguiente
         
-        cursor.execute(query, params)
-        casos = cursor.fetchall()
+        with db.conexion() as conn:
+            casos = conn.execute(query, params).fetchall()
         
-        conn.close()
+        next_cursor = None
+        if len(casos) > limit:
+            casos = casos[:limit]
+            ultimo = casos[-1]
+            next_cursor = codificar_cursor(ultimo['fecha_ingreso'], ultimo['id'])
         
         return jsonify({
             'casos': [dict_from_row(caso) for caso in casos],
-            'total': len(casos)
+            'total': len(casos),
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -185,50 +377,72 @@ def listar_casos():
 
 # ===== ENDPOINTS - DECISIONES =====
 
-@app.route('/api/casos/<int:caso_id>/decidir', methods=['POST'])
-def decidir_caso(caso_id):
+def decision_existente(conn, caso_id, estado):
     """
-    Genera decisión para un caso según su nivel
+    Resultado de generar_decision para un caso que ya no está pendiente:
+    su última decisión (decision_id None si no tiene ninguna)
     """
-    try:
-        # Obtener el caso
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM casos WHERE id = ?", (caso_id,))
-        caso_row = cursor.fetchone()
+    decision = conn.execute("""
+        SELECT * FROM decisiones WHERE caso_id = ? ORDER BY fecha_decision DESC, id DESC LIMIT 1
+    """, (caso_id,)).fetchone()
+    return {
+        'decision_id': decision['id'] if decision else None,
+        'decision': plantillas.completar_decision(dict_from_row(decision)) if decision else None,
+        'estado': estado,
+        'existente': True
+    }
+
+def generar_decision(caso_id):
+    """
+    Genera y guarda la decisión de un caso según su nivel.
+    
+    Solo se decide un caso en estado 'clasificado'. Si ya no lo está (otra
+    petición, un trabajo repetido o el barrido lo decidieron) no se inserta
+    otra decisión: se devuelve la existente con 'existente': True.
+    
+    Returns:
+        Dict con decision_id y decision, o None si el caso no existe
+    """
+    # Obtener el caso
+    with db.conexion() as conn:
+        caso_row = conn.execute("SELECT * FROM casos WHERE id = ?", (caso_id,)).fetchone()
         
         if not caso_row:
-            return jsonify({'error': 'Caso no encontrado'}), 404
-        
-        caso = dict_from_row(caso_row)
-        
-        # Generar decisión según nivel
-        nivel = caso['nivel_clasificacion']
+            return None
         
-        caso_para_decision = {
-            'tipo_caso': caso['tipo_caso'],
-            'monto_reclamado': caso['monto_reclamado'],
-            'descripcion_hechos': caso['descripcion_hechos'],
-            'pruebas': caso['pruebas'],
-            'tiene_contestacion': True,  # Simplificación
-            'plantea_cuestion_constitucional': False  # Simplificación
-        }
+        if caso_row['estado'] != 'clasificado':
+            return decision_existente(conn, caso_id, caso_row['estado'])
+    
+    caso = dict_from_row(caso_row)
+    
+    # Generar decisión según nivel
+    nivel = caso['nivel_clasificacion']
+    
+    # Textos normalizados y palabras clave: se analizan una sola vez
+    analizado = clasificador.analizar(datos_para_decision(caso))
+    decision_generada = motor_decision.decidir_caso(analizado, nivel)
+    
+    # Guardar decisión en BD
+    with db.transaccion(inmediata=True) as conn:
+        # Con el lock tomado: el caso pudo decidirse mientras se generaba
+        estado = conn.execute("SELECT estado FROM casos WHERE id = ?", (caso_id,)).fetchone()['estado']
+        if estado != 'clasificado':
+            return decision_existente(conn, caso_id, estado)
         
-        decision_generada = motor_decision.decidir_caso(caso_para_decision, nivel)
+        cursor = conn.cursor()
         
-        # Guardar decisión en BD
         cursor.execute("""
             INSERT INTO decisiones (
-                caso_id, tipo_decision, resultado, monto_otorgado,
-                fundamentacion, confianza_ia
-            ) VALUES (?, ?, ?, ?, ?, ?)
+                caso_id, tipo_decision, resultado, monto_otorgado, fundamentacion,
+                plantilla_id, plantilla_version, parametros, confianza_ia
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             caso_id,
             decision_generada['tipo_decision'],
             decision_generada.get('resultado', 'pendiente'),
             decision_generada.get('monto_otorgado'),
-            decision_generada['fundamentacion'],
+            # Con plantilla se guardan solo la referencia y los parámetros
+            *columnas_decision(decision_generada),
             decision_generada.get('confianza', 0.0)
         ))
         
@@ -245,15 +459,130 @@ def decidir_caso(caso_id):
             INSERT INTO auditoria (caso_id, decision_id, tipo_evento, descripcion)
             VALUES (?, ?, 'decision_generada', ?)
         """, (caso_id, decision_id, f"Decisión de tipo {decision_generada['tipo_decision']} generada"))
+    
+    return {
+        'decision_id': decision_id,
+        'decision': decision_generada
+    }
+
+def trabajo_decidir_caso(parametros):
+    """Manejador del trabajo asíncrono 'decidir_caso'"""
+    resultado = generar_decision(parametros['caso_id'])
+    if resultado is None:
+        raise ValueError(f"Caso no encontrado: {parametros['caso_id']}")
+    if resultado.get('existente') and resultado['decision_id'] is None:
+        raise ValueError(f"El caso {parametros['caso_id']} no está pendiente de decisión (estado: {resultado['estado']})")
+    return resultado
+
+cola_trabajos.registrar('decidir_caso', trabajo_decidir_caso)
+
+def barrer_tramo(bloque, desde_id=0):
+    """Resuelve hasta MAX_CASOS_TRAMO_BARRIDO casos de nivel 1 desde `desde_id`"""
+    barrido = BarridoNivel1(DB_PATH, bloque, motor=motor_decision, clasificador=clasificador)
+    return barrido.ejecutar(desde_id, max_bloques=max(1, MAX_CASOS_TRAMO_BARRIDO // bloque))
+
+def trabajo_barrido_nivel_1(parametros):
+    """
+    Manejador del trabajo asíncrono 'barrido_nivel_1'. Cada trabajo resuelve un
+    tramo y, si quedan casos, encola el siguiente desde 'ultimo_id' (su id va
+    en 'siguiente_job_id'). Un tramo que se reintenta al vencer su plazo solo
+    vuelve a tomar los casos aún pendientes.
+    """
+    bloque = parametros['bloque']
+    resumen = barrer_tramo(bloque, parametros.get('desde_id', 0))
+    if not resumen['completo']:
+        resumen['siguiente_job_id'] = cola_trabajos.encolar(
+            'barrido_nivel_1', {'bloque': bloque, 'desde_id': resumen['ultimo_id']}
+        )
+    return resumen
+
+cola_trabajos.registrar('barrido_nivel_1', trabajo_barrido_nivel_1)
+
+def iniciar_segundo_plano():
+    """
+    Arranca los hilos de fondo (cola de trabajos y evaluación en sombra) en
+    este proceso. Con gunicorn lo llama post_worker_init (gunicorn.conf.py)
+    en cada worker, después del fork; es idempotente por pid.
+    """
+    cola_trabajos.iniciar()
+    evaluador_sombra.iniciar()
+
+@app.route('/api/casos/<int:caso_id>/decidir', methods=['POST'])
+def decidir_caso(caso_id):
+    """
+    Genera decisión para un caso según su nivel.
+    
+    Con ?async=1 la decisión se encola y se responde 202 con el id del
+    trabajo, cuyo estado se consulta en GET /api/jobs/<id>. Repetirlo no
+    genera otra decisión: responde 200 con la existente.
+    """
+    try:
+        if request.args.get('async') in ('1', 'true'):
+            with db.conexion() as conn:
+                existe = conn.execute("SELECT 1 FROM casos WHERE id = ?", (caso_id,)).fetchone()
+            if not existe:
+                return jsonify({'error': 'Caso no encontrado'}), 404
+            
+            trabajo_id = cola_trabajos.encolar('decidir_caso', {'caso_id': caso_id})
+            return jsonify({
+                'success': True,
+                'job_id': trabajo_id,
+                'estado_url': f'/api/jobs/{trabajo_id}'
+            }), 202, {'Location': f'/api/jobs/{trabajo_id}'}
+        
+        resultado = generar_decision(caso_id)
+        if resultado is None:
+            return jsonify({'error': 'Caso no encontrado'}), 404
         
-        conn.commit()
-        conn.close()
+        if resultado.get('existente'):
+            if resultado['decision_id'] is None:
+                return jsonify({'error': f"El caso no está pendiente de decisión (estado: {resultado['estado']})"}), 409
+            return jsonify(dict(success=True, **resultado)), 200
         
-        return jsonify({
-            'success': True,
-            'decision_id': decision_id,
-            'decision': decision_generada
-        }), 201
+        return jsonify(dict(success=True, **resultado)), 201
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sistema/barrido-nivel-1', methods=['POST'])
+def barrido_nivel_1():
+    """
+    Resuelve todos los casos de nivel 1 pendientes, en bloques de ?bloque=N
+    casos (una transacción por bloque), en tramos de MAX_CASOS_TRAMO_BARRIDO.
+    Por defecto se encola y se responde 202 con el id del trabajo del primer
+    tramo; su resultado trae el rendimiento (casos/s) y, si quedan casos,
+    'siguiente_job_id'. Con ?async=0 resuelve en la petición un tramo desde
+    ?desde_id=N y responde el resumen; 'completo' es False si quedan más
+    (continuar desde 'ultimo_id'). Es seguro repetirlo: solo toma casos aún
+    pendientes.
+    """
+    try:
+        bloque = request.args.get('bloque', TAMANO_BLOQUE, type=int)
+        if not 1 <= bloque <= MAX_BLOQUE_BARRIDO:
+            return jsonify({'error': f'bloque debe estar entre 1 y {MAX_BLOQUE_BARRIDO}'}), 400
+        
+        if request.args.get('async') not in ('0', 'false'):
+            trabajo_id = cola_trabajos.encolar('barrido_nivel_1', {'bloque': bloque})
+            return jsonify({
+                'success': True,
+                'job_id': trabajo_id,
+                'estado_url': f'/api/jobs/{trabajo_id}'
+            }), 202, {'Location': f'/api/jobs/{trabajo_id}'}
+        
+        resumen = barrer_tramo(bloque, request.args.get('desde_id', 0, type=int))
+        return jsonify(dict(success=True, **resumen)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<int:trabajo_id>', methods=['GET'])
+def obtener_trabajo(trabajo_id):
+    """Estado, tiempos (espera_ms, duracion_ms) y resultado de un trabajo asíncrono"""
+    try:
+        trabajo = cola_trabajos.obtener(trabajo_id)
+        if not trabajo:
+            return jsonify({'error': 'Trabajo no encontrado'}), 404
+        return jsonify(trabajo), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -268,34 +597,31 @@ def aprobar_decision(decision_id):
         funcionario_id = data.get('funcionario_id')
         observaciones = data.get('observaciones', '')
         
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        # Actualizar decisión
-        cursor.execute("""
-            UPDATE decisiones 
-            SET funcionario_id = ?
-            WHERE id = ?
-        """, (funcionario_id, decision_id))
-        
-        # Actualizar caso a resuelto
-        cursor.execute("""
-            UPDATE casos 
-            SET estado = 'resuelto', fecha_resolucion = ?
-            WHERE id = (SELECT caso_id FROM decisiones WHERE id = ?)
-        """, (datetime.now(), decision_id))
-        
-        # Auditoría
-        cursor.execute("""
-            INSERT INTO auditoria (
-                caso_id, decision_id, tipo_evento, descripcion, usuario_id
-            )
-            SELECT caso_id, ?, 'decision_aprobada', ?, ?
-            FROM decisiones WHERE id = ?
-        """, (decision_id, f"Decisión aprobada. Obs: {observaciones}", funcionario_id, decision_id))
-        
-        conn.commit()
-        conn.close()
+        with db.transaccion(inmediata=True) as conn:
+            cursor = conn.cursor()
+            
+            # Actualizar decisión
+            cursor.execute("""
+                UPDATE decisiones 
+                SET funcionario_id = ?
+                WHERE id = ?
+            """, (funcionario_id, decision_id))
+            
+            # Actualizar caso a resuelto
+            cursor.execute("""
+                UPDATE casos 
+                SET estado = 'resuelto', fecha_resolucion = ?
+                WHERE id = (SELECT caso_id FROM decisiones WHERE id = ?)
+            """, (datetime.now(), decision_id))
+            
+            # Auditoría
+            cursor.execute("""
+                INSERT INTO auditoria (
+                    caso_id, decision_id, tipo_evento, descripcion, usuario_id
+                )
+                SELECT caso_id, ?, 'decision_aprobada', ?, ?
+                FROM decisiones WHERE id = ?
+            """, (decision_id, f"Decisión aprobada. Obs: {observaciones}", funcionario_id, decision_id))
         
         return jsonify({'success': True}), 200
         
@@ -306,96 +632,138 @@ def aprobar_decision(decision_id):
 
 @app.route('/api/estadisticas', methods=['GET'])
 def obtener_estadisticas():
-    """Obtiene estadísticas del sistema"""
+    """
+    Obtiene estadísticas del sistema desde los contadores incrementales.
+    Con ?consistente=1 las recalcula desde la tabla casos.
+    """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
+        # ?consistente=1 agrega la tabla casos en lugar de leer los contadores
+        if request.args.get('consistente') in ('1', 'true'):
+            return jsonify(estadisticas.recalcular()), 200
         
-        # Total de casos por nivel
-        cursor.execute("""
-            SELECT nivel_clasificacion, COUNT(*) as total
-            FROM casos
-            GROUP BY nivel_clasificacion
-        """)
-        casos_por_nivel = {row['nivel_clasificacion']: row['total'] for row in cursor.fetchall()}
+        return jsonify(estadisticas.resumen()), 200
         
-        # Total de casos por estado
-        cursor.execute("""
-            SELECT estado, COUNT(*) as total
-            FROM casos
-            GROUP BY estado
-        """)
-        casos_por_estado = {row['estado']: row['total'] for row in cursor.fetchall()}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ===== ENDPOINTS - EVALUACIÓN EN SOMBRA =====
+
+@app.route('/api/sombra/<conjunto>', methods=['PUT'])
+def registrar_conjunto_sombra(conjunto):
+    """
+    Registra (o reemplaza) un conjunto de criterios candidatos, que se evalúa
+    en segundo plano sobre cada caso nuevo. Body: {"criterios": [...]} con las
+    columnas de criterios_clasificacion.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            total = evaluador_sombra.registrar_conjunto(conjunto, data.get('criterios') or [])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Casos resueltos vs pendientes
-        cursor.execute("""
-            SELECT 
-                SUM(CASE WHEN estado = 'resuelto' THEN 1 ELSE 0 END) as resueltos,
-                SUM(CASE WHEN estado != 'resuelto' THEN 1 ELSE 0 END) as pendientes
-            FROM casos
-        """)
-        resolucion = cursor.fetchone()
+        return jsonify({'success': True, 'conjunto': conjunto, 'criterios': total}), 201
         
-        conn.close()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sombra/<conjunto>', methods=['DELETE'])
+def eliminar_conjunto_sombra(conjunto):
+    """Elimina un conjunto candidato y su comparación acumulada"""
+    try:
+        if not evaluador_sombra.eliminar_conjunto(conjunto):
+            return jsonify({'error': 'Conjunto no encontrado'}), 404
+        return jsonify({'success': True}), 200
         
-        return jsonify({
-            'casos_por_nivel': casos_por_nivel,
-            'casos_por_estado': casos_por_estado,
-            'resueltos': resolucion['resueltos'] or 0,
-            'pendientes': resolucion['pendientes'] or 0
-        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sombra/<conjunto>/reporte', methods=['GET'])
+def reporte_sombra(conjunto):
+    """Tasa de acuerdo con producción, matriz de confusión de niveles y últimas discrepancias"""
+    try:
+        reporte = evaluador_sombra.reporte(conjunto)
+        if reporte is None:
+            return jsonify({'error': 'Conjunto no encontrado'}), 404
+        return jsonify(reporte), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ===== ENDPOINTS - EXPORTACIÓN =====
+
+@app.route('/api/export/<tabla>', methods=['GET'])
+def exportar_tabla(tabla):
+    """
+    Exporta casos, decisiones o auditoría en NDJSON (por defecto) o CSV,
+    con filtro opcional ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD.
+    
+    La respuesta se transmite por bloques desde el cursor, sin armar la
+    lista completa en memoria.
+    """
+    try:
+        formato = request.args.get('formato', 'ndjson')
+        desde = validar_fecha(request.args.get('desde'))
+        hasta = validar_fecha(request.args.get('hasta'))
+        
+        contenido = exportador.exportar(tabla, formato, desde, hasta)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return Response(contenido, mimetype=FORMATOS[formato], headers={
+        'Content-Disposition': f'attachment; filename={tabla}.{formato}'
+    })
+
 # ===== ENDPOINTS - UTILIDADES =====
 
 @app.route('/api/articulos', methods=['GET'])
 def listar_articulos():
-    """Lista artículos legales disponibles"""
+    """Lista artículos legales disponibles (cacheado, con ETag)"""
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM articulos_legales ORDER BY numero_articulo")
-        articulos = cursor.fetchall()
-        
-        conn.close()
-        
-        return jsonify({
-            'articulos': [dict_from_row(art) for art in articulos]
-        }), 200
+        def construir():
+            with db.conexion() as conn:
+                articulos = conn.execute(
+                    "SELECT * FROM articulos_legales ORDER BY numero_articulo"
+                ).fetchall()
+            
+            return {
+                'articulos': [dict_from_row(art) for art in articulos]
+            }
+        
+        return respuesta_cacheada('articulos_legales', (), construir)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/precedentes', methods=['GET'])
 def listar_precedentes():
-    """Lista casos precedentes"""
+    """Lista casos precedentes (cacheado por tipo_caso, con ETag)"""
     try:
         tipo_caso = request.args.get('tipo_caso')
         
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        if tipo_caso:
-            cursor.execute("""
-                SELECT * FROM casos_precedentes 
-                WHERE tipo_caso = ?
-                ORDER BY fecha_sentencia DESC
-            """, (tipo_caso,))
-        else:
-            cursor.execute("""
-                SELECT * FROM casos_precedentes 
-                ORDER BY fecha_sentencia DESC
-            """)
-        
-        precedentes = cursor.fetchall()
-        conn.close()
-        
-        return jsonify({
-            'precedentes': [dict_from_row(p) for p in precedentes]
-        }), 200
+        def construir():
+            with db.conexion() as conn:
+                cursor = conn.cursor()
+                
+                if tipo_caso:
+                    cursor.execute("""
+                        SELECT * FROM casos_precedentes 
+                        WHERE tipo_caso = ?
+                        ORDER BY fecha_sentencia DESC
+                    """, (tipo_caso,))
+                else:
+                    cursor.execute("""
+                        SELECT * FROM casos_precedentes 
+                        ORDER BY fecha_sentencia DESC
+                    """)
+                
+                precedentes = cursor.fetchall()
+            
+            return {
+                'precedentes': [dict_from_row(p) for p in precedentes]
+            }
+        
+        return respuesta_cacheada('casos_precedentes', (tipo_caso,), construir)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -409,10 +777,22 @@ def health_check():
         'version': '0.1.0'
     }), 200
 
+@app.route('/api/sistema/db', methods=['GET'])
+def estadisticas_db():
+    """Estadísticas del pool de conexiones, de espera por bloqueos y de cachés (por worker)"""
+    return jsonify(dict(
+        db.estadisticas(),
+        cache_referencia=cache_referencia.estadisticas(),
+        cache_clasificacion=clasificador.cache.estadisticas(),
+        sombra=evaluador_sombra.estadisticas(),
+        busqueda_precedentes=motor_decision.precedentes.estadisticas(),
+        plantillas=plantillas.estadisticas(),
+        trabajos=cola_trabajos.estadisticas()
+    )), 200
+
 # ===== INICIO DEL SERVIDOR =====
 
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5000))
     
     print("=" * 70)
@@ -421,16 +801,24 @@ if __name__ == '__main__':
     print("=" * 70)
     print("\nEndpoints disponibles:")
     print("  POST   /api/casos                  - Crear nuevo caso")
+    print("  POST   /api/casos/lote             - Ingreso masivo (JSON o NDJSON)")
     print("  GET    /api/casos                  - Listar casos")
     print("  GET    /api/casos/<id>             - Obtener caso específico")
-    print("  POST   /api/casos/<id>/decidir     - Generar decisión")
+    print("  POST   /api/casos/<id>/decidir     - Generar decisión (?async=1 → 202)")
+    print("  GET    /api/jobs/<id>              - Estado de trabajo asíncrono")
     print("  POST   /api/decisiones/<id>/aprobar - Aprobar decisión")
     print("  GET    /api/estadisticas           - Estadísticas del sistema")
+    print("  PUT    /api/sombra/<conjunto>      - Registrar criterios candidatos")
+    print("  GET    /api/sombra/<conjunto>/reporte - Comparación con producción")
+    print("  GET    /api/export/<tabla>         - Exportar (NDJSON/CSV)")
     print("  GET    /api/articulos              - Listar artículos legales")
     print("  GET    /api/precedentes            - Listar precedentes")
     print("  GET    /api/health                 - Health check")
+    print("  GET    /api/sistema/db             - Estadísticas de conexiones")
+    print("  POST   /api/sistema/barrido-nivel-1 - Resolver casos de nivel 1 pendientes")
     print("\n" + "=" * 70)
     print(f"\nPuerto: {port}")
     print("=" * 70)
     
+    iniciar_segundo_plano()
     app.run(debug=False, host='0.0.0.0', port=port)
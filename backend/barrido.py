@@ -0,0 +1,171 @@
+"""
+JUSTICIA.ar - Barrido de Nivel 1
+Resuelve en lote los casos de nivel 1 pendientes (estado 'clasificado'): los
+recorre por id en bloques, decide cada bloque con MotorDecision y guarda
+decisiones, cambios de estado y auditoría en una transacción por bloque.
+Volver a ejecutarlo solo toma los casos que sigan pendientes.
+
+Ejecutar: python barrido.py --dry-run
+          python barrido.py --bloque 1000
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from clasificador import ClasificadorCasos
+from conexion import obtener_gestor
+from motor_decision import MotorDecision, datos_para_decision
+from plantillas import columnas_decision
+
+TAMANO_BLOQUE = 500
+
+
+class BarridoNivel1:
+    """
+    Decide fuera de la transacción y escribe cada bloque con el lock de
+    escritura tomado. Antes de escribir se vuelve a leer qué casos del bloque
+    siguen pendientes, así un caso resuelto mientras tanto (por
+    POST /api/casos/<id>/decidir u otro barrido) no recibe una segunda decisión.
+    """
+
+    def __init__(self, db_path='justicia.db', tamano_bloque=TAMANO_BLOQUE, dry_run=False,
+                 motor: Optional[MotorDecision] = None, clasificador: Optional[ClasificadorCasos] = None):
+        self.db = obtener_gestor(db_path)
+        # Nivel 1 no consulta precedentes: basta la estrategia más liviana
+        self.motor = motor or MotorDecision(db_path, busqueda_precedentes='recientes')
+        self.clasificador = clasificador or ClasificadorCasos(db_path)
+        self.tamano_bloque = tamano_bloque
+        self.dry_run = dry_run
+
+        self.procesados = 0
+        self.resueltos = 0
+        self.omitidos = 0
+        self.bloques = 0
+        self.ultimo_id = 0
+        self.completo = False
+        self.duracion_s = 0.0
+
+    def _bloques(self, desde_id: int) -> Iterator[List[Dict]]:
+        """Genera bloques de casos de nivel 1 pendientes con id > desde_id"""
+        ultimo = desde_id
+        while True:
+            with self.db.conexion() as conn:
+                filas = conn.execute("""
+                    SELECT id, tipo_caso, monto_reclamado, descripcion_hechos, pruebas
+                    FROM casos
+                    WHERE estado = 'clasificado' AND nivel_clasificacion = 1 AND id > ?
+                    ORDER BY id LIMIT ?
+                """, (ultimo, self.tamano_bloque)).fetchall()
+            if not filas:
+                return
+            ultimo = filas[-1]['id']
+            yield [dict(zip(f.keys(), f)) for f in filas]
+
+    def ejecutar(self, desde_id: int = 0, max_bloques: Optional[int] = None) -> Dict:
+        """
+        Resuelve los casos pendientes con id > desde_id, a lo sumo max_bloques
+        bloques. Devuelve el resumen(); 'completo' es False si quedaron casos
+        después de 'ultimo_id'.
+        """
+        inicio = time.perf_counter()
+        self.ultimo_id = desde_id
+        self.completo = False
+        try:
+            for casos in self._bloques(desde_id):
+                if max_bloques is not None and self.bloques >= max_bloques:
+                    return self.resumen()
+                decisiones = [
+                    (caso['id'], self.motor.decidir_caso(self.clasificador.analizar(datos_para_decision(caso)), 1))
+                    for caso in casos
+                ]
+                guardadas = len(decisiones) if self.dry_run else self._guardar(decisiones)
+
+                self.procesados += len(casos)
+                self.resueltos += guardadas
+                self.omitidos += len(casos) - guardadas
+                self.bloques += 1
+                self.ultimo_id = casos[-1]['id']
+            self.completo = True
+        finally:
+            self.duracion_s += time.perf_counter() - inicio
+        return self.resumen()
+
+    def _guardar(self, decisiones: List[Tuple[int, Dict]]) -> int:
+        """Escribe las decisiones del bloque cuyos casos siguen pendientes. Devuelve cuántas"""
+        fecha = datetime.now()
+        desde, hasta = decisiones[0][0], decisiones[-1][0]
+        with self.db.transaccion(inmediata=True) as conn:
+            pendientes = {
+                row['id'] for row in conn.execute("""
+                    SELECT id FROM casos
+                    WHERE estado = 'clasificado' AND nivel_clasificacion = 1 AND id BETWEEN ? AND ?
+                """, (desde, hasta))
+            }
+            decisiones = [(caso_id, decision) for caso_id, decision in decisiones if caso_id in pendientes]
+            if not decisiones:
+                return 0
+
+            # Una inserción por decisión: la auditoría necesita el id de cada una
+            ids = [
+                conn.execute("""
+                    INSERT INTO decisiones (
+                        caso_id, tipo_decision, resultado, monto_otorgado, fundamentacion,
+                        plantilla_id, plantilla_version, parametros, confianza_ia
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    caso_id, decision['tipo_decision'], decision['resultado'],
+                    decision.get('monto_otorgado'), *columnas_decision(decision), decision.get('confianza', 0.0)
+                )).lastrowid
+                for caso_id, decision in decisiones
+            ]
+            conn.executemany("""
+                UPDATE casos SET estado = 'resuelto', fecha_resolucion = ? WHERE id = ?
+            """, [(fecha, caso_id) for caso_id, _ in decisiones])
+            conn.executemany("""
+                INSERT INTO auditoria (caso_id, decision_id, tipo_evento, descripcion)
+                VALUES (?, ?, 'decision_generada', ?)
+            """, [
+                (caso_id, decision_id, f"Decisión de tipo {decision['tipo_decision']} generada (barrido de nivel 1)")
+                for decision_id, (caso_id, decision) in zip(ids, decisiones)
+            ])
+        return len(decisiones)
+
+    def resumen(self) -> Dict:
+        return {
+            'procesados': self.procesados,
+            'resueltos': self.resueltos,
+            'omitidos': self.omitidos,
+            'bloques': self.bloques,
+            'ultimo_id': self.ultimo_id,
+            'completo': self.completo,
+            'duracion_s': round(self.duracion_s, 3),
+            'casos_por_s': round(self.procesados / self.duracion_s, 1) if self.duracion_s else 0.0,
+            'dry_run': self.dry_run,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='justicia.db', help='ruta de la base de datos')
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='casos por bloque/transacción')
+    parser.add_argument('--desde-id', type=int, default=0, help='empezar después de este id')
+    parser.add_argument('--dry-run', action='store_true', help='decidir sin escribir: solo medir')
+    args = parser.parse_args()
+
+    barrido = BarridoNivel1(args.db, args.bloque, args.dry_run)
+    try:
+        barrido.ejecutar(args.desde_id)
+    except KeyboardInterrupt:
+        print("\nInterrumpido: los bloques confirmados quedan resueltos; vuelva a ejecutar para continuar")
+    finally:
+        resumen = barrido.resumen()
+        print(f"Casos procesados: {resumen['procesados']:,} en {resumen['bloques']:,} bloques")
+        print(f"Resueltos:        {resumen['resueltos']:,}" + (" (dry run, sin escribir)" if args.dry_run else ""))
+        print(f"Omitidos:         {resumen['omitidos']:,} (resueltos por otro proceso durante el barrido)")
+        print(f"Último id:        {resumen['ultimo_id']}")
+        print(f"Duración:         {resumen['duracion_s']:.2f} s ({resumen['casos_por_s']:,.0f} casos/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+"""
+JUSTICIA.ar - Benchmarks
+Ejecutar desde backend/: python -m benchmarks.<modulo>
+
+- clasificador: operaciones del clasificador contra una línea base JSON
+- palabras_clave: buscador compilado vs. búsqueda palabra por palabra
+- plantillas: armado de fundamentaciones con plantillas compiladas vs. f-strings
+- generador: casos sintéticos parametrizables (usado por los anteriores)
+"""
@@ -0,0 +1,187 @@
+"""
+Benchmark del clasificador: clasificar_caso, generación de justificación y
+clasificar_lote sobre casos sintéticos (sin caché), y clasificar_caso y
+clasificar_lote sobre un ingreso masivo de textos modelo (con caché).
+
+Reporta operaciones por segundo y asignaciones de memoria (tracemalloc) y las
+compara con una línea base guardada en JSON. Termina con código 1 si alguna
+operación es más lenta que la línea base por encima del umbral.
+
+Ejecutar desde backend/:
+    python -m benchmarks.clasificador                      # compara con la línea base
+    python -m benchmarks.clasificador --guardar-baseline   # actualiza la línea base
+    python -m benchmarks.clasificador --largo-descripcion 5000 --densidad 0.05
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks.generador import GeneradorCasos
+from clasificador import ClasificadorCasos
+from conexion import obtener_gestor
+from migraciones import MigradorEsquema
+from reglas import np
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_clasificador.json')
+
+
+def medir(operacion: Callable[[], None], cantidad: int, repeticiones: int) -> Dict:
+    """
+    Ejecuta `operacion` (que procesa `cantidad` elementos) y mide:
+    ops_s (mejor de `repeticiones`), kb_pico (memoria pico por corrida) y
+    bloques_por_op (bloques asignados que siguen vivos al terminar, por elemento).
+    """
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        operacion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    resultado = operacion()
+    despues = tracemalloc.take_snapshot()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    bloques = sum(d.count_diff for d in despues.compare_to(antes, 'filename') if d.count_diff > 0)
+
+    return {
+        'ops_s': round(cantidad / mejor, 1),
+        'kb_pico': round(pico / 1024, 1),
+        'bloques_por_op': round(bloques / cantidad, 2),
+    }
+
+
+def ejecutar(casos: List[Dict], masivos: List[Dict], db_path: str, repeticiones: int) -> Dict[str, Dict]:
+    """
+    Mide cada operación del clasificador sobre los casos dados. Las
+    repeticiones vuelven a clasificar los mismos casos: los casos sintéticos se
+    miden sin caché y los masivos con la caché vaciada al empezar cada corrida.
+    """
+    clasificador = ClasificadorCasos(db_path, max_cache=0)
+    clasificaciones = [clasificador.clasificar_caso(c) for c in casos]
+    n = len(casos)
+
+    con_cache = ClasificadorCasos(db_path)
+
+    def en_frio(operacion: Callable[[], object]) -> Callable[[], object]:
+        def medir_en_frio():
+            con_cache.cache.vaciar()
+            return operacion()
+        return medir_en_frio
+
+    return {
+        'clasificar_caso': medir(lambda: [clasificador.clasificar_caso(c) for c in casos], n, repeticiones),
+        'justificacion': medir(lambda: [clasificador.justificacion(r) for r in clasificaciones], n, repeticiones),
+        'clasificar_lote': medir(lambda: clasificador.clasificar_lote(casos), n, repeticiones),
+        'clasificar_caso_masivo': medir(
+            en_frio(lambda: [con_cache.clasificar_caso(c) for c in masivos]), len(masivos), repeticiones
+        ),
+        'clasificar_lote_masivo': medir(
+            en_frio(lambda: con_cache.clasificar_lote(masivos)), len(masivos), repeticiones
+        ),
+    }
+
+
+def comparar(resultados: Dict[str, Dict], baseline: Dict, umbral: float) -> bool:
+    """Imprime la comparación con la línea base. Retorna True si hay regresiones"""
+    regresiones = False
+    anteriores = baseline.get('resultados', {})
+    print(f"\n{'operación':<24}{'ops/s':>12}{'base':>12}{'Δ%':>9}{'KB pico':>10}{'bloques/op':>12}")
+    for nombre, actual in resultados.items():
+        base = anteriores.get(nombre)
+        if base:
+            delta = (actual['ops_s'] / base['ops_s'] - 1) * 100
+            marca = '  REGRESIÓN' if delta < -umbral else ''
+            regresiones |= bool(marca)
+            print(f"{nombre:<24}{actual['ops_s']:>12,.0f}{base['ops_s']:>12,.0f}{delta:>+8.1f}%"
+                  f"{actual['kb_pico']:>10,.1f}{actual['bloques_por_op']:>12.2f}{marca}")
+        else:
+            print(f"{nombre:<24}{actual['ops_s']:>12,.0f}{'-':>12}{'-':>9}"
+                  f"{actual['kb_pico']:>10,.1f}{actual['bloques_por_op']:>12.2f}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--casos', type=int, default=2000, help='casos sintéticos por corrida')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--largo-descripcion', type=int, default=400, help='caracteres de descripcion_hechos')
+    parser.add_argument('--largo-pruebas', type=int, default=120, help='caracteres de pruebas')
+    parser.add_argument('--densidad', type=float, default=0.02, help='probabilidad de palabra clave por fragmento')
+    parser.add_argument('--monto-mediana', type=float, default=350000)
+    parser.add_argument('--modelos', type=int, default=20, help='textos modelo distintos del ingreso masivo')
+    parser.add_argument('--baseline', default=BASELINE, help='archivo JSON de línea base')
+    parser.add_argument('--guardar-baseline', action='store_true', help='guardar estos resultados como línea base')
+    parser.add_argument('--umbral', type=float, default=15.0, help='caída de ops/s (%%) considerada regresión')
+    args = parser.parse_args()
+
+    parametros = {
+        'casos': args.casos,
+        'semilla': args.semilla,
+        'largo_descripcion': args.largo_descripcion,
+        'largo_pruebas': args.largo_pruebas,
+        'densidad': args.densidad,
+        'monto_mediana': args.monto_mediana,
+        'modelos': args.modelos,
+    }
+    generador = GeneradorCasos(
+        semilla=args.semilla, largo_descripcion=args.largo_descripcion,
+        largo_pruebas=args.largo_pruebas, densidad=args.densidad, monto_mediana=args.monto_mediana
+    )
+    casos = generador.casos(args.casos)
+    masivos = generador.masivos(args.casos, args.modelos)
+
+    directorio = tempfile.mkdtemp(prefix='justicia_bench_')
+    db_path = os.path.join(directorio, 'bench.db')
+    try:
+        MigradorEsquema(db_path).migrar(verbose=False)
+        resultados = ejecutar(casos, masivos, db_path, args.repeticiones)
+    finally:
+        obtener_gestor(db_path).cerrar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    informe = {
+        'entorno': {
+            'python': platform.python_version(),
+            'numpy': np.__version__ if np is not None else None,
+            'plataforma': platform.platform(),
+            'fecha': time.strftime('%Y-%m-%d'),
+        },
+        'parametros': parametros,
+        'resultados': resultados,
+    }
+
+    if args.guardar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        comparar(resultados, {}, args.umbral)
+        print(f"\nLínea base guardada en {args.baseline}")
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('parametros') != parametros:
+            print("Los parámetros difieren de los de la línea base: se informa sin comparar")
+            baseline = {}
+    else:
+        print(f"Sin línea base en {args.baseline} (crearla con --guardar-baseline)")
+
+    if comparar(resultados, baseline, args.umbral):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
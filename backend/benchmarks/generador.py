@@ -0,0 +1,104 @@
+"""
+Generador de casos sintéticos para benchmarks.
+
+Produce casos con largo de texto, densidad de palabras clave, distribución
+de montos y mezcla de tipos controlados, de forma reproducible (semilla).
+"""
+import math
+import random
+from typing import Dict, Iterable, List, Optional
+
+TIPOS_CASO = {
+    'cobro_suma_dinero': 0.6,
+    'incumplimiento_contractual': 0.25,
+    'daños_perjuicios': 0.15,
+}
+
+# Texto de relleno con el registro de una demanda civil
+VOCABULARIO = (
+    'el actor reclama al demandado la suma adeudada en virtud del contrato de mutuo '
+    'celebrado entre las partes con más los intereses moratorios y punitorios desde '
+    'la fecha de vencimiento de cada cuota hasta su efectivo pago conforme surge de la '
+    'documentación acompañada y de las intimaciones cursadas por carta documento sin '
+    'obtener respuesta favorable del deudor quien se encuentra en mora de pleno derecho'
+).split()
+
+PALABRAS_PRUEBAS = ['pagaré', 'contrato firmado', 'sentencia', 'documento fehaciente']
+PALABRAS_DESCRIPCION = ['pericial', 'técnico', 'controvertido', 'testigos contradictorios',
+                        'versiones encontradas', 'novedoso', 'sin precedentes']
+
+
+class GeneradorCasos:
+    """
+    Args:
+        largo_descripcion: caracteres aproximados de descripcion_hechos
+        largo_pruebas: caracteres aproximados de pruebas
+        densidad: probabilidad de que cada fragmento sea una palabra clave
+        monto_mediana, monto_dispersion: parámetros de la distribución
+            log-normal de monto_reclamado
+        tipos: peso relativo de cada tipo_caso
+        prob_sin_contestacion, prob_constitucional: banderas
+        palabras_pruebas, palabras_descripcion: palabras clave a insertar
+    """
+
+    def __init__(self, semilla: int = 42, largo_descripcion: int = 400, largo_pruebas: int = 120,
+                 densidad: float = 0.02, monto_mediana: float = 350000, monto_dispersion: float = 0.8,
+                 tipos: Optional[Dict[str, float]] = None, prob_sin_contestacion: float = 0.3,
+                 prob_constitucional: float = 0.03,
+                 palabras_pruebas: Iterable[str] = PALABRAS_PRUEBAS,
+                 palabras_descripcion: Iterable[str] = PALABRAS_DESCRIPCION):
+        self.rng = random.Random(semilla)
+        self.largo_descripcion = largo_descripcion
+        self.largo_pruebas = largo_pruebas
+        self.densidad = densidad
+        self.monto_mediana = monto_mediana
+        self.monto_dispersion = monto_dispersion
+        tipos = tipos or TIPOS_CASO
+        self._tipos = list(tipos)
+        self._pesos_tipos = list(tipos.values())
+        self.prob_sin_contestacion = prob_sin_contestacion
+        self.prob_constitucional = prob_constitucional
+        self.palabras_pruebas = list(palabras_pruebas)
+        self.palabras_descripcion = list(palabras_descripcion)
+
+    def _texto(self, largo: int, palabras: List[str]) -> str:
+        partes, total = [], 0
+        while total < largo:
+            if palabras and self.rng.random() < self.densidad:
+                fragmento = self.rng.choice(palabras)
+            else:
+                fragmento = self.rng.choice(VOCABULARIO)
+            partes.append(fragmento)
+            total += len(fragmento) + 1
+        return ' '.join(partes)
+
+    def caso(self) -> Dict:
+        """Un caso sintético"""
+        monto = self.monto_mediana * math.exp(self.rng.gauss(0, self.monto_dispersion))
+        return {
+            'tipo_caso': self.rng.choices(self._tipos, self._pesos_tipos)[0],
+            'actor_id': 1,
+            'demandado_nombre': 'Demandado Sintético',
+            'monto_reclamado': round(monto, 2),
+            'descripcion_hechos': self._texto(self.largo_descripcion, self.palabras_descripcion),
+            'pruebas': self._texto(self.largo_pruebas, self.palabras_pruebas),
+            'tiene_contestacion': self.rng.random() >= self.prob_sin_contestacion,
+            'plantea_cuestion_constitucional': self.rng.random() < self.prob_constitucional,
+        }
+
+    def casos(self, cantidad: int) -> List[Dict]:
+        """Lista de `cantidad` casos sintéticos"""
+        return [self.caso() for _ in range(cantidad)]
+
+    def masivos(self, cantidad: int, modelos: int = 20) -> List[Dict]:
+        """
+        Casos de un ingreso masivo (banco, estudio de cobranza): `modelos`
+        textos de demanda repetidos, cada caso con su propio monto y demandado
+        """
+        plantillas = [dict(self.caso(), tipo_caso='cobro_suma_dinero') for _ in range(modelos)]
+        casos = []
+        for i in range(cantidad):
+            monto = self.monto_mediana * math.exp(self.rng.gauss(0, self.monto_dispersion))
+            casos.append(dict(self.rng.choice(plantillas), demandado_nombre=f'Deudor {i}',
+                              monto_reclamado=round(monto, 2)))
+        return casos
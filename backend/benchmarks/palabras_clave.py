@@ -0,0 +1,81 @@
+"""
+Benchmark: buscador compilado vs. `any(palabra in texto ...)` por palabra.
+
+Mide el tiempo por texto al crecer la cantidad de palabras clave y el largo
+de la descripción, y verifica que ambos encuentren las mismas palabras.
+
+Ejecutar desde backend/: python -m benchmarks.palabras_clave
+"""
+import argparse
+import random
+import time
+
+from palabras_clave import BuscadorPalabras
+
+VOCABULARIO = (
+    'el actor reclama la suma adeudada por el demandado según contrato de mutuo '
+    'con intereses moratorios desde la fecha de vencimiento y costas del proceso '
+    'conforme surge de la documental acompañada y la prueba testimonial ofrecida'
+).split()
+
+
+def generar_palabras(cantidad: int, rng: random.Random):
+    """Palabras clave sintéticas de una a tres palabras"""
+    palabras = {'pagaré', 'pericial', 'sin precedentes', 'versiones encontradas'}
+    while len(palabras) < cantidad:
+        base = ' '.join(rng.choice(VOCABULARIO) for _ in range(rng.randint(1, 3)))
+        palabras.add(f"{base} {rng.randint(0, 10 ** 6)}")
+    return sorted(palabras)
+
+
+def generar_texto(largo: int, palabras, aciertos: int, rng: random.Random) -> str:
+    """Texto de aproximadamente `largo` caracteres con `aciertos` palabras clave"""
+    partes, total = [], 0
+    while total < largo:
+        partes.append(rng.choice(VOCABULARIO))
+        total += len(partes[-1]) + 1
+    for _ in range(aciertos):
+        partes.insert(rng.randrange(len(partes) + 1), rng.choice(palabras))
+    return ' '.join(partes)
+
+
+def buscar_ingenuo(texto: str, palabras):
+    return {p for p in palabras if p in texto}
+
+
+def medir(funcion, textos, repeticiones: int) -> float:
+    """Microsegundos por texto (mejor de `repeticiones`)"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for texto in textos:
+            funcion(texto)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(textos) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--textos', type=int, default=50, help='textos por medición')
+    parser.add_argument('--aciertos', type=int, default=3, help='palabras clave insertadas por texto')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    print(f"{'palabras':>9} {'largo':>8} {'ingenuo µs':>12} {'compilado µs':>13} {'aceleración':>12}")
+    for cantidad in (11, 100, 500, 2000):
+        palabras = generar_palabras(cantidad, rng)
+        buscador = BuscadorPalabras(palabras)
+        for largo in (200, 2_000, 20_000, 100_000):
+            textos = [generar_texto(largo, palabras, args.aciertos, rng) for _ in range(args.textos)]
+            for texto in textos:
+                assert buscador.buscar(texto) == buscar_ingenuo(texto, palabras)
+
+            ingenuo = medir(lambda t: buscar_ingenuo(t, palabras), textos, args.repeticiones)
+            compilado = medir(buscador.buscar, textos, args.repeticiones)
+            print(f"{cantidad:>9} {largo:>8,} {ingenuo:>12,.1f} {compilado:>13,.1f} {ingenuo / compilado:>11.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark: armado de fundamentaciones con plantillas compiladas vs. el código
+anterior (f-strings literales en MotorDecision y `+=` en nivel 3).
+
+El camino anterior se reconstruye desde los mismos textos: cada plantilla sin
+listas se convierte en una f-string equivalente (lo que compilaba el motor) y
+nivel 3 repite los `+=` anidados. También mide str.format_map sobre el texto
+sin compilar, la alternativa a compilar ahora que los textos vienen de la
+base. Verifica que los tres caminos armen el mismo texto.
+
+Ejecutar desde backend/: python -m benchmarks.plantillas [--decisiones 20000]
+"""
+import argparse
+import os
+import shutil
+import string
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from conexion import obtener_gestor
+from migraciones import MigradorEsquema
+from plantillas import PLANTILLAS, RepositorioPlantillas
+
+ARGUMENTOS = [
+    "El actor ha cumplido con la carga probatoria exigida por el art. 377 CPCC",
+    "El daño se encuentra debidamente acreditado y existe nexo causal directo",
+    "La reparación debe ser plena conforme el art. 1740 CCyC",
+    "El demandado no ha logrado desvirtuar la pretensión ni probar eximentes de responsabilidad",
+    "El monto reclamado es razonable y proporcional al daño efectivamente sufrido",
+]
+
+
+def como_fstring(texto: str) -> Callable[[Dict], str]:
+    """Función con la f-string equivalente a una plantilla sin listas"""
+    partes = []
+    for literal, campo, _, _ in string.Formatter().parse(texto):
+        partes.append(literal.replace('\\', '\\\\').replace('"', '\\"').replace('{', '{{').replace('}', '}}'))
+        if campo is not None:
+            partes.append(f"{{p[{campo!r}]}}")
+    return eval('lambda p: f"""' + ''.join(partes) + '"""')
+
+
+def nivel3_anterior(perspectivas: List[Dict]) -> str:
+    """Armado de nivel 3 como lo hacía MotorDecision (cabecera, `+=` por perspectiva, pie)"""
+    cabecera, pie = PLANTILLAS['nivel3'].split('{perspectivas:nivel3_perspectiva}')
+    fundamentacion = cabecera
+    for i, persp in enumerate(perspectivas, 1):
+        fundamentacion += f"\n{'='*60}\nPERSPECTIVA {i}: {persp['enfoque']}\n{'='*60}\n"
+        fundamentacion += f"Resultado propuesto: {persp['resultado_propuesto']}\n"
+        fundamentacion += f"Monto propuesto: ${persp['monto_propuesto']:,.2f}\n\n"
+        fundamentacion += "ARGUMENTOS:\n"
+        for j, arg in enumerate(persp['argumentos'], 1):
+            fundamentacion += f"{j}. {arg}\n"
+        fundamentacion += "\n"
+    fundamentacion += pie
+    return fundamentacion
+
+
+def parametros_nivel3(perspectivas: List[Dict]) -> Dict:
+    return {'perspectivas': [
+        {
+            'numero': str(i),
+            'enfoque': persp['enfoque'],
+            'resultado_propuesto': persp['resultado_propuesto'],
+            'monto_propuesto': f"{persp['monto_propuesto']:,.2f}",
+            'argumentos': [{'numero': str(j), 'texto': arg} for j, arg in enumerate(persp['argumentos'], 1)],
+        }
+        for i, persp in enumerate(perspectivas, 1)
+    ]}
+
+
+def escenarios(cantidad: int) -> Dict[str, List[Dict]]:
+    """Parámetros sintéticos por plantilla (montos distintos en cada decisión)"""
+    hechos = 'Colisión entre dos vehículos en intersección semaforizada, con lesiones leves. ' * 3
+    return {
+        'nivel1_pagare': [{'monto': f"{1000.0 + k * 37.5:,.2f}"} for k in range(cantidad)],
+        'nivel2_precedentes': [{
+            'precedente_titulo': 'Gómez c/ Transportes del Sur s/ Daños',
+            'precedente_tribunal': 'Cámara Civil y Comercial - Sala II',
+            'precedente_fecha': '2022-08-14',
+            'hechos_caso': hechos[:200],
+            'hechos_precedente': hechos[:200],
+            'principios': 'Responsabilidad objetiva del dueño o guardián (Art. 1757 CCyC).',
+            'montos_referencia': '- Gómez c/ Transportes del Sur s/ Daños (Sala II): $450,000.00',
+            'monto_sugerido': f"{5000.0 + k * 11.25:,.2f}",
+        } for k in range(cantidad)],
+        'nivel3': [[
+            {'enfoque': 'Interpretación favorable al actor', 'resultado_propuesto': 'acoge',
+             'monto_propuesto': 1000.0 + k, 'argumentos': ARGUMENTOS},
+            {'enfoque': 'Interpretación equilibrada', 'resultado_propuesto': 'acoge_parcial',
+             'monto_propuesto': (1000.0 + k) * 0.7, 'argumentos': ARGUMENTOS},
+            {'enfoque': 'Interpretación favorable al demandado', 'resultado_propuesto': 'rechaza',
+             'monto_propuesto': 0, 'argumentos': ARGUMENTOS},
+        ] for k in range(cantidad)],
+    }
+
+
+def medir(funcion: Callable, entradas: List, repeticiones: int) -> float:
+    """Microsegundos por decisión (mejor de `repeticiones`)"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for entrada in entradas:
+            funcion(entrada)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(entradas) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--decisiones', type=int, default=20000, help='decisiones por medición')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='justicia_bench_')
+    db_path = os.path.join(directorio, 'bench.db')
+    try:
+        MigradorEsquema(db_path).migrar(verbose=False)
+        inicio = time.perf_counter()
+        repositorio = RepositorioPlantillas(db_path)
+        repositorio.sincronizar()
+        vigentes = repositorio.vigentes()
+        carga_ms = (time.perf_counter() - inicio) * 1000
+    finally:
+        obtener_gestor(db_path).cerrar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    print(f"Registro y compilación de {len(vigentes)} plantillas: {carga_ms:.1f} ms\n")
+    print(f"{'plantilla':<20} {'anterior µs':>12} {'format_map µs':>14} {'compilada µs':>13} "
+          f"{'vs. anterior':>13} {'vs. format_map':>15}")
+    for plantilla_id, entradas in escenarios(args.decisiones).items():
+        compilada = vigentes[plantilla_id]
+        if plantilla_id == 'nivel3':
+            anterior = nivel3_anterior
+            entradas_compilada = [parametros_nivel3(p) for p in entradas]
+            format_map = None
+        else:
+            anterior = como_fstring(PLANTILLAS[plantilla_id])
+            entradas_compilada = entradas
+            texto = PLANTILLAS[plantilla_id]
+            format_map = texto.format_map
+
+        for entrada, parametros in zip(entradas[:100], entradas_compilada[:100]):
+            esperado = anterior(entrada)
+            assert compilada.renderizar(parametros) == esperado, plantilla_id
+            assert format_map is None or format_map(parametros) == esperado, plantilla_id
+
+        t_anterior = medir(anterior, entradas, args.repeticiones)
+        t_format = medir(format_map, entradas, args.repeticiones) if format_map else float('nan')
+        # nivel 3 incluye armar la lista de parámetros, que reemplaza a los `+=`
+        if plantilla_id == 'nivel3':
+            t_compilada = medir(lambda p: compilada.renderizar(parametros_nivel3(p)), entradas, args.repeticiones)
+        else:
+            t_compilada = medir(compilada.renderizar, entradas_compilada, args.repeticiones)
+        print(f"{plantilla_id:<20} {t_anterior:>12.2f} {t_format:>14.2f} {t_compilada:>13.2f} "
+              f"{t_anterior / t_compilada:>12.2f}x {t_format / t_compilada:>14.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+JUSTICIA.ar - Caché de Clasificaciones
+Clasificaciones por huella de caso (los rasgos que leen las reglas, tomados
+antes de analizar los textos), para que los ingresos masivos con textos
+modelo no vuelvan a analizar ni evaluar cada caso.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheClasificaciones:
+    """
+    LRU de clasificaciones de una versión del programa de reglas. Al pedir una
+    versión distinta de la guardada, la caché se vacía: una huella solo
+    determina la clasificación dentro de un mismo programa. Con
+    max_entradas=0 no guarda nada.
+    """
+
+    def __init__(self, max_entradas=4096):
+        self.max_entradas = max_entradas
+        self._version = None
+        self._entradas: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'aciertos': 0, 'fallos': 0, 'invalidaciones': 0}
+
+    def obtener(self, version: int, huella: Hashable) -> Optional[Any]:
+        """La clasificación guardada para la huella, o None"""
+        with self._lock:
+            self._vigente(version)
+            clasificacion = self._entradas.get(huella)
+            if clasificacion is None:
+                self._stats['fallos'] += 1
+                return None
+            self._entradas.move_to_end(huella)
+            self._stats['aciertos'] += 1
+            return clasificacion
+
+    def guardar(self, version: int, huella: Hashable, clasificacion: Any):
+        """
+        Recuerda la clasificación de la huella. Se descarta si entretanto otro
+        hilo ya pidió una versión de reglas distinta.
+        """
+        if self.max_entradas <= 0:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            self._entradas[huella] = clasificacion
+            self._entradas.move_to_end(huella)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def vaciar(self):
+        """Descarta todas las entradas (los contadores se conservan)"""
+        with self._lock:
+            self._entradas.clear()
+
+    def _vigente(self, version: int):
+        if version != self._version:
+            if self._version is not None and self._entradas:
+                self._stats['invalidaciones'] += 1
+            self._entradas.clear()
+            self._version = version
+
+    def estadisticas(self) -> Dict:
+        """Aciertos, fallos, invalidaciones y tamaño de la caché en este proceso"""
+        with self._lock:
+            return dict(self._stats, entradas=len(self._entradas), version_reglas=self._version)
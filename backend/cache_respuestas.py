@@ -0,0 +1,63 @@
+"""
+JUSTICIA.ar - Caché de Respuestas
+Respuestas JSON serializadas de datos de referencia, con ETag fuerte derivado
+de la versión de datos de la tabla de origen.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from versiones_datos import obtener_versiones
+
+
+class CacheRespuestas:
+    """
+    Guarda el cuerpo JSON ya serializado de cada variante de un endpoint junto
+    con su ETag. Una entrada es válida mientras la versión de su tabla no
+    cambie; al cambiar, la próxima petición la reconstruye una sola vez.
+    """
+
+    def __init__(self, db_path='justicia.db', max_entradas=128):
+        self.versiones = obtener_versiones(db_path)
+        self.max_entradas = max_entradas
+        self._entradas: 'OrderedDict[Tuple, Tuple[int, bytes, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'aciertos': 0, 'fallos': 0}
+
+    def obtener(self, tabla: str, variante: Tuple, construir: Callable[[], Dict]) -> Tuple[bytes, str]:
+        """
+        Devuelve (cuerpo_json, etag) para la variante pedida.
+
+        Args:
+            tabla: tabla de origen cuya versión invalida la entrada
+            variante: parámetros que distinguen la respuesta (p. ej. filtros)
+            construir: función que arma el dict de respuesta desde la BD
+        """
+        version = self.versiones.version(tabla)
+        clave = (tabla,) + tuple(variante)
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada and entrada[0] == version:
+                self._entradas.move_to_end(clave)
+                self._stats['aciertos'] += 1
+                return entrada[1], entrada[2]
+            self._stats['fallos'] += 1
+
+        cuerpo = json.dumps(construir(), ensure_ascii=False, sort_keys=True).encode('utf-8')
+        etag = f"{tabla}-{version}-{hashlib.sha1(cuerpo).hexdigest()[:16]}"
+
+        with self._lock:
+            self._entradas[clave] = (version, cuerpo, etag)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+        return cuerpo, etag
+
+    def estadisticas(self) -> Dict:
+        """Aciertos, fallos y tamaño de la caché en este proceso"""
+        with self._lock:
+            return dict(self._stats, entradas=len(self._entradas))
@@ -2,8 +2,79 @@
 JUSTICIA.ar - Motor de Clasificación de Casos
 Clasifica casos en 4 niveles según complejidad
 """
-import sqlite3
-from typing import Dict, List, Tuple
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+from analisis import CasoAnalizado
+from cache_clasificacion import CacheClasificaciones
+from conexion import obtener_gestor
+from reglas import ProgramaReglas, cargar_programa, np
+from versiones_datos import obtener_versiones
+
+logger = logging.getLogger(__name__)
+
+# Puntaje mínimo de los niveles 3, 2 y 1, y confianza por nivel calculado
+# (mismos cortes que clasificar_caso, para la versión vectorizada)
+UMBRALES_PUNTOS = (-2, 2, 6)
+CONFIANZA_NIVEL = (0.0, 0.95, 0.85, 0.75, 0.65)
+
+# Fragmentos fijos de la justificación por nivel
+ENCABEZADO_NIVEL = {
+    1: "NIVEL 1 - CASO RUTINARIO (Resolución automática)\n\n",
+    2: "NIVEL 2 - CASO COMPLEJO (IA sugiere, revisión humana rápida)\n\n",
+    3: "NIVEL 3 - CASO DIFÍCIL (Deliberación humana asistida por IA)\n\n",
+    4: "NIVEL 4 - CASO CONSTITUCIONAL (Deliberación ampliada)\n\n",
+}
+
+CONCLUSION_NIVEL = {
+    1: "\nEste caso puede resolverse automáticamente por la IA dado que presenta:\n"
+       "- Hechos claros y no controvertidos\n"
+       "- Prueba suficiente y fehaciente\n"
+       "- Jurisprudencia uniforme aplicable\n",
+    2: "\nEste caso requiere revisión humana porque presenta cierta complejidad,\n"
+       "pero puede ser resuelta rápidamente con asistencia de la IA.\n",
+    3: "\nEste caso requiere deliberación humana completa porque presenta:\n"
+       "- Cuestiones de hecho o derecho complejas\n"
+       "- Necesidad de valoración jurídica sofisticada\n"
+       "La IA asistirá generando múltiples perspectivas argumentales.\n",
+    4: "\nEste caso requiere el máximo nivel de deliberación porque involucra:\n"
+       "- Cuestiones constitucionales o de derechos fundamentales\n"
+       "- Necesidad de participación ampliada\n",
+}
+
+
+class Clasificacion(NamedTuple):
+    """Resultado compacto de una clasificación (factores: códigos de criterio)"""
+    nivel: int
+    confianza: float
+    puntos: int
+    factores: Tuple[str, ...]
+
+
+def evaluar_programa(programa: ProgramaReglas, analizado: CasoAnalizado) -> Clasificacion:
+    """Aplica un programa de reglas y los cortes de puntaje a un caso analizado"""
+    puntos, nivel_minimo_forzado, reglas = programa.evaluar(analizado)
+    
+    # Determinar nivel basado en puntos
+    if puntos >= 6:
+        nivel_calculado = 1
+        confianza = 0.95
+    elif puntos >= 2:
+        nivel_calculado = 2
+        confianza = 0.85
+    elif puntos >= -2:
+        nivel_calculado = 3
+        confianza = 0.75
+    else:
+        nivel_calculado = 4
+        confianza = 0.65
+    
+    # Aplicar nivel mínimo forzado
+    nivel_final = max(nivel_calculado, nivel_minimo_forzado)
+    
+    return Clasificacion(nivel_final, confianza, puntos, tuple(regla.factor for regla in reglas))
+
 
 class ClasificadorCasos:
     """
@@ -14,151 +85,132 @@ class ClasificadorCasos:
     - Nivel 4: Constitucional (deliberación ampliada)
     """
     
-    def __init__(self, db_path='justicia.db'):
+    def __init__(self, db_path='justicia.db', max_cache=4096):
         self.db_path = db_path
-        self.criterios = self._cargar_criterios()
+        self.db = obtener_gestor(db_path)
+        self.versiones = obtener_versiones(db_path)
+        self.cache = CacheClasificaciones(max_cache)
+        self._lock = threading.Lock()
+        self.programa = self._cargar_programa(self.versiones.version('criterios_clasificacion'))
+
+    def _cargar_programa(self, version: int) -> ProgramaReglas:
+        """Compila las reglas activas de criterios_clasificacion"""
+        with self.db.conexion() as conn:
+            return cargar_programa(conn, version)
+
+    def _programa_vigente(self) -> ProgramaReglas:
+        """
+        Programa de reglas de la versión actual. Si criterios_clasificacion
+        cambió (en cualquier worker), se recompila y se reemplaza de una vez;
+        si las filas nuevas son inválidas se conserva el programa anterior.
+        """
+        version = self.versiones.version('criterios_clasificacion')
+        programa = self.programa
+        if programa.version == version:
+            return programa
+
+        with self._lock:
+            if self.programa.version != version:
+                try:
+                    self.programa = self._cargar_programa(version)
+                    logger.info("Criterios de clasificación recargados (versión %s)", version)
+                except ValueError:
+                    logger.exception("Criterios de clasificación inválidos; se mantiene la versión %s",
+                                     self.programa.version)
+                    self.programa = ProgramaReglas(self.programa.reglas, version)
+            return self.programa
     
-    def _cargar_criterios(self) -> List[Dict]:
-        """Carga los criterios de clasificación desde la BD"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT factor, descripcion, peso, nivel_minimo 
-            FROM criterios_clasificacion
-        """)
-        
-        criterios = []
-        for row in cursor.fetchall():
-            criterios.append({
-                'factor': row[0],
-                'descripcion': row[1],
-                'peso': row[2],
-                'nivel_minimo': row[3]
-            })
-        
-        conn.close()
-        return criterios
+    def analizar(self, caso: Dict) -> CasoAnalizado:
+        """
+        Normaliza los textos del caso y busca todas las palabras clave una sola
+        vez. El resultado puede pasarse a clasificar_caso y a MotorDecision.
+        """
+        return self._programa_vigente().analizar(caso)
     
-    def clasificar_caso(self, caso: Dict) -> Tuple[int, float, str]:
+    def clasificar_caso(self, caso: Union[Dict, CasoAnalizado]) -> Clasificacion:
         """
-        Clasifica un caso y retorna (nivel, confianza, justificacion)
+        Clasifica un caso y retorna su Clasificacion (nivel, confianza, puntos,
+        factores). El texto se genera aparte, con justificacion(), solo si se pide.
         
         Args:
             caso: Dict con keys: tipo_caso, monto_reclamado, descripcion_hechos, 
-                  pruebas, tiene_contestacion, plantea_cuestion_constitucional
-        
-        Returns:
-            Tuple de (nivel 1-4, confianza 0-1, justificación texto)
+                  pruebas, tiene_contestacion, plantea_cuestion_constitucional;
+                  o el CasoAnalizado que devuelve analizar()
         """
-        puntos = 0
-        nivel_minimo_forzado = 1
-        factores_aplicados = []
-        
-        # Análisis de monto
-        monto = caso.get('monto_reclamado', 0)
-        if monto < 300000:
-            puntos += 2
-            factores_aplicados.append("Monto bajo (< $300.000)")
-        elif monto > 800000:
-            puntos -= 1
-            factores_aplicados.append("Monto elevado (> $800.000)")
-        
-        # Análisis de pruebas
-        pruebas = caso.get('pruebas', '').lower()
-        if any(palabra in pruebas for palabra in ['pagaré', 'contrato firmado', 'sentencia', 'documento fehaciente']):
-            puntos += 3
-            factores_aplicados.append("Prueba documental clara")
-        
-        # Análisis de contestación
-        if not caso.get('tiene_contestacion', True):
-            puntos += 3
-            factores_aplicados.append("Demandado no contestó o admite hechos")
-        
-        # Análisis de tipo de caso y precedentes
-        tipo_caso = caso.get('tipo_caso', '')
-        if tipo_caso == 'cobro_suma_dinero' and 'pagaré' in pruebas:
-            puntos += 3
-            factores_aplicados.append("Cobro ejecutivo con título")
-        
-        # Análisis de complejidad fáctica
-        descripcion = caso.get('descripcion_hechos', '').lower()
-        palabras_complejidad = ['pericial', 'técnico', 'controvertido', 'testigos contradictorios', 'versiones encontradas']
-        if any(palabra in descripcion for palabra in palabras_complejidad):
-            puntos -= 2
-            nivel_minimo_forzado = max(nivel_minimo_forzado, 2)
-            factores_aplicados.append("Requiere prueba compleja o hechos controvertidos")
-        
-        # Análisis de cuestiones constitucionales
-        if caso.get('plantea_cuestion_constitucional', False):
-            puntos -= 4
-            nivel_minimo_forzado = 4
-            factores_aplicados.append("Plantea cuestión constitucional")
-        
-        # Análisis de cuestiones novedosas
-        if 'novedoso' in descripcion or 'sin precedentes' in descripcion:
-            puntos -= 3
-            nivel_minimo_forzado = max(nivel_minimo_forzado, 3)
-            factores_aplicados.append("Cuestión jurídica novedosa sin precedentes claros")
-        
-        # Determinar nivel basado en puntos
-        if puntos >= 6:
-            nivel_calculado = 1
-            confianza = 0.95
-        elif puntos >= 2:
-            nivel_calculado = 2
-            confianza = 0.85
-        elif puntos >= -2:
-            nivel_calculado = 3
-            confianza = 0.75
-        else:
-            nivel_calculado = 4
-            confianza = 0.65
-        
-        # Aplicar nivel mínimo forzado
-        nivel_final = max(nivel_calculado, nivel_minimo_forzado)
-        
-        # Generar justificación
-        justificacion = self._generar_justificacion(nivel_final, factores_aplicados, puntos)
-        
-        return nivel_final, confianza, justificacion
+        programa = self._programa_vigente()
+        # Casos con los mismos rasgos (ingresos masivos con textos modelo) no
+        # se vuelven a analizar ni a evaluar
+        huella = programa.huella(caso)
+        clasificacion = self.cache.obtener(programa.version, huella)
+        if clasificacion is None:
+            clasificacion = evaluar_programa(programa, programa.analizar(caso))
+            self.cache.guardar(programa.version, huella, clasificacion)
+        return clasificacion
     
-    def _generar_justificacion(self, nivel: int, factores: List[str], puntos: int) -> str:
-        """Genera justificación textual de la clasificación"""
-        
-        descripciones_nivel = {
-            1: "NIVEL 1 - CASO RUTINARIO (Resolución automática)",
-            2: "NIVEL 2 - CASO COMPLEJO (IA sugiere, revisión humana rápida)",
-            3: "NIVEL 3 - CASO DIFÍCIL (Deliberación humana asistida por IA)",
-            4: "NIVEL 4 - CASO CONSTITUCIONAL (Deliberación ampliada)"
-        }
-        
-        justificacion = f"{descripciones_nivel[nivel]}\n\n"
-        justificacion += f"Puntaje de clasificación: {puntos}\n\n"
-        justificacion += "Factores considerados:\n"
-        
-        for i, factor in enumerate(factores, 1):
-            justificacion += f"{i}. {factor}\n"
-        
-        if nivel == 1:
-            justificacion += "\nEste caso puede resolverse automáticamente por la IA dado que presenta:\n"
-            justificacion += "- Hechos claros y no controvertidos\n"
-            justificacion += "- Prueba suficiente y fehaciente\n"
-            justificacion += "- Jurisprudencia uniforme aplicable\n"
-        elif nivel == 2:
-            justificacion += "\nEste caso requiere revisión humana porque presenta cierta complejidad,\n"
-            justificacion += "pero puede ser resuelta rápidamente con asistencia de la IA.\n"
-        elif nivel == 3:
-            justificacion += "\nEste caso requiere deliberación humana completa porque presenta:\n"
-            justificacion += "- Cuestiones de hecho o derecho complejas\n"
-            justificacion += "- Necesidad de valoración jurídica sofisticada\n"
-            justificacion += "La IA asistirá generando múltiples perspectivas argumentales.\n"
+    def clasificar_lote(self, casos: List[Union[Dict, CasoAnalizado]]) -> List[Clasificacion]:
+        """
+        Clasifica un lote de casos con el mismo resultado que clasificar_caso.
+
+        Se analiza y evalúa un caso por huella que no esté en la caché. Con
+        NumPy, esos casos se convierten en columnas (monto, aciertos de
+        palabras clave, banderas) y puntos, nivel y confianza se calculan con
+        operaciones vectoriales. Sin NumPy se evalúan uno por uno.
+        """
+        programa = self._programa_vigente()
+        huellas = [programa.huella(caso) for caso in casos]
+        resultados = [self.cache.obtener(programa.version, huella) for huella in huellas]
+
+        pendientes: Dict[Tuple, Union[Dict, CasoAnalizado]] = {}
+        for caso, huella, resultado in zip(casos, huellas, resultados):
+            if resultado is None:
+                pendientes.setdefault(huella, caso)
+        if not pendientes:
+            return resultados
+
+        analizados = [programa.analizar(caso) for caso in pendientes.values()]
+        if np is None:
+            calculadas = [evaluar_programa(programa, analizado) for analizado in analizados]
         else:
-            justificacion += "\nEste caso requiere el máximo nivel de deliberación porque involucra:\n"
-            justificacion += "- Cuestiones constitucionales o de derechos fundamentales\n"
-            justificacion += "- Necesidad de participación ampliada\n"
-        
-        return justificacion
+            calculadas = self._evaluar_lote(programa, analizados)
+        por_huella = dict(zip(pendientes, calculadas))
+        for huella, clasificacion in por_huella.items():
+            self.cache.guardar(programa.version, huella, clasificacion)
+        return [por_huella[huella] if resultado is None else resultado
+                for huella, resultado in zip(huellas, resultados)]
+
+    def _evaluar_lote(self, programa: ProgramaReglas, analizados: List[CasoAnalizado]) -> List[Clasificacion]:
+        """Versión vectorizada de evaluar_programa (requiere NumPy)"""
+        puntos, nivel_minimo, cumple = programa.evaluar_lote(analizados)
+        nivel_calculado = 4 - np.searchsorted(UMBRALES_PUNTOS, puntos, side='right')
+        confianza = np.asarray(CONFIANZA_NIVEL)[nivel_calculado]
+        nivel_final = np.maximum(nivel_calculado, nivel_minimo)
+
+        # Pocas combinaciones de reglas distintas: la tupla de factores se arma
+        # una vez por combinación
+        combinaciones: Dict[bytes, Tuple[str, ...]] = {}
+        factores = []
+        for i, clave in enumerate(np.packbits(cumple, axis=1)):
+            clave = clave.tobytes()
+            if clave not in combinaciones:
+                combinaciones[clave] = tuple(programa.reglas[j].factor for j in np.flatnonzero(cumple[i]))
+            factores.append(combinaciones[clave])
+
+        return [
+            Clasificacion(*fila)
+            for fila in zip(nivel_final.tolist(), confianza.tolist(), puntos.tolist(), factores)
+        ]
+
+    def justificacion(self, clasificacion: Clasificacion) -> str:
+        """Genera la justificación textual de una clasificación"""
+        etiquetas = self._programa_vigente().etiquetas
+        nivel = clasificacion.nivel
+        partes = [ENCABEZADO_NIVEL[nivel], f"Puntaje de clasificación: {clasificacion.puntos}\n\nFactores considerados:\n"]
+        partes.extend(
+            f"{i}. {etiquetas.get(factor, factor)}\n"
+            for i, factor in enumerate(clasificacion.factores, 1)
+        )
+        partes.append(CONCLUSION_NIVEL[nivel])
+        return ''.join(partes)
 
 
 def test_clasificador():
@@ -175,12 +227,12 @@ def test_clasificador():
         'plantea_cuestion_constitucional': False
     }
     
-    nivel, confianza, just = clasificador.clasificar_caso(caso1)
+    resultado = clasificador.clasificar_caso(caso1)
     print("=" * 70)
     print("CASO 1: Cobro de pagaré sin contestación")
     print("=" * 70)
-    print(just)
-    print(f"\nConfianza: {confianza:.2%}\n")
+    print(clasificador.justificacion(resultado))
+    print(f"\nConfianza: {resultado.confianza:.2%}\n")
     
     # Caso de prueba 2: Complejo
     caso2 = {
@@ -192,12 +244,12 @@ def test_clasificador():
         'plantea_cuestion_constitucional': False
     }
     
-    nivel, confianza, just = clasificador.clasificar_caso(caso2)
+    resultado = clasificador.clasificar_caso(caso2)
     print("=" * 70)
     print("CASO 2: Accidente con versiones contradictorias")
     print("=" * 70)
-    print(just)
-    print(f"\nConfianza: {confianza:.2%}\n")
+    print(clasificador.justificacion(resultado))
+    print(f"\nConfianza: {resultado.confianza:.2%}\n")
     
     # Caso de prueba 3: Constitucional
     caso3 = {
@@ -209,12 +261,12 @@ def test_clasificador():
         'plantea_cuestion_constitucional': True
     }
     
-    nivel, confianza, just = clasificador.clasificar_caso(caso3)
+    resultado = clasificador.clasificar_caso(caso3)
     print("=" * 70)
     print("CASO 3: Cuestión constitucional novedosa")
     print("=" * 70)
-    print(just)
-    print(f"\nConfianza: {confianza:.2%}\n")
+    print(clasificador.justificacion(resultado))
+    print(f"\nConfianza: {resultado.confianza:.2%}\n")
 
 if __name__ == '__main__':
     test_clasificador()
@@ -0,0 +1,224 @@
+"""
+JUSTICIA.ar - Gestor de Conexiones
+Conexiones SQLite persistentes por hilo, en modo WAL, con estadísticas de uso
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+
+class GestorConexiones:
+    """
+    Mantiene una conexión SQLite de larga vida por hilo y por proceso.
+
+    Cada conexión se abre una sola vez con journal WAL, busy_timeout, caché de
+    páginas y mmap configurados, y se reutiliza en cada petición. Si el proceso
+    cambia (fork de un worker de gunicorn) las conexiones heredadas se descartan
+    y se abren nuevas en el proceso hijo.
+    """
+
+    def __init__(self, db_path='justicia.db', busy_timeout_ms=5000,
+                 cache_kb=16384, mmap_bytes=256 * 1024 * 1024):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_kb = cache_kb
+        self.mmap_bytes = mmap_bytes
+
+        self._lock = threading.Lock()
+        self._reiniciar_estado()
+
+    def _reiniciar_estado(self):
+        """Descarta conexiones y contadores (al crear el gestor o tras un fork)"""
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._conexiones = {}  # ident del hilo -> conexión
+        self._stats = {
+            'conexiones_creadas': 0,
+            'usos': 0,
+            'transacciones': 0,
+            'rollbacks': 0,
+            'esperas_bloqueo': 0,
+            'espera_bloqueo_total_ms': 0.0,
+            'espera_bloqueo_max_ms': 0.0,
+            'errores_bloqueo': 0,
+        }
+
+    # ===== CONEXIONES =====
+
+    def _abrir(self) -> sqlite3.Connection:
+        """Abre una conexión nueva y aplica los PRAGMA de rendimiento"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            isolation_level=None,  # Transacciones explícitas vía transaccion()
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+
+        if self.db_path != ':memory:':
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_kb)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_bytes)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _obtener(self) -> sqlite3.Connection:
+        """Devuelve la conexión del hilo actual, abriéndola si hace falta"""
+        if self._pid != os.getpid():
+            # Proceso hijo: las conexiones del padre no deben usarse
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reiniciar_estado()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._abrir()
+            self._local.conn = conn
+            with self._lock:
+                vivos = {hilo.ident for hilo in threading.enumerate()}
+                for ident in [i for i in self._conexiones if i not in vivos]:
+                    self._conexiones.pop(ident).close()
+                # Un hilo nuevo puede reutilizar el ident de uno terminado
+                anterior = self._conexiones.get(threading.get_ident())
+                if anterior is not None:
+                    anterior.close()
+                self._conexiones[threading.get_ident()] = conn
+                self._stats['conexiones_creadas'] += 1
+
+        self._contar('usos')
+        return conn
+
+    @contextmanager
+    def conexion(self) -> Iterator[sqlite3.Connection]:
+        """
+        Presta la conexión del hilo para lecturas.
+
+        Si al salir quedó una transacción abierta por este bloque, se revierte
+        para no contaminar la próxima petición servida por el mismo hilo.
+        """
+        conn = self._obtener()
+        transaccion_previa = conn.in_transaction
+        try:
+            yield conn
+        finally:
+            if not transaccion_previa and conn.in_transaction:
+                conn.rollback()
+                self._contar('rollbacks')
+
+    @contextmanager
+    def transaccion(self, inmediata=False) -> Iterator[sqlite3.Connection]:
+        """
+        Ejecuta el bloque dentro de una transacción: COMMIT al salir o ROLLBACK
+        ante cualquier excepción.
+
+        Args:
+            inmediata: usa BEGIN IMMEDIATE para tomar el lock de escritura al
+                       inicio (recomendado para escrituras; evita deadlocks al
+                       promover el lock en modo WAL)
+        """
+        conn = self._obtener()
+
+        if conn.in_transaction:
+            # Transacción anidada: se une a la exterior
+            yield conn
+            return
+
+        inicio = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE" if inmediata else "BEGIN")
+        except sqlite3.OperationalError as e:
+            self._registrar_error(e)
+            raise
+        if inmediata:
+            self._registrar_espera(time.perf_counter() - inicio)
+
+        try:
+            yield conn
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.rollback()
+            self._contar('rollbacks')
+            self._registrar_error(e)
+            raise
+        else:
+            conn.commit()
+            self._contar('transacciones')
+
+    def marca_cambios(self) -> Tuple[int, int, int, int]:
+        """
+        Marca que cambia cada vez que la base pudo haber cambiado para este hilo.
+
+        Combina `PRAGMA data_version` (cambia cuando otra conexión, de este u
+        otro worker, confirma una escritura) con `total_changes` (escrituras de
+        la propia conexión). Es una consulta trivial, sin lectura de páginas.
+        """
+        with self.conexion() as conn:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            return self._pid, id(conn), data_version, conn.total_changes
+
+    def cerrar(self):
+        """Cierra todas las conexiones abiertas por este proceso"""
+        with self._lock:
+            for conn in self._conexiones.values():
+                conn.close()
+            self._conexiones.clear()
+            self._local = threading.local()
+
+    # ===== ESTADÍSTICAS =====
+
+    def _contar(self, clave: str):
+        """Incrementa un contador (los hilos del worker comparten _stats)"""
+        with self._lock:
+            self._stats[clave] += 1
+
+    def _registrar_espera(self, segundos: float):
+        """Acumula el tiempo de espera por el lock de escritura"""
+        ms = segundos * 1000.0
+        with self._lock:
+            self._stats['esperas_bloqueo'] += 1
+            self._stats['espera_bloqueo_total_ms'] += ms
+            if ms > self._stats['espera_bloqueo_max_ms']:
+                self._stats['espera_bloqueo_max_ms'] = ms
+
+    def _registrar_error(self, error: BaseException):
+        """Cuenta los SQLITE_BUSY que agotaron el busy_timeout"""
+        if isinstance(error, sqlite3.OperationalError) and 'locked' in str(error):
+            self._contar('errores_bloqueo')
+
+    def estadisticas(self) -> Dict:
+        """Devuelve estadísticas del pool y de espera por bloqueos en este proceso"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['conexiones_abiertas'] = len(self._conexiones)
+        esperas = stats['esperas_bloqueo']
+        stats['espera_bloqueo_promedio_ms'] = (
+            stats['espera_bloqueo_total_ms'] / esperas if esperas else 0.0
+        )
+        stats['pid'] = self._pid
+        stats['db_path'] = self.db_path
+        stats['configuracion'] = {
+            'busy_timeout_ms': self.busy_timeout_ms,
+            'cache_kb': self.cache_kb,
+            'mmap_bytes': self.mmap_bytes,
+        }
+        return stats
+
+
+_gestores: Dict[str, GestorConexiones] = {}
+_gestores_lock = threading.Lock()
+
+
+def obtener_gestor(db_path='justicia.db') -> GestorConexiones:
+    """Devuelve el gestor compartido para una ruta de base de datos"""
+    clave = db_path if db_path == ':memory:' else os.path.abspath(db_path)
+    with _gestores_lock:
+        gestor = _gestores.get(clave)
+        if gestor is None:
+            gestor = GestorConexiones(db_path)
+            _gestores[clave] = gestor
+        return gestor
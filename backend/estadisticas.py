@@ -0,0 +1,136 @@
+"""
+JUSTICIA.ar - Estadísticas de Casos
+Lectura de los contadores por nivel y estado mantenidos por triggers
+(tabla estadisticas_casos) y reconciliación contra la tabla casos.
+
+Ejecutar: python estadisticas.py [--db justicia.db] [--corregir]
+"""
+import argparse
+import sys
+from typing import Dict, List
+
+from conexion import obtener_gestor
+
+
+class EstadisticasCasos:
+    """
+    Estadísticas del tablero. `resumen()` cuesta O(cantidad de buckets) porque
+    lee los contadores incrementales; `recalcular()` agrega la tabla casos
+    completa y sirve como referencia para detectar desvíos.
+    """
+
+    def __init__(self, db_path='justicia.db'):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+
+    def resumen(self) -> Dict:
+        """Estadísticas desde los contadores incrementales"""
+        with self.db.conexion() as conn:
+            filas = conn.execute(
+                "SELECT dimension, valor, total FROM estadisticas_casos WHERE total != 0"
+            ).fetchall()
+
+        por_dimension = {'nivel': {}, 'estado': {}}
+        for fila in filas:
+            por_dimension[fila['dimension']][fila['valor']] = fila['total']
+        return self._formatear(por_dimension['nivel'], por_dimension['estado'])
+
+    def recalcular(self) -> Dict:
+        """Estadísticas agregando directamente la tabla casos (consistente)"""
+        with self.db.transaccion() as conn:  # Una sola instantánea para ambas consultas
+            reales = self._agregar_casos(conn)
+
+        por_dimension = {'nivel': {}, 'estado': {}}
+        for (dimension, valor), total in reales.items():
+            por_dimension[dimension][valor] = total
+        return self._formatear(por_dimension['nivel'], por_dimension['estado'])
+
+    def _agregar_casos(self, conn) -> Dict:
+        """Cuenta casos por (dimension, valor) recorriendo la tabla casos"""
+        reales = {}
+        for row in conn.execute("""
+            SELECT COALESCE(CAST(nivel_clasificacion AS TEXT), '') as valor, COUNT(*) as total
+            FROM casos
+            GROUP BY nivel_clasificacion
+        """):
+            reales[('nivel', row['valor'])] = row['total']
+        for row in conn.execute("""
+            SELECT estado as valor, COUNT(*) as total
+            FROM casos
+            GROUP BY estado
+        """):
+            reales[('estado', row['valor'])] = row['total']
+        return reales
+
+    def _formatear(self, por_nivel: Dict[str, int], por_estado: Dict[str, int]) -> Dict:
+        """Arma la respuesta de /api/estadisticas"""
+        casos_por_nivel = {
+            valor or 'sin_clasificar': total for valor, total in por_nivel.items()
+        }
+        resueltos = por_estado.get('resuelto', 0)
+        return {
+            'casos_por_nivel': casos_por_nivel,
+            'casos_por_estado': dict(por_estado),
+            'resueltos': resueltos,
+            'pendientes': sum(por_estado.values()) - resueltos
+        }
+
+    def reconciliar(self, corregir=False) -> List[Dict]:
+        """
+        Compara los contadores con la tabla casos.
+
+        Args:
+            corregir: si hay desvíos, reescribe los contadores desde casos
+
+        Returns:
+            Lista de desvíos: dimension, valor, contador, real
+        """
+        with self.db.transaccion(inmediata=corregir) as conn:
+            contadores = {
+                (row['dimension'], row['valor']): row['total']
+                for row in conn.execute("SELECT dimension, valor, total FROM estadisticas_casos")
+            }
+            reales = self._agregar_casos(conn)
+
+            desvios = []
+            for clave in sorted(set(contadores) | set(reales)):
+                contador, real = contadores.get(clave, 0), reales.get(clave, 0)
+                if contador != real:
+                    desvios.append({
+                        'dimension': clave[0],
+                        'valor': clave[1],
+                        'contador': contador,
+                        'real': real
+                    })
+
+            if desvios and corregir:
+                conn.execute("DELETE FROM estadisticas_casos")
+                conn.executemany("""
+                    INSERT INTO estadisticas_casos (dimension, valor, total) VALUES (?, ?, ?)
+                """, [(dimension, valor, total) for (dimension, valor), total in reales.items()])
+
+        return desvios
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcilia los contadores de estadísticas con la tabla casos')
+    parser.add_argument('--db', default='justicia.db', help='ruta de la base de datos')
+    parser.add_argument('--corregir', action='store_true', help='reescribir los contadores si hay desvíos')
+    args = parser.parse_args()
+
+    desvios = EstadisticasCasos(args.db).reconciliar(corregir=args.corregir)
+    if not desvios:
+        print("✓ Contadores consistentes con la tabla casos.")
+        return
+
+    print(f"⚠️  {len(desvios)} desvíos detectados:")
+    for d in desvios:
+        print(f"  {d['dimension']}={d['valor']!r}: contador {d['contador']}, real {d['real']}")
+    if args.corregir:
+        print("Contadores corregidos.")
+    else:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
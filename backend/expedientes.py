@@ -0,0 +1,69 @@
+"""
+JUSTICIA.ar - Asignador de Números de Expediente
+Secuencia por año respaldada por una tabla de contadores
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from conexion import obtener_gestor
+
+
+class AsignadorExpedientes:
+    """
+    Asigna números de expediente JUS-<año>-<n> sin duplicados entre workers.
+
+    El último número usado de cada año vive en `contadores_expediente`; reservar
+    es un UPDATE de una sola fila bajo BEGIN IMMEDIATE, por lo que el costo no
+    depende del tamaño de `casos` y dos procesos nunca obtienen el mismo número.
+    """
+
+    PREFIJO = 'JUS'
+
+    def __init__(self, db_path='justicia.db'):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+
+    def reservar(self, cantidad: int = 1, anio: Optional[int] = None) -> List[str]:
+        """
+        Reserva `cantidad` números consecutivos y los devuelve formateados.
+
+        Si se llama dentro de una transacción abierta (p. ej. la del INSERT del
+        caso) se une a ella: un ROLLBACK posterior libera también los números.
+        """
+        if cantidad < 1:
+            return []
+        anio = anio or datetime.now().year
+
+        with self.db.transaccion(inmediata=True) as conn:
+            cursor = conn.execute("""
+                UPDATE contadores_expediente SET ultimo = ultimo + ? WHERE anio = ?
+            """, (cantidad, anio))
+
+            if cursor.rowcount == 0:
+                # Primer expediente del año: continuar desde los ya existentes
+                ultimo_previo = self._ultimo_existente(conn, anio)
+                conn.execute("""
+                    INSERT INTO contadores_expediente (anio, ultimo) VALUES (?, ?)
+                """, (anio, ultimo_previo + cantidad))
+
+            ultimo = conn.execute(
+                "SELECT ultimo FROM contadores_expediente WHERE anio = ?", (anio,)
+            ).fetchone()[0]
+
+        primero = ultimo - cantidad + 1
+        return [self.formatear(anio, n) for n in range(primero, ultimo + 1)]
+
+    def _ultimo_existente(self, conn, anio: int) -> int:
+        """Mayor número ya usado en `casos` para el año (solo al crear el contador)"""
+        prefijo = f"{self.PREFIJO}-{anio}-"
+        fila = conn.execute("""
+            SELECT MAX(CAST(substr(numero_expediente, ?) AS INTEGER))
+            FROM casos
+            WHERE numero_expediente >= ? AND numero_expediente < ?
+        """, (len(prefijo) + 1, prefijo, f"{self.PREFIJO}-{anio}.")).fetchone()
+        return fila[0] or 0
+
+    @classmethod
+    def formatear(cls, anio: int, numero: int) -> str:
+        """Formatea un número de expediente"""
+        return f"{cls.PREFIJO}-{anio}-{numero:05d}"
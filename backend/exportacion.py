@@ -0,0 +1,126 @@
+"""
+JUSTICIA.ar - Exportación Masiva
+Genera exportaciones NDJSON o CSV recorriendo la tabla por id, de a bloques,
+para que la memoria del worker no dependa de la cantidad de filas.
+"""
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
+
+from conexion import obtener_gestor
+from plantillas import obtener_plantillas
+
+# Tabla exportable -> columna de fecha usada para filtrar por rango
+TABLAS_EXPORTABLES = {
+    'casos': 'fecha_ingreso',
+    'decisiones': 'fecha_decision',
+    'auditoria': 'fecha_evento',
+}
+
+FORMATOS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+TAMANO_BLOQUE = 500
+
+
+def validar_fecha(valor: Optional[str]) -> Optional[str]:
+    """Valida una fecha YYYY-MM-DD. Lanza ValueError si es inválida"""
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor).isoformat()
+    except ValueError:
+        raise ValueError(f'Fecha inválida (se espera AAAA-MM-DD): {valor}')
+
+
+class Exportador:
+    """Recorre una tabla exportable y la serializa por bloques"""
+
+    def __init__(self, db_path='justicia.db', tamano_bloque=TAMANO_BLOQUE):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        self.plantillas = obtener_plantillas(db_path)
+        self.tamano_bloque = tamano_bloque
+
+    def exportar(self, tabla: str, formato: str = 'ndjson',
+                 desde: Optional[str] = None, hasta: Optional[str] = None) -> Iterator[str]:
+        """
+        Genera el contenido de la exportación como fragmentos de texto.
+        Los parámetros se validan al llamar (antes de empezar a transmitir).
+
+        Args:
+            tabla: una de TABLAS_EXPORTABLES
+            formato: 'ndjson' o 'csv'
+            desde, hasta: rango de fechas inclusivo (AAAA-MM-DD)
+        """
+        if tabla not in TABLAS_EXPORTABLES:
+            raise ValueError(f'Tabla no exportable: {tabla}')
+        if formato not in FORMATOS:
+            raise ValueError(f'Formato no soportado: {formato}')
+
+        columna_fecha = TABLAS_EXPORTABLES[tabla]
+        query = f"SELECT * FROM {tabla} WHERE id > ?"
+        params = []
+        if desde:
+            query += f" AND {columna_fecha} >= ?"
+            params.append(desde)
+        if hasta:
+            query += f" AND {columna_fecha} < date(?, '+1 day')"
+            params.append(hasta)
+        query += " ORDER BY id LIMIT ?"
+
+        return self._generar(tabla, query, params, formato)
+
+    def _generar(self, tabla: str, query: str, params: List, formato: str) -> Iterator[str]:
+        """
+        Lee un bloque por consulta (id > último id exportado) y lo serializa.
+
+        Cada bloque es una lectura corta: no se mantiene una instantánea
+        abierta mientras el cliente consume la respuesta, que impediría al
+        checkpoint de WAL reciclar el archivo. Las filas se exportan como
+        estaban al leer su bloque.
+        """
+        serializar = self._bloque_ndjson if formato == 'ndjson' else self._bloque_csv
+        ultimo_id = 0
+        primero = True
+
+        while True:
+            with self.db.conexion() as conn:
+                cursor = conn.execute(query, [ultimo_id, *params, self.tamano_bloque])
+                columnas = [d[0] for d in cursor.description]
+                filas = cursor.fetchall()
+
+            if primero and formato == 'csv':
+                yield self._bloque_csv(None, [columnas])
+            primero = False
+
+            if not filas:
+                break
+            ultimo_id = filas[-1]['id']
+            if tabla == 'decisiones':
+                filas = self._completar_decisiones(columnas, filas)
+            yield serializar(columnas, filas)
+            if len(filas) < self.tamano_bloque:
+                break
+
+    def _completar_decisiones(self, columnas: List[str], filas) -> List[Tuple]:
+        """Arma la fundamentación de las decisiones guardadas con plantilla"""
+        return [
+            tuple(self.plantillas.completar_decision(dict(zip(columnas, fila))).values())
+            for fila in filas
+        ]
+
+    def _bloque_ndjson(self, columnas: List[str], filas) -> str:
+        return ''.join(
+            json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + '\n'
+            for fila in filas
+        )
+
+    def _bloque_csv(self, columnas: Optional[List[str]], filas) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(filas)
+        return buffer.getvalue()
@@ -0,0 +1,10 @@
+"""
+JUSTICIA.ar - Configuración de gunicorn
+gunicorn la carga sola al iniciarse desde backend/ (gunicorn app:app).
+"""
+
+
+def post_worker_init(worker):
+    """Arranca la cola de trabajos y la evaluación en sombra en cada worker, tras el fork"""
+    from app import iniciar_segundo_plano
+    iniciar_segundo_plano()
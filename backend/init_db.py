@@ -1,55 +1,57 @@
 """
 JUSTICIA.ar - Inicializador de Base de Datos
+Crea la base si no existe y aplica las migraciones pendientes sin borrar datos.
+
+Ejecutar: python init_db.py              (idempotente, seguro en producción)
+          python init_db.py --reiniciar  (borra la base y la recrea desde cero)
 """
-import sqlite3
+import argparse
 import os
 
-def init_database(db_path='justicia.db'):
-    """Inicializa la base de datos con el esquema y datos iniciales"""
-    
-    # Eliminar base de datos existente si existe
-    if os.path.exists(db_path):
-        os.remove(db_path)
-        print(f"Base de datos anterior eliminada: {db_path}")
-    
-    # Crear conexión
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    print("Creando esquema de base de datos...")
+from conexion import obtener_gestor
+from migraciones import MigradorEsquema
+from plantillas import obtener_plantillas
+
+def init_database(db_path='justicia.db', reiniciar=False):
+    """Inicializa o actualiza la base de datos con el esquema y datos iniciales"""
     
-    # Leer y ejecutar schema.sql
-    with open('../database/schema.sql', 'r', encoding='utf-8') as f:
-        schema_sql = f.read()
-        cursor.executescript(schema_sql)
+    db = obtener_gestor(db_path)
     
-    print("Esquema creado exitosamente.")
-    print("Poblando base de datos con datos iniciales...")
+    # Eliminar base de datos existente solo si se pide explícitamente
+    if reiniciar:
+        db.cerrar()
+        for sufijo in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + sufijo):
+                os.remove(db_path + sufijo)
+        print(f"Base de datos anterior eliminada: {db_path}")
     
-    # Leer y ejecutar seed_data.sql
-    with open('../database/seed_data.sql', 'r', encoding='utf-8') as f:
-        seed_sql = f.read()
-        cursor.executescript(seed_sql)
+    print("Aplicando migraciones de esquema...")
+    aplicadas = MigradorEsquema(db_path).migrar()
+    if not aplicadas:
+        print("El esquema ya está al día.")
     
-    conn.commit()
-    print("Datos iniciales cargados exitosamente.")
+    # Textos de plantillas del código o de archivos que cambiaron
+    plantillas_registradas = obtener_plantillas(db_path).sincronizar()
     
     # Verificar que los datos se cargaron
-    cursor.execute("SELECT COUNT(*) FROM articulos_legales")
-    articulos_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM casos_precedentes")
-    precedentes_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM usuarios")
-    usuarios_count = cursor.fetchone()[0]
+    with db.conexion() as conn:
+        articulos_count = conn.execute("SELECT COUNT(*) FROM articulos_legales").fetchone()[0]
+        precedentes_count = conn.execute("SELECT COUNT(*) FROM casos_precedentes").fetchone()[0]
+        usuarios_count = conn.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
     
     print(f"\n✓ {articulos_count} artículos legales cargados")
     print(f"✓ {precedentes_count} casos precedentes cargados")
     print(f"✓ {usuarios_count} usuarios de ejemplo creados")
+    if plantillas_registradas:
+        print(f"✓ {plantillas_registradas} versiones de plantillas de decisión registradas")
     print(f"\n¡Base de datos inicializada correctamente en {db_path}!")
     
-    conn.close()
+    db.cerrar()
 
 if __name__ == '__main__':
-    init_database()
+    parser = argparse.ArgumentParser(description='Inicializa o actualiza la base de datos')
+    parser.add_argument('--db', default='justicia.db', help='ruta de la base de datos')
+    parser.add_argument('--reiniciar', action='store_true',
+                        help='borrar la base existente y recrearla desde cero')
+    args = parser.parse_args()
+    init_database(args.db, reiniciar=args.reiniciar)
@@ -0,0 +1,215 @@
+"""
+JUSTICIA.ar - Migraciones de Esquema
+Aplica en orden las migraciones pendientes de database/migraciones sin
+destruir los datos existentes.
+
+Ejecutar: python migraciones.py [--db justicia.db] [--estado]
+"""
+import argparse
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, List
+
+from conexion import obtener_gestor
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database')
+MIGRACIONES_DIR = os.path.join(DATABASE_DIR, 'migraciones')
+
+# Nombre de archivo: NNN_descripcion.sql
+PATRON_MIGRACION = re.compile(r'^(\d+)_([\w-]+)\.sql$')
+
+# Directiva de cabecera: cada sentencia se aplica en su propia transacción corta
+DIRECTIVA_ONLINE = '-- migracion: online'
+
+
+def listar_migraciones(directorio: str = MIGRACIONES_DIR) -> List[Dict]:
+    """Lista las migraciones disponibles ordenadas por versión"""
+    migraciones = []
+    for archivo in os.listdir(directorio):
+        coincidencia = PATRON_MIGRACION.match(archivo)
+        if not coincidencia:
+            continue
+        ruta = os.path.join(directorio, archivo)
+        with open(ruta, 'r', encoding='utf-8') as f:
+            sql = f.read()
+        migraciones.append({
+            'version': int(coincidencia.group(1)),
+            'nombre': coincidencia.group(2),
+            'sql': sql,
+            'online': sql.lstrip().startswith(DIRECTIVA_ONLINE)
+        })
+
+    migraciones.sort(key=lambda m: m['version'])
+    versiones = [m['version'] for m in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise ValueError(f"Versiones de migración duplicadas en {directorio}")
+    return migraciones
+
+
+def dividir_sentencias(sql: str) -> List[str]:
+    """Divide un script en sentencias completas (respeta los cuerpos de triggers)"""
+    sentencias = []
+    actual = ''
+    for linea in sql.splitlines(keepends=True):
+        actual += linea
+        if sqlite3.complete_statement(actual):
+            if actual.strip():
+                sentencias.append(actual.strip())
+            actual = ''
+    if actual.strip() and not all(l.strip().startswith('--') or not l.strip()
+                                  for l in actual.splitlines()):
+        raise ValueError(f"Sentencia SQL incompleta: {actual.strip()[:80]}")
+    return sentencias
+
+
+class MigradorEsquema:
+    """
+    Registra las versiones aplicadas en `schema_migraciones` y aplica las
+    pendientes en orden.
+
+    Las migraciones comunes se aplican en una sola transacción. Las marcadas
+    con `-- migracion: online` (creación de índices) aplican cada sentencia en
+    su propia transacción, de modo que las escrituras de la API se intercalan
+    entre índice e índice y las lecturas nunca se bloquean (modo WAL). Después
+    de cada migración se ejecuta ANALYZE.
+    """
+
+    def __init__(self, db_path='justicia.db', directorio=MIGRACIONES_DIR):
+        self.db_path = db_path
+        self.directorio = directorio
+        self.db = obtener_gestor(db_path)
+
+    def _asegurar_base(self) -> bool:
+        """Crea el esquema base y los datos iniciales si la base está vacía"""
+        with self.db.transaccion(inmediata=True) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migraciones (
+                    version INTEGER PRIMARY KEY,
+                    nombre TEXT NOT NULL,
+                    aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    duracion_ms REAL
+                )
+            """)
+            existe = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'casos'"
+            ).fetchone()
+            if existe:
+                return False
+
+            for archivo in ('schema.sql', 'seed_data.sql'):
+                with open(os.path.join(DATABASE_DIR, archivo), 'r', encoding='utf-8') as f:
+                    for sentencia in dividir_sentencias(f.read()):
+                        conn.execute(sentencia)
+        return True
+
+    def versiones_aplicadas(self) -> Dict[int, str]:
+        """Versiones ya registradas en schema_migraciones"""
+        with self.db.conexion() as conn:
+            existe = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migraciones'"
+            ).fetchone()
+            if not existe:
+                return {}
+            return {row['version']: row['nombre'] for row in conn.execute(
+                "SELECT version, nombre FROM schema_migraciones ORDER BY version"
+            )}
+
+    def pendientes(self) -> List[Dict]:
+        """Migraciones disponibles que aún no se aplicaron"""
+        aplicadas = self.versiones_aplicadas()
+        return [m for m in listar_migraciones(self.directorio) if m['version'] not in aplicadas]
+
+    def migrar(self, verbose=True) -> List[int]:
+        """
+        Aplica todas las migraciones pendientes en orden.
+
+        Returns:
+            Lista de versiones aplicadas en esta ejecución
+        """
+        if self._asegurar_base() and verbose:
+            print("Base de datos vacía: esquema base y datos iniciales creados.")
+
+        aplicadas = []
+        for migracion in self.pendientes():
+            inicio = time.perf_counter()
+            if migracion['online']:
+                aplicada = self._aplicar_online(migracion, inicio)
+            else:
+                aplicada = self._aplicar_atomica(migracion, inicio)
+            if not aplicada:
+                continue  # Otro proceso la aplicó primero
+
+            self._analizar()
+            aplicadas.append(migracion['version'])
+            if verbose:
+                modo = ' (online)' if migracion['online'] else ''
+                print(f"✓ {migracion['version']:03d}_{migracion['nombre']}{modo} "
+                      f"en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+        return aplicadas
+
+    def _aplicar_atomica(self, migracion: Dict, inicio: float) -> bool:
+        """Aplica toda la migración y su registro en una única transacción"""
+        with self.db.transaccion(inmediata=True) as conn:
+            if self._ya_aplicada(conn, migracion['version']):
+                return False
+            for sentencia in dividir_sentencias(migracion['sql']):
+                conn.execute(sentencia)
+            self._registrar(conn, migracion, inicio)
+        return True
+
+    def _aplicar_online(self, migracion: Dict, inicio: float) -> bool:
+        """Aplica cada sentencia en su propia transacción (deben ser idempotentes)"""
+        for sentencia in dividir_sentencias(migracion['sql']):
+            with self.db.transaccion(inmediata=True) as conn:
+                if self._ya_aplicada(conn, migracion['version']):
+                    return False
+                conn.execute(sentencia)
+
+        with self.db.transaccion(inmediata=True) as conn:
+            if self._ya_aplicada(conn, migracion['version']):
+                return False
+            self._registrar(conn, migracion, inicio)
+        return True
+
+    def _ya_aplicada(self, conn, version: int) -> bool:
+        return conn.execute(
+            "SELECT 1 FROM schema_migraciones WHERE version = ?", (version,)
+        ).fetchone() is not None
+
+    def _registrar(self, conn, migracion: Dict, inicio: float):
+        conn.execute("""
+            INSERT INTO schema_migraciones (version, nombre, duracion_ms) VALUES (?, ?, ?)
+        """, (migracion['version'], migracion['nombre'], (time.perf_counter() - inicio) * 1000))
+
+    def _analizar(self):
+        """Actualiza las estadísticas del planificador (muestreo acotado)"""
+        with self.db.conexion() as conn:
+            conn.execute("PRAGMA analysis_limit = 1000")
+            conn.execute("ANALYZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aplica migraciones de esquema pendientes')
+    parser.add_argument('--db', default='justicia.db', help='ruta de la base de datos')
+    parser.add_argument('--estado', action='store_true', help='solo mostrar migraciones aplicadas y pendientes')
+    args = parser.parse_args()
+
+    migrador = MigradorEsquema(args.db)
+
+    if args.estado:
+        aplicadas = migrador.versiones_aplicadas()
+        for migracion in listar_migraciones(migrador.directorio):
+            marca = '✓' if migracion['version'] in aplicadas else ' '
+            print(f"[{marca}] {migracion['version']:03d}_{migracion['nombre']}")
+        return
+
+    aplicadas = migrador.migrar()
+    if not aplicadas:
+        print("La base de datos está al día.")
+
+
+if __name__ == '__main__':
+    main()
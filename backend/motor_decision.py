@@ -2,10 +2,33 @@
 JUSTICIA.ar - Motor de Decisión
 Genera decisiones basadas en el nivel del caso
 """
-import sqlite3
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 import re
 
+from analisis import CasoAnalizado
+from conexion import obtener_gestor
+from plantillas import obtener_plantillas
+from precedentes import BusquedaPrecedentes, crear_busqueda, obtener_indice_precedentes
+
+# Precedentes con monto reclamado más cercano que se promedian para sugerir el monto de nivel 2
+VECINOS_MONTO = 5
+
+
+def datos_para_decision(caso: Dict) -> Dict:
+    """
+    Campos de una fila de casos que usa el motor. casos no guarda
+    tiene_contestacion ni plantea_cuestion_constitucional: se simplifican.
+    """
+    return {
+        'tipo_caso': caso['tipo_caso'],
+        'monto_reclamado': caso['monto_reclamado'],
+        'descripcion_hechos': caso['descripcion_hechos'],
+        'pruebas': caso['pruebas'],
+        'tiene_contestacion': True,
+        'plantea_cuestion_constitucional': False
+    }
+
+
 class MotorDecision:
     """
     Genera decisiones para casos según su nivel:
@@ -15,26 +38,43 @@ class MotorDecision:
     - Nivel 4: Estructura para deliberación ampliada
     """
     
-    def __init__(self, db_path='justicia.db'):
+    def __init__(self, db_path='justicia.db', busqueda_precedentes: Union[str, BusquedaPrecedentes] = 'texto'):
         self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        if isinstance(busqueda_precedentes, str):
+            busqueda_precedentes = crear_busqueda(busqueda_precedentes, db_path)
+        self.precedentes = busqueda_precedentes
+        self.indice_precedentes = obtener_indice_precedentes(db_path)
+        self.plantillas = obtener_plantillas(db_path)
+        self.plantillas.vigentes()  # compila todas las plantillas al arrancar
     
-    def decidir_caso(self, caso: Dict, nivel: int) -> Dict:
+    def decidir_caso(self, caso: Union[Dict, CasoAnalizado], nivel: int) -> Dict:
         """
         Genera decisión según el nivel del caso
         
+        Args:
+            caso: Dict del caso, o el CasoAnalizado ya construido por el
+                  clasificador (evita normalizar y recorrer los textos de nuevo)
+        
         Returns:
             Dict con: resultado, monto_otorgado, fundamentacion, articulos_aplicados
+            y plantilla ({'id', 'version', 'parametros'})
         """
+        if isinstance(caso, CasoAnalizado):
+            analizado, caso = caso, caso.caso
+        else:
+            analizado = CasoAnalizado(caso)
+        
         if nivel == 1:
-            return self._decidir_nivel_1(caso)
+            return self._decidir_nivel_1(caso, analizado)
         elif nivel == 2:
-            return self._decidir_nivel_2(caso)
+            return self._decidir_nivel_2(caso, analizado)
         elif nivel == 3:
             return self._decidir_nivel_3(caso)
         else:
             return self._decidir_nivel_4(caso)
     
-    def _decidir_nivel_1(self, caso: Dict) -> Dict:
+    def _decidir_nivel_1(self, caso: Dict, analizado: CasoAnalizado) -> Dict:
         """Decisión automática para casos rutinarios"""
         tipo = caso['tipo_caso']
         monto = caso['monto_reclamado']
@@ -42,49 +82,17 @@ class MotorDecision:
         # Lógica determinística simple
         if tipo == 'cobro_suma_dinero':
             # Si es cobro ejecutivo con título, se acoge íntegramente
-            if 'pagaré' in caso.get('pruebas', '').lower():
+            if analizado.contiene('pruebas', 'pagaré'):
                 resultado = 'acoge'
                 monto_otorgado = monto * 1.15  # Capital + intereses estimados
                 
-                fundamentacion = f"""
-RESUELVO:
-
-I. HACER LUGAR a la demanda de COBRO DE PESOS interpuesta.
-
-II. CONDENAR al demandado a pagar al actor la suma de ${monto:,.2f} en concepto de capital, 
-más intereses desde la mora hasta el efectivo pago, calculados a la tasa que fije el Banco Central.
-
-III. COSTAS al demandado vencido.
-
-FUNDAMENTOS:
-
-1. HECHOS PROBADOS: Se encuentra acreditada la existencia de la obligación mediante pagaré 
-debidamente firmado por el demandado (Art. 1816 CCyC - título ejecutivo).
-
-2. MORA AUTOMÁTICA: Tratándose de obligación con plazo determinado, el deudor incurre en mora 
-automáticamente al vencimiento (Art. 886 CCyC).
-
-3. FALTA DE DEFENSA SUSTANCIAL: El demandado no ha opuesto defensas admisibles que enerven 
-la pretensión ejecutiva.
-
-4. DERECHO APLICABLE:
-   - Art. 729 CCyC: Concepto de obligación
-   - Art. 730 CCyC: Efectos del incumplimiento
-   - Art. 1816 CCyC: Pagaré como título ejecutivo
-
-5. INTERESES: Corresponden intereses moratorios desde el vencimiento hasta el efectivo pago 
-como accesorio de la obligación principal (Arts. 765-768 CCyC).
-
-6. COSTAS: El art. 130 CPCC establece que las costas se imponen al vencido, siendo el demandado 
-quien ha incumplido sin justificación.
-
-Por todo lo expuesto, RESUELVO como se indica en el decisorio.
-                """
+                fundamentacion, plantilla = self.plantillas.aplicar('nivel1_pagare', {'monto': f"{monto:,.2f}"})
                 
                 return {
                     'resultado': resultado,
                     'monto_otorgado': monto_otorgado,
                     'fundamentacion': fundamentacion,
+                    'plantilla': plantilla,
                     'articulos_aplicados': ['729', '730', '886', '1816'],
                     'tipo_decision': 'automatica',
                     'confianza': 0.95
@@ -97,34 +105,23 @@ Por todo lo expuesto, RESUELVO como se indica en el decisorio.
         """Decisión genérica para nivel 1"""
         monto = caso['monto_reclamado']
         
-        fundamentacion = f"""
-RESUELVO:
-
-I. HACER LUGAR a la demanda interpuesta.
-
-II. CONDENAR al demandado a pagar al actor la suma reclamada con más intereses y costas.
-
-FUNDAMENTOS BÁSICOS:
-
-Los hechos invocados se encuentran suficientemente acreditados mediante la prueba documental acompañada.
-El demandado no ha desvirtuado la pretensión del actor.
-Corresponde hacer lugar a lo peticionado conforme los artículos 1716 y 1740 del CCyC.
-        """
+        fundamentacion, plantilla = self.plantillas.aplicar('nivel1_generico', {})
         
         return {
             'resultado': 'acoge',
             'monto_otorgado': monto,
             'fundamentacion': fundamentacion,
+            'plantilla': plantilla,
             'articulos_aplicados': ['1716', '1740'],
             'tipo_decision': 'automatica',
             'confianza': 0.85
         }
     
-    def _decidir_nivel_2(self, caso: Dict) -> Dict:
+    def _decidir_nivel_2(self, caso: Dict, analizado: CasoAnalizado) -> Dict:
         """Sugerencia argumentada para revisión humana"""
         
         # Buscar casos similares en la base de precedentes
-        precedentes_similares = self._buscar_precedentes_similares(caso)
+        precedentes_similares = self._buscar_precedentes_similares(analizado)
         
         tipo = caso['tipo_caso']
         monto = caso['monto_reclamado']
@@ -132,48 +129,32 @@ Corresponde hacer lugar a lo peticionado conforme los artículos 1716 y 1740 del
         # Generar sugerencia basada en precedentes
         if precedentes_similares:
             precedente_ref = precedentes_similares[0]
-            ratio = monto / precedente_ref['monto_aproximado'] if precedente_ref['monto_aproximado'] > 0 else 1
-            monto_sugerido = monto * 0.9  # Ajuste conservador
+            monto_sugerido, referencias = self._sugerir_monto(tipo, monto)
+            if referencias:
+                montos_referencia = '\n'.join(
+                    f"- {p['titulo']} ({p['tribunal']}): reclamado ${p['monto_reclamado']:,.2f}, "
+                    f"otorgado ${p['monto_otorgado']:,.2f}" for p in referencias
+                )
+            else:
+                montos_referencia = "- Sin precedentes del tipo con monto otorgado registrado (ajuste conservador del 90%)"
             
-            fundamentacion = f"""
-SUGERENCIA DE RESOLUCIÓN (Requiere revisión humana)
-
-ANÁLISIS DEL CASO:
-
-El presente caso presenta similitudes con el precedente "{precedente_ref['titulo']}" 
-({precedente_ref['tribunal']}, {precedente_ref['fecha_sentencia']}).
-
-HECHOS COMPARABLES:
-- Caso actual: {caso['descripcion_hechos'][:200]}...
-- Precedente: {precedente_ref['hechos_resumidos'][:200]}...
-
-CRITERIO JURISPRUDENCIAL APLICABLE:
-{precedente_ref['principios_aplicados']}
-
-SUGERENCIA DE DECISIÓN:
-Hacer lugar parcialmente a la demanda por un monto de ${monto_sugerido:,.2f}, 
-considerando la proporcionalidad con casos similares y las circunstancias particulares.
-
-ARTÍCULOS SUGERIDOS A APLICAR:
-- Art. 1716 CCyC (Deber de reparar)
-- Art. 1740 CCyC (Reparación plena)
-- Art. 1757 CCyC (si aplica responsabilidad objetiva)
-
-NOTA PARA EL JUEZ REVISOR:
-Este caso requiere su evaluación particular respecto de:
-1. La valoración de la prueba aportada
-2. La existencia de atenuantes o agravantes específicos
-3. La proporcionalidad del monto sugerido con el daño efectivamente acreditado
-
-Confianza de la sugerencia: 85%
-            """
+            # Los datos del precedente citado se leen de la base al armar el texto
+            fundamentacion, plantilla = self.plantillas.aplicar('nivel2_precedentes', {
+                'precedente_id': precedente_ref['id'],
+                'precedente_revision': precedente_ref['revision'],
+                'hechos_caso': caso['descripcion_hechos'][:200],
+                'montos_referencia': montos_referencia,
+                'monto_sugerido': f"{monto_sugerido:,.2f}",
+            })
             
             return {
                 'resultado': 'acoge_parcial',
                 'monto_otorgado': monto_sugerido,
                 'fundamentacion': fundamentacion,
+                'plantilla': plantilla,
                 'articulos_aplicados': ['1716', '1740', '1757'],
                 'precedentes_considerados': [precedente_ref['titulo']],
+                'precedentes_monto': [p['titulo'] for p in referencias],
                 'tipo_decision': 'asistida',
                 'confianza': 0.85
             }
@@ -211,39 +192,24 @@ Confianza de la sugerencia: 85%
             'argumentos': self._generar_argumentos_pro_demandado(caso)
         })
         
-        fundamentacion = """
-ANÁLISIS MULTIPERSPECTIVA PARA DELIBERACIÓN
-
-Este caso requiere deliberación humana. La IA presenta tres perspectivas argumentales:
-
-"""
-        
-        for i, persp in enumerate(perspectivas, 1):
-            fundamentacion += f"\n{'='*60}\nPERSPECTIVA {i}: {persp['enfoque']}\n{'='*60}\n"
-            fundamentacion += f"Resultado propuesto: {persp['resultado_propuesto']}\n"
-            fundamentacion += f"Monto propuesto: ${persp['monto_propuesto']:,.2f}\n\n"
-            fundamentacion += "ARGUMENTOS:\n"
-            for j, arg in enumerate(persp['argumentos'], 1):
-                fundamentacion += f"{j}. {arg}\n"
-            fundamentacion += "\n"
-        
-        fundamentacion += """
-RECOMENDACIÓN PARA EL JUEZ:
-
-Este caso presenta complejidades que requieren su valoración jurídica experta.
-Se sugiere:
-1. Analizar detenidamente la prueba producida
-2. Considerar las tres perspectivas presentadas
-3. Ponderar los principios en conflicto según su criterio
-4. Fundamentar claramente la decisión adoptada
-
-La IA está disponible para análisis adicionales que requiera.
-        """
+        fundamentacion, plantilla = self.plantillas.aplicar('nivel3', {
+            'perspectivas': [
+                {
+                    'numero': str(i),
+                    'enfoque': persp['enfoque'],
+                    'resultado_propuesto': persp['resultado_propuesto'],
+                    'monto_propuesto': f"{persp['monto_propuesto']:,.2f}",
+                    'argumentos': [{'numero': str(j), 'texto': arg} for j, arg in enumerate(persp['argumentos'], 1)],
+                }
+                for i, persp in enumerate(perspectivas, 1)
+            ]
+        })
         
         return {
             'resultado': 'requiere_deliberacion',
             'perspectivas': perspectivas,
             'fundamentacion': fundamentacion,
+            'plantilla': plantilla,
             'tipo_decision': 'humana',
             'confianza': 0.70
         }
@@ -251,112 +217,51 @@ La IA está disponible para análisis adicionales que requiera.
     def _decidir_nivel_4(self, caso: Dict) -> Dict:
         """Estructura para deliberación ampliada"""
         
-        fundamentacion = f"""
-CASO DE NIVEL 4 - DELIBERACIÓN CONSTITUCIONAL AMPLIADA
-
-Este caso presenta cuestiones de particular relevancia que trascienden el interés individual
-de las partes y ameritan un procedimiento deliberativo especial.
-
-DESCRIPCIÓN DEL CASO:
-{caso['descripcion_hechos']}
-
-CUESTIONES A DELIBERAR:
-
-1. CUESTIÓN CONSTITUCIONAL PLANTEADA:
-   [Requiere identificación específica por parte del tribunal]
-
-2. PRINCIPIOS EN TENSIÓN:
-   - Derecho/principio A vs. Derecho/principio B
-   - [A completar según el caso concreto]
-
-3. PRECEDENTES RELEVANTES:
-   [Requiere análisis de jurisprudencia constitucional aplicable]
-
-4. IMPACTO SISTÉMICO:
-   Esta decisión puede sentar precedente para casos futuros similares.
-
-PROCEDIMIENTO SUGERIDO:
-
-1. Convocatoria a audiencia pública con participación de:
-   - Partes del juicio
-   - Amicus curiae (si corresponde)
-   - Organizaciones de la sociedad civil interesadas
-
-2. Requerimiento de informes a:
-   - Ministerio Público
-   - Defensoría del Pueblo
-   - Otros organismos pertinentes
-
-3. Plazo ampliado para alegatos y fundamentación
-
-4. Deliberación en tribunal colegiado (si corresponde según organización judicial)
-
-NOTA IMPORTANTE:
-Este nivel de caso no admite resolución automatizada ni asistida por IA.
-Requiere el ejercicio pleno de la función jurisdiccional humana con todas las garantías.
-
-La IA solo proporciona estructura y herramientas de análisis, no sugerencias de decisión.
-        """
+        fundamentacion, plantilla = self.plantillas.aplicar('nivel4', {'descripcion_hechos': caso['descripcion_hechos']})
         
         return {
             'resultado': 'requiere_deliberacion_ampliada',
             'fundamentacion': fundamentacion,
+            'plantilla': plantilla,
             'tipo_decision': 'deliberativa',
             'confianza': 0.60
         }
     
-    def _buscar_precedentes_similares(self, caso: Dict) -> List[Dict]:
-        """Busca casos precedentes similares en la base de datos"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        tipo_caso = caso['tipo_caso']
-        
-        cursor.execute("""
-            SELECT titulo, tribunal, fecha_sentencia, hechos_resumidos, 
-                   decision, monto_aproximado, principios_aplicados
-            FROM casos_precedentes
-            WHERE tipo_caso = ?
-            ORDER BY fecha_sentencia DESC
-            LIMIT 3
-        """, (tipo_caso,))
-        
-        precedentes = []
-        for row in cursor.fetchall():
-            precedentes.append({
-                'titulo': row[0],
-                'tribunal': row[1],
-                'fecha_sentencia': row[2],
-                'hechos_resumidos': row[3],
-                'decision': row[4],
-                'monto_aproximado': row[5],
-                'principios_aplicados': row[6]
-            })
+    def _buscar_precedentes_similares(self, analizado: CasoAnalizado) -> List[Dict]:
+        """Busca casos precedentes similares con la estrategia configurada"""
+        return self.precedentes.buscar(analizado, 3)
+    
+    def _sugerir_monto(self, tipo_caso: str, monto: float) -> Tuple[float, List[Dict]]:
+        """
+        Monto sugerido según los precedentes del tipo con monto reclamado más
+        cercano: al reclamo se le aplica la proporción otorgado / reclamado de
+        esos precedentes, promediada con peso inverso a la distancia, sin
+        superar lo reclamado. Sin precedentes con monto otorgado, el ajuste
+        conservador del 90%.
+        """
+        referencias = self.indice_precedentes.cercanos_por_monto(tipo_caso, monto, VECINOS_MONTO)
+        if not referencias:
+            return monto * 0.9, []
         
-        conn.close()
-        return precedentes
+        # El suavizado evita dividir por cero si un precedente coincide con el monto
+        suavizado = max(abs(monto) * 0.01, 1.0)
+        pesos = [1.0 / (abs(p['monto_reclamado'] - monto) + suavizado) for p in referencias]
+        proporcion = sum(
+            w * p['monto_otorgado'] / p['monto_reclamado'] for w, p in zip(pesos, referencias)
+        ) / sum(pesos)
+        return min(monto, monto * proporcion), referencias
     
     def _sugerencia_sin_precedentes(self, caso: Dict) -> Dict:
         """Sugerencia cuando no hay precedentes claros"""
         monto = caso['monto_reclamado']
         
-        fundamentacion = """
-SUGERENCIA DE RESOLUCIÓN (Sin precedentes directos)
-
-Este caso no cuenta con precedentes directamente aplicables en la base de datos.
-
-Se sugiere análisis cuidadoso de:
-1. Principios generales del derecho aplicable
-2. Doctrina mayoritaria sobre el tema
-3. Proporcionalidad de la pretensión
-
-RECOMENDACIÓN: Revisión humana detallada requerida.
-        """
+        fundamentacion, plantilla = self.plantillas.aplicar('nivel2_sin_precedentes', {})
         
         return {
             'resultado': 'requiere_analisis',
             'monto_otorgado': None,
             'fundamentacion': fundamentacion,
+            'plantilla': plantilla,
             'tipo_decision': 'asistida',
             'confianza': 0.60
         }
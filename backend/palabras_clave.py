@@ -0,0 +1,74 @@
+"""
+JUSTICIA.ar - Búsqueda de Palabras Clave
+Buscador multi-patrón: todas las palabras clave compiladas en una única
+expresión regular con forma de trie, que recorre cada texto una sola vez.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, Set
+
+
+def _construir_trie(palabras: Iterable[str]) -> Dict:
+    """Trie de caracteres; la clave '' marca el fin de una palabra"""
+    raiz: Dict = {}
+    for palabra in palabras:
+        nodo = raiz
+        for caracter in palabra:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[''] = {}
+    return raiz
+
+
+def _trie_a_regex(nodo: Dict) -> str:
+    """
+    Convierte el trie en regex. Cada nivel es una alternación de caracteres
+    distintos (determinista) y el sufijo opcional es codicioso, así que en cada
+    posición la expresión coincide con la palabra clave más larga.
+    """
+    fin = '' in nodo
+    ramas = [re.escape(c) + _trie_a_regex(hijo) for c, hijo in sorted(nodo.items()) if c != '']
+    if not ramas:
+        return ''
+    if len(ramas) == 1 and not fin:
+        return ramas[0]
+    cuerpo = '(?:' + '|'.join(ramas) + ')'
+    return cuerpo + '?' if fin else cuerpo
+
+
+class BuscadorPalabras:
+    """
+    Encuentra todas las palabras clave (como subcadenas) presentes en un texto
+    en una sola pasada.
+
+    Cada búsqueda salta (en C) hasta la próxima posición donde empieza alguna
+    palabra y obtiene la más larga que empieza ahí; la siguiente búsqueda
+    arranca un carácter después, así que también se ven palabras solapadas.
+    Las palabras contenidas en la encontrada (p. ej. "sentencia" dentro de
+    "sentencia firme") se agregan desde una tabla precalculada. El resultado
+    es el mismo que evaluar `palabra in texto` para cada palabra.
+    """
+
+    def __init__(self, palabras: Iterable[str]):
+        self.palabras: FrozenSet[str] = frozenset(p for p in palabras if p)
+        if self.palabras:
+            patron = _trie_a_regex(_construir_trie(self.palabras))
+            self._regex = re.compile(patron)
+        else:
+            self._regex = None
+        self._contenidas = {
+            palabra: frozenset(otra for otra in self.palabras if otra in palabra)
+            for palabra in self.palabras
+        }
+
+    def buscar(self, texto: str) -> Set[str]:
+        """Conjunto de palabras clave presentes en `texto`"""
+        encontradas: Set[str] = set()
+        if not self._regex or not texto:
+            return encontradas
+        buscar = self._regex.search
+        coincidencia = buscar(texto)
+        while coincidencia:
+            palabra = coincidencia.group()
+            if palabra not in encontradas:
+                encontradas |= self._contenidas[palabra]
+            coincidencia = buscar(texto, coincidencia.start() + 1)
+        return encontradas
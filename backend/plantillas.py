@@ -0,0 +1,818 @@
+"""
+JUSTICIA.ar - Plantillas de Decisión
+Textos de fundamentación versionados en la tabla plantillas_decision. Las
+decisiones guardan la plantilla, su versión y los parámetros; el texto se arma
+al leerlas.
+
+Cada versión se compila una vez en segmentos que se unen con un solo join.
+Un campo {campo:subplantilla@N} arma una lista de dicts con otra plantilla.
+Los textos del código se reemplazan con archivos <plantilla_id>.txt en
+plantillas_decision/ (junto a la base) o con una versión nueva en la tabla.
+Los textos del código y de archivos se registran con init_db.py o --registrar.
+
+Registrar las plantillas y convertir decisiones guardadas con el texto completo:
+    python plantillas.py --registrar
+    python plantillas.py --dry-run
+    python plantillas.py --bloque 1000 --vacuum
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import string
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+from conexion import obtener_gestor
+from precedentes import obtener_indice_precedentes
+from versiones_datos import obtener_versiones
+
+logger = logging.getLogger(__name__)
+
+# Textos vigentes. Los parámetros llegan ya formateados (p. ej. montos con
+# separador de miles), así el texto armado no depende de quién lo renderiza.
+PLANTILLAS: Dict[str, str] = {
+    'nivel1_pagare': """
+RESUELVO:
+
+I. HACER LUGAR a la demanda de COBRO DE PESOS interpuesta.
+
+II. CONDENAR al demandado a pagar al actor la suma de ${monto} en concepto de capital, 
+más intereses desde la mora hasta el efectivo pago, calculados a la tasa que fije el Banco Central.
+
+III. COSTAS al demandado vencido.
+
+FUNDAMENTOS:
+
+1. HECHOS PROBADOS: Se encuentra acreditada la existencia de la obligación mediante pagaré 
+debidamente firmado por el demandado (Art. 1816 CCyC - título ejecutivo).
+
+2. MORA AUTOMÁTICA: Tratándose de obligación con plazo determinado, el deudor incurre en mora 
+automáticamente al vencimiento (Art. 886 CCyC).
+
+3. FALTA DE DEFENSA SUSTANCIAL: El demandado no ha opuesto defensas admisibles que enerven 
+la pretensión ejecutiva.
+
+4. DERECHO APLICABLE:
+   - Art. 729 CCyC: Concepto de obligación
+   - Art. 730 CCyC: Efectos del incumplimiento
+   - Art. 1816 CCyC: Pagaré como título ejecutivo
+
+5. INTERESES: Corresponden intereses moratorios desde el vencimiento hasta el efectivo pago 
+como accesorio de la obligación principal (Arts. 765-768 CCyC).
+
+6. COSTAS: El art. 130 CPCC establece que las costas se imponen al vencido, siendo el demandado 
+quien ha incumplido sin justificación.
+
+Por todo lo expuesto, RESUELVO como se indica en el decisorio.
+                """,
+    'nivel1_generico': """
+RESUELVO:
+
+I. HACER LUGAR a la demanda interpuesta.
+
+II. CONDENAR al demandado a pagar al actor la suma reclamada con más intereses y costas.
+
+FUNDAMENTOS BÁSICOS:
+
+Los hechos invocados se encuentran suficientemente acreditados mediante la prueba documental acompañada.
+El demandado no ha desvirtuado la pretensión del actor.
+Corresponde hacer lugar a lo peticionado conforme los artículos 1716 y 1740 del CCyC.
+        """,
+    'nivel2_precedentes': """
+SUGERENCIA DE RESOLUCIÓN (Requiere revisión humana)
+
+ANÁLISIS DEL CASO:
+
+El presente caso presenta similitudes con el precedente "{precedente_titulo}" 
+({precedente_tribunal}, {precedente_fecha}).
+
+HECHOS COMPARABLES:
+- Caso actual: {hechos_caso}...
+- Precedente: {hechos_precedente}...
+
+CRITERIO JURISPRUDENCIAL APLICABLE:
+{principios}
+
+MONTOS DE REFERENCIA (precedentes del mismo tipo con monto más cercano al reclamado):
+{montos_referencia}
+
+SUGERENCIA DE DECISIÓN:
+Hacer lugar parcialmente a la demanda por un monto de ${monto_sugerido}, 
+considerando la proporcionalidad con casos similares y las circunstancias particulares.
+
+ARTÍCULOS SUGERIDOS A APLICAR:
+- Art. 1716 CCyC (Deber de reparar)
+- Art. 1740 CCyC (Reparación plena)
+- Art. 1757 CCyC (si aplica responsabilidad objetiva)
+
+NOTA PARA EL JUEZ REVISOR:
+Este caso requiere su evaluación particular respecto de:
+1. La valoración de la prueba aportada
+2. La existencia de atenuantes o agravantes específicos
+3. La proporcionalidad del monto sugerido con el daño efectivamente acreditado
+
+Confianza de la sugerencia: 85%
+            """,
+    'nivel2_sin_precedentes': """
+SUGERENCIA DE RESOLUCIÓN (Sin precedentes directos)
+
+Este caso no cuenta con precedentes directamente aplicables en la base de datos.
+
+Se sugiere análisis cuidadoso de:
+1. Principios generales del derecho aplicable
+2. Doctrina mayoritaria sobre el tema
+3. Proporcionalidad de la pretensión
+
+RECOMENDACIÓN: Revisión humana detallada requerida.
+        """,
+    'nivel4': """
+CASO DE NIVEL 4 - DELIBERACIÓN CONSTITUCIONAL AMPLIADA
+
+Este caso presenta cuestiones de particular relevancia que trascienden el interés individual
+de las partes y ameritan un procedimiento deliberativo especial.
+
+DESCRIPCIÓN DEL CASO:
+{descripcion_hechos}
+
+CUESTIONES A DELIBERAR:
+
+1. CUESTIÓN CONSTITUCIONAL PLANTEADA:
+   [Requiere identificación específica por parte del tribunal]
+
+2. PRINCIPIOS EN TENSIÓN:
+   - Derecho/principio A vs. Derecho/principio B
+   - [A completar según el caso concreto]
+
+3. PRECEDENTES RELEVANTES:
+   [Requiere análisis de jurisprudencia constitucional aplicable]
+
+4. IMPACTO SISTÉMICO:
+   Esta decisión puede sentar precedente para casos futuros similares.
+
+PROCEDIMIENTO SUGERIDO:
+
+1. Convocatoria a audiencia pública con participación de:
+   - Partes del juicio
+   - Amicus curiae (si corresponde)
+   - Organizaciones de la sociedad civil interesadas
+
+2. Requerimiento de informes a:
+   - Ministerio Público
+   - Defensoría del Pueblo
+   - Otros organismos pertinentes
+
+3. Plazo ampliado para alegatos y fundamentación
+
+4. Deliberación en tribunal colegiado (si corresponde según organización judicial)
+
+NOTA IMPORTANTE:
+Este nivel de caso no admite resolución automatizada ni asistida por IA.
+Requiere el ejercicio pleno de la función jurisdiccional humana con todas las garantías.
+
+La IA solo proporciona estructura y herramientas de análisis, no sugerencias de decisión.
+        """,
+    'nivel3': """
+ANÁLISIS MULTIPERSPECTIVA PARA DELIBERACIÓN
+
+Este caso requiere deliberación humana. La IA presenta tres perspectivas argumentales:
+
+{perspectivas:nivel3_perspectiva}
+RECOMENDACIÓN PARA EL JUEZ:
+
+Este caso presenta complejidades que requieren su valoración jurídica experta.
+Se sugiere:
+1. Analizar detenidamente la prueba producida
+2. Considerar las tres perspectivas presentadas
+3. Ponderar los principios en conflicto según su criterio
+4. Fundamentar claramente la decisión adoptada
+
+La IA está disponible para análisis adicionales que requiera.
+        """,
+    # Elemento de la lista `perspectivas` de nivel3
+    'nivel3_perspectiva': """
+============================================================
+PERSPECTIVA {numero}: {enfoque}
+============================================================
+Resultado propuesto: {resultado_propuesto}
+Monto propuesto: ${monto_propuesto}
+
+ARGUMENTOS:
+{argumentos:nivel3_argumento}
+""",
+    # Elemento de la lista `argumentos` de nivel3_perspectiva
+    'nivel3_argumento': '{numero}. {texto}\n',
+}
+
+# Textos anteriores de cada plantilla, en orden. En una base nueva se registran
+# como versiones previas a la vigente.
+PLANTILLAS_ANTERIORES: Dict[str, List[str]] = {
+    # Antes de los montos de referencia por precedentes cercanos
+    'nivel2_precedentes': ["""
+SUGERENCIA DE RESOLUCIÓN (Requiere revisión humana)
+
+ANÁLISIS DEL CASO:
+
+El presente caso presenta similitudes con el precedente "{precedente_titulo}" 
+({precedente_tribunal}, {precedente_fecha}).
+
+HECHOS COMPARABLES:
+- Caso actual: {hechos_caso}...
+- Precedente: {hechos_precedente}...
+
+CRITERIO JURISPRUDENCIAL APLICABLE:
+{principios}
+
+SUGERENCIA DE DECISIÓN:
+Hacer lugar parcialmente a la demanda por un monto de ${monto_sugerido}, 
+considerando la proporcionalidad con casos similares y las circunstancias particulares.
+
+ARTÍCULOS SUGERIDOS A APLICAR:
+- Art. 1716 CCyC (Deber de reparar)
+- Art. 1740 CCyC (Reparación plena)
+- Art. 1757 CCyC (si aplica responsabilidad objetiva)
+
+NOTA PARA EL JUEZ REVISOR:
+Este caso requiere su evaluación particular respecto de:
+1. La valoración de la prueba aportada
+2. La existencia de atenuantes o agravantes específicos
+3. La proporcionalidad del monto sugerido con el daño efectivamente acreditado
+
+Confianza de la sugerencia: 85%
+            """],
+}
+
+
+# Textos que reemplazan a los del código sin modificarlo: un archivo
+# <plantilla_id>.txt (UTF-8) por plantilla en este directorio, junto a la base
+DIRECTORIO_PLANTILLAS = 'plantillas_decision'
+
+
+def campos_precedente(precedente: Dict) -> Dict[str, str]:
+    """Parámetros de nivel2_precedentes que salen del precedente citado"""
+    return {
+        'precedente_titulo': precedente['titulo'],
+        'precedente_tribunal': precedente['tribunal'],
+        'precedente_fecha': precedente['fecha_sentencia'],
+        'hechos_precedente': precedente['hechos_resumidos'][:200],
+        'principios': precedente['principios_aplicados'],
+    }
+
+
+# Parámetros de nivel2_precedentes que se leen del precedente al armar el texto
+CAMPOS_PRECEDENTE_PLANTILLA = ('precedente_titulo', 'precedente_tribunal', 'precedente_fecha',
+                               'hechos_precedente', 'principios')
+
+
+def codificar_parametros(parametros: Dict) -> str:
+    """JSON compacto de los parámetros de una decisión"""
+    return json.dumps(parametros, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def columnas_decision(decision: Dict) -> Tuple[str, Optional[str], Optional[int], Optional[str]]:
+    """(fundamentacion, plantilla_id, plantilla_version, parametros) a guardar en decisiones"""
+    plantilla = decision.get('plantilla')
+    if not plantilla:
+        return decision['fundamentacion'], None, None, None
+    return '', plantilla['id'], plantilla['version'], codificar_parametros(plantilla['parametros'])
+
+
+def separar_referencia(especificacion: str) -> Tuple[str, Optional[int]]:
+    """'nivel3_argumento@2' -> ('nivel3_argumento', 2); sin '@', versión None"""
+    plantilla_id, _, version = especificacion.partition('@')
+    if not plantilla_id.isidentifier() or (version and not version.isdigit()):
+        raise ValueError(f"Referencia a subplantilla inválida: {especificacion!r}")
+    return plantilla_id, int(version) if version else None
+
+
+def fijar_versiones(texto: str, vigentes: Dict[str, int]) -> str:
+    """
+    Completa con la versión vigente las referencias a subplantillas sin versión
+    ({campo:subplantilla} -> {campo:subplantilla@N}), para que el texto guardado
+    arme siempre lo mismo. Lanza ValueError si el texto es inválido.
+    """
+    partes = []
+    for literal, campo, especificacion, conversion in string.Formatter().parse(texto):
+        partes.append(literal.replace('{', '{{').replace('}', '}}'))
+        if campo is None:
+            continue
+        if conversion:
+            raise ValueError(f"Conversión no soportada en el campo {campo!r}")
+        if especificacion:
+            subplantilla, version = separar_referencia(especificacion)
+            if version is None:
+                if subplantilla not in vigentes:
+                    raise ValueError(f"Subplantilla desconocida: {subplantilla}")
+                especificacion = f"{subplantilla}@{vigentes[subplantilla]}"
+            campo += ':' + especificacion
+        partes.append('{' + campo + '}')
+    return ''.join(partes)
+
+
+def subplantillas(texto: str) -> List[str]:
+    """Ids de las subplantillas que referencia el texto"""
+    return [
+        separar_referencia(especificacion)[0]
+        for _, campo, especificacion, _ in string.Formatter().parse(texto)
+        if campo is not None and especificacion
+    ]
+
+
+class PlantillaCompilada:
+    """
+    Texto de plantilla dividido una sola vez en segmentos (literal, campo,
+    subplantilla). Un campo con subplantilla recibe una lista de dicts y se
+    arma con ella una vez por elemento; todo el texto, listas incluidas, se
+    une con un solo join.
+    """
+
+    __slots__ = ('plantilla_id', 'version', 'segmentos')
+
+    def __init__(self, plantilla_id: str, version: int, texto: str,
+                 resolver: Callable[[str, int], 'PlantillaCompilada']):
+        self.plantilla_id = plantilla_id
+        self.version = version
+        segmentos = []
+        for literal, campo, especificacion, conversion in string.Formatter().parse(texto):
+            if campo is not None and (conversion or not campo.isidentifier()):
+                raise ValueError(f"Plantilla '{plantilla_id}' v{version}: campo inválido {campo!r}")
+            subplantilla = None
+            if especificacion:
+                sub_id, sub_version = separar_referencia(especificacion)
+                if sub_version is None:
+                    raise ValueError(f"Plantilla '{plantilla_id}' v{version}: {especificacion!r} sin versión")
+                subplantilla = resolver(sub_id, sub_version)
+            segmentos.append((literal, campo, subplantilla))
+        self.segmentos: Tuple = tuple(segmentos)
+
+    def _agregar(self, parametros: Dict, salida: List[str]):
+        for literal, campo, subplantilla in self.segmentos:
+            salida.append(literal)
+            if campo is None:
+                continue
+            if subplantilla is None:
+                salida.append(parametros[campo])
+            else:
+                for elemento in parametros[campo]:
+                    subplantilla._agregar(elemento, salida)
+
+    def renderizar(self, parametros: Dict) -> str:
+        """Arma el texto. Los valores deben ser textos (o listas de dicts para subplantillas)"""
+        salida: List[str] = []
+        self._agregar(parametros, salida)
+        return ''.join(salida)
+
+
+def patron_plantilla(texto: str) -> Optional[Pattern]:
+    """
+    Expresión que reconoce un texto armado con la plantilla y captura sus
+    parámetros (un parámetro repetido debe tener el mismo valor). None si la
+    plantilla usa subplantillas (listas).
+    """
+    partes = []
+    vistos = set()
+    for literal, campo, especificacion, _ in string.Formatter().parse(texto):
+        partes.append(re.escape(literal))
+        if campo is None:
+            continue
+        if especificacion:
+            return None
+        partes.append(f'(?P={campo})' if campo in vistos else f'(?P<{campo}>.*?)')
+        vistos.add(campo)
+    return re.compile(''.join(partes), re.DOTALL)
+
+
+class RepositorioPlantillas:
+    """
+    Plantillas compiladas de todas las versiones de plantillas_decision y
+    caché LRU de textos armados de decisiones guardadas.
+
+    Las decisiones de nivel 2 guardan `precedente_id` y `precedente_revision`
+    en lugar de los datos del precedente citado. Al armar el texto se leen de
+    esa revisión (del índice de precedentes si sigue vigente, si no de
+    precedentes_revisiones), así que el texto de una decisión no cambia
+    aunque se edite o borre el precedente.
+
+    sincronizar() registra los textos del código (o de los archivos de
+    `directorio`, que los reemplazan) que difieran de la versión vigente; lo
+    llaman init_db.py y `python plantillas.py --registrar`, nunca una
+    petición. Una versión cargada directamente en la base (origen 'base') se
+    respeta hasta que se cargue otra. Las versiones son inmutables: cada una se
+    compila una sola vez y solo se vuelve a leer la tabla cuando cambia.
+    """
+
+    def __init__(self, db_path='justicia.db', cache_max=256, directorio: Optional[str] = None):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        self.versiones = obtener_versiones(db_path)
+        self.cache_max = cache_max
+        if directorio is None:
+            directorio = os.path.join(os.path.dirname(os.path.abspath(db_path)), DIRECTORIO_PLANTILLAS)
+        self.directorio = directorio
+        self._compiladas: Dict[Tuple[str, int], PlantillaCompilada] = {}
+        self._estado: Tuple[int, Dict[str, PlantillaCompilada]] = (-1, {})
+        self._renderizados: 'OrderedDict[Tuple[str, int, str], str]' = OrderedDict()
+        self._revisiones: Dict[Tuple[int, int], Dict] = {}
+        self._lock_carga = threading.Lock()
+        self._lock = threading.Lock()
+        self._stats = {'aciertos': 0, 'fallos': 0}
+
+    # ===== REGISTRO =====
+
+    def fuentes(self) -> Dict[str, Tuple[str, str]]:
+        """plantilla_id -> (texto, origen): las del código y las de archivos"""
+        fuentes = {plantilla_id: (texto, 'codigo') for plantilla_id, texto in PLANTILLAS.items()}
+        if os.path.isdir(self.directorio):
+            for archivo in sorted(os.listdir(self.directorio)):
+                plantilla_id, extension = os.path.splitext(archivo)
+                if extension == '.txt' and plantilla_id.isidentifier():
+                    with open(os.path.join(self.directorio, archivo), encoding='utf-8', newline='') as f:
+                        fuentes[plantilla_id] = (f.read(), 'archivo')
+        return fuentes
+
+    def sincronizar(self) -> int:
+        """Registra los textos del código y de archivos que difieren de la versión vigente. Devuelve las versiones agregadas"""
+        fuentes = self.fuentes()
+        agregadas = 0
+        with self.db.transaccion(inmediata=True) as conn:
+            vigentes = {
+                row['plantilla_id']: row
+                for row in conn.execute("""
+                    SELECT p.plantilla_id, p.version, p.texto, p.origen FROM plantillas_decision p
+                    WHERE p.version = (SELECT MAX(version) FROM plantillas_decision WHERE plantilla_id = p.plantilla_id)
+                """)
+            }
+            versiones = {plantilla_id: row['version'] for plantilla_id, row in vigentes.items()}
+
+            for plantilla_id in self._orden_registro(fuentes):
+                texto, origen = fuentes[plantilla_id]
+                try:
+                    texto = fijar_versiones(texto, versiones)
+                except ValueError:
+                    if origen == 'codigo':
+                        raise
+                    logger.exception("Plantilla '%s' del archivo inválida; se usa la del código", plantilla_id)
+                    texto, origen = fijar_versiones(PLANTILLAS[plantilla_id], versiones), 'codigo'
+
+                actual = vigentes.get(plantilla_id)
+                if actual and actual['texto'] != texto and actual['origen'] == 'base':
+                    logger.info("Plantilla '%s': se mantiene la versión %s cargada en la base",
+                                plantilla_id, actual['version'])
+                if actual and (actual['texto'] == texto or actual['origen'] == 'base'):
+                    continue
+
+                # En una base nueva se registran también los textos anteriores,
+                # para que la conversión reconozca decisiones generadas con ellos
+                nuevas = [(texto, origen)]
+                if not actual:
+                    nuevas[:0] = [(fijar_versiones(t, versiones), 'codigo')
+                                  for t in PLANTILLAS_ANTERIORES.get(plantilla_id, [])]
+                version = actual['version'] if actual else 0
+                for texto_nuevo, origen_nuevo in nuevas:
+                    version += 1
+                    conn.execute("""
+                        INSERT INTO plantillas_decision (plantilla_id, version, texto, origen) VALUES (?, ?, ?, ?)
+                    """, (plantilla_id, version, texto_nuevo, origen_nuevo))
+                    agregadas += 1
+                versiones[plantilla_id] = version
+                logger.info("Plantilla '%s' registrada (versión %s, %s)", plantilla_id, version, origen)
+        return agregadas
+
+    def _orden_registro(self, fuentes: Dict[str, Tuple[str, str]]) -> List[str]:
+        """Ids con cada subplantilla antes de las plantillas que la usan"""
+        orden: List[str] = []
+
+        def visitar(plantilla_id: str, pila: Tuple[str, ...]):
+            if plantilla_id in orden or plantilla_id not in fuentes:
+                return
+            if plantilla_id in pila:
+                raise ValueError(f"Referencia circular entre plantillas: {' -> '.join(pila + (plantilla_id,))}")
+            try:
+                referencias = subplantillas(fuentes[plantilla_id][0])
+            except ValueError:
+                referencias = []  # sincronizar() informa el error
+            for subplantilla in referencias:
+                visitar(subplantilla, pila + (plantilla_id,))
+            orden.append(plantilla_id)
+
+        for plantilla_id in fuentes:
+            visitar(plantilla_id, ())
+        return orden
+
+    # ===== COMPILACIÓN =====
+
+    def vigentes(self) -> Dict[str, PlantillaCompilada]:
+        """
+        Plantilla compilada vigente de cada id. Solo lee: cuando cambia la
+        tabla (y en la primera llamada) compila las versiones nuevas.
+        """
+        version_datos = self.versiones.version('plantillas_decision')
+        estado = self._estado
+        if estado[0] == version_datos:
+            return estado[1]
+
+        with self._lock_carga:
+            if self._estado[0] != version_datos:
+                self._estado = (version_datos, self._compilar())
+            return self._estado[1]
+
+    def _compilar(self) -> Dict[str, PlantillaCompilada]:
+        """Compila las versiones aún no compiladas. La vigente es la última versión válida"""
+        with self.db.conexion() as conn:
+            textos = {
+                (row['plantilla_id'], row['version']): row['texto']
+                for row in conn.execute("""
+                    SELECT plantilla_id, version, texto FROM plantillas_decision ORDER BY plantilla_id, version
+                """)
+            }
+
+        vigentes: Dict[str, PlantillaCompilada] = {}
+        for plantilla_id, version in textos:
+            try:
+                vigentes[plantilla_id] = self._compilada(plantilla_id, version, textos, ())
+            except (ValueError, KeyError):
+                logger.exception("Plantilla '%s' versión %s inválida; se mantiene la anterior", plantilla_id, version)
+        return vigentes
+
+    def _compilada(self, plantilla_id: str, version: int, textos: Dict, pila: Tuple) -> PlantillaCompilada:
+        clave = (plantilla_id, version)
+        compilada = self._compiladas.get(clave)
+        if compilada is None:
+            if clave in pila:
+                raise ValueError(f"Referencia circular en la plantilla '{plantilla_id}' v{version}")
+            if clave not in textos:
+                raise ValueError(f"Plantilla desconocida: {plantilla_id} v{version}")
+            compilada = PlantillaCompilada(
+                plantilla_id, version, textos[clave],
+                lambda sub_id, sub_version: self._compilada(sub_id, sub_version, textos, pila + (clave,))
+            )
+            self._compiladas[clave] = compilada
+        return compilada
+
+    def compilada(self, plantilla_id: str, version: int) -> PlantillaCompilada:
+        """Una versión compilada. Lanza ValueError si no existe o es inválida"""
+        self.vigentes()
+        compilada = self._compiladas.get((plantilla_id, version))
+        if compilada is None:
+            raise ValueError(f"Plantilla desconocida: {plantilla_id} v{version}")
+        return compilada
+
+    # ===== RENDERIZADO =====
+
+    def expandir(self, parametros: Dict) -> Dict:
+        """Parámetros guardados más los que se leen al armar (datos del precedente citado)"""
+        if 'precedente_id' not in parametros:
+            return parametros
+        precedente = self.precedente(parametros['precedente_id'], parametros.get('precedente_revision', 1))
+        return dict(campos_precedente(precedente), **parametros)
+
+    def precedente(self, precedente_id: int, revision: int) -> Dict:
+        """Datos de una revisión de un precedente. Lanza ValueError si no existe"""
+        encontrados = obtener_indice_precedentes(self.db_path).obtener([precedente_id])
+        if encontrados and encontrados[0]['revision'] == revision:
+            return encontrados[0]
+
+        # Revisiones archivadas: inmutables, se guardan sin invalidar
+        clave = (precedente_id, revision)
+        archivada = self._revisiones.get(clave)
+        if archivada is None:
+            with self.db.conexion() as conn:
+                fila = conn.execute("""
+                    SELECT titulo, tribunal, fecha_sentencia, hechos_resumidos, principios_aplicados
+                    FROM precedentes_revisiones WHERE precedente_id = ? AND revision = ?
+                """, clave).fetchone()
+            if fila is None:
+                raise ValueError(f"Precedente desconocido: {precedente_id} revisión {revision}")
+            archivada = self._revisiones[clave] = dict(zip(fila.keys(), fila))
+        return archivada
+
+    def armar(self, plantilla_id: str, version: int, parametros: Dict) -> str:
+        """Texto de una versión de plantilla con los parámetros guardados (sin caché)"""
+        return self.compilada(plantilla_id, version).renderizar(self.expandir(parametros))
+
+    def aplicar(self, plantilla_id: str, parametros: Dict) -> Tuple[str, Dict]:
+        """
+        Arma el texto con la versión vigente de la plantilla. Devuelve (texto,
+        referencia), donde referencia es lo que se guarda de la decisión:
+        {'id', 'version', 'parametros'}
+        """
+        plantilla = self.vigentes().get(plantilla_id)
+        if plantilla is None:
+            raise ValueError(f"Plantilla desconocida: {plantilla_id} (registrarla con python init_db.py)")
+        return plantilla.renderizar(self.expandir(parametros)), {
+            'id': plantilla_id, 'version': plantilla.version, 'parametros': parametros
+        }
+
+    def renderizar(self, plantilla_id: str, version: int, parametros: str) -> str:
+        """Texto de una decisión guardada (parametros en JSON), desde la caché si está"""
+        clave = (plantilla_id, version, parametros)
+        with self._lock:
+            texto = self._renderizados.get(clave)
+            if texto is not None:
+                self._renderizados.move_to_end(clave)
+                self._stats['aciertos'] += 1
+                return texto
+            self._stats['fallos'] += 1
+
+        texto = self.armar(plantilla_id, version, json.loads(parametros or '{}'))
+
+        with self._lock:
+            self._renderizados[clave] = texto
+            while len(self._renderizados) > self.cache_max:
+                self._renderizados.popitem(last=False)
+        return texto
+
+    def completar_decision(self, decision: Dict) -> Dict:
+        """Completa fundamentacion en una fila de decisiones guardada con plantilla"""
+        if decision.get('plantilla_id'):
+            decision['fundamentacion'] = self.renderizar(
+                decision['plantilla_id'], decision['plantilla_version'], decision['parametros']
+            )
+        return decision
+
+    def estadisticas(self) -> Dict:
+        """Caché de textos armados (por proceso) y versión vigente de cada plantilla"""
+        with self._lock:
+            stats = dict(self._stats, entradas=len(self._renderizados))
+        return dict(stats, compiladas=len(self._compiladas),
+                    vigentes={plantilla_id: p.version for plantilla_id, p in self._estado[1].items()})
+
+
+_instancias: Dict[str, RepositorioPlantillas] = {}
+_instancias_lock = threading.Lock()
+
+
+def obtener_plantillas(db_path='justicia.db') -> RepositorioPlantillas:
+    """Devuelve el repositorio de plantillas compartido para una base de datos"""
+    with _instancias_lock:
+        if db_path not in _instancias:
+            _instancias[db_path] = RepositorioPlantillas(db_path)
+        return _instancias[db_path]
+
+
+# ===== CONVERSIÓN DE DECISIONES EXISTENTES =====
+
+class ConversorDecisiones:
+    """
+    Recorre por id las decisiones guardadas con el texto completo y, si el
+    texto coincide con alguna versión de plantilla, lo reemplaza por la
+    referencia y los parámetros. Solo convierte si al volver a armar el texto
+    se obtiene exactamente el original; un bloque por transacción. Los datos
+    de un precedente que sigue igual en la base se guardan como
+    `precedente_id` y `precedente_revision`.
+
+    Las plantillas con listas (nivel 3) no se pueden reconocer desde el texto
+    armado: esas decisiones conservan el texto completo y se cuentan aparte
+    (`con_listas`).
+    """
+
+    def __init__(self, db_path='justicia.db', tamano_bloque=500, dry_run=False):
+        self.db = obtener_gestor(db_path)
+        self.plantillas = obtener_plantillas(db_path)
+        self.tamano_bloque = tamano_bloque
+        self.dry_run = dry_run
+        self.revisadas = 0
+        self.convertidas = 0
+        self.con_listas = 0
+        self.bytes_liberados = 0
+        self.ultimo_id = 0
+        self._encabezados_listas: Tuple[str, ...] = ()
+        self._precedentes: Dict[Tuple[str, str, str], Tuple[int, int]] = {}
+
+    def _patrones(self) -> List[Tuple[str, int, Pattern]]:
+        """Versiones registradas sin listas, las más nuevas primero"""
+        if not self.dry_run:
+            self.plantillas.sincronizar()  # registra las del código y de archivos
+        self.plantillas.vigentes()
+        with self.db.conexion() as conn:
+            filas = conn.execute("""
+                SELECT plantilla_id, version, texto FROM plantillas_decision
+                ORDER BY plantilla_id, version DESC
+            """).fetchall()
+        patrones = []
+        encabezados = set()
+        for fila in filas:
+            patron = patron_plantilla(fila['texto'])
+            if patron is not None:
+                patrones.append((fila['plantilla_id'], fila['version'], patron))
+            else:
+                # Texto fijo anterior al primer campo, para contar las no convertibles
+                encabezado = next(string.Formatter().parse(fila['texto']))[0]
+                if encabezado.strip():
+                    encabezados.add(encabezado)
+        self._encabezados_listas = tuple(encabezados)
+        return patrones
+
+    def _compactar(self, parametros: Dict[str, str]) -> Dict:
+        """Reemplaza los datos de un precedente existente por su id y revisión"""
+        if 'precedente_titulo' not in parametros:
+            return parametros
+        if not self._precedentes:
+            with self.db.conexion() as conn:
+                self._precedentes = {
+                    (row['titulo'], row['tribunal'], row['fecha_sentencia']): (row['id'], row['revision'])
+                    for row in conn.execute(
+                        "SELECT id, revision, titulo, tribunal, fecha_sentencia FROM casos_precedentes"
+                    )
+                }
+        citado = self._precedentes.get(
+            (parametros['precedente_titulo'], parametros['precedente_tribunal'], parametros['precedente_fecha'])
+        )
+        if citado is None:
+            return parametros
+        compactados = {k: v for k, v in parametros.items() if k not in CAMPOS_PRECEDENTE_PLANTILLA}
+        compactados['precedente_id'], compactados['precedente_revision'] = citado
+        return compactados
+
+    def convertir(self, fundamentacion: str, patrones) -> Optional[Tuple[str, int, str]]:
+        """(plantilla_id, version, parametros) del texto, o None si ninguna plantilla lo reproduce"""
+        for plantilla_id, version, patron in patrones:
+            coincidencia = patron.fullmatch(fundamentacion)
+            if not coincidencia:
+                continue
+            # Con precedente_id si el precedente citado sigue igual en la base
+            for parametros in (self._compactar(coincidencia.groupdict()), coincidencia.groupdict()):
+                if self.plantillas.armar(plantilla_id, version, parametros) == fundamentacion:
+                    return plantilla_id, version, codificar_parametros(parametros)
+        return None
+
+    def ejecutar(self, desde_id: int = 0):
+        patrones = self._patrones()
+        self.ultimo_id = desde_id
+        while True:
+            with self.db.conexion() as conn:
+                filas = conn.execute("""
+                    SELECT id, fundamentacion FROM decisiones
+                    WHERE plantilla_id IS NULL AND id > ?
+                    ORDER BY id LIMIT ?
+                """, (self.ultimo_id, self.tamano_bloque)).fetchall()
+            if not filas:
+                break
+
+            cambios = []
+            for fila in filas:
+                convertida = self.convertir(fila['fundamentacion'], patrones)
+                if convertida:
+                    cambios.append(convertida + (fila['id'],))
+                    self.bytes_liberados += (len(fila['fundamentacion'].encode('utf-8'))
+                                             - len(convertida[2].encode('utf-8')))
+                elif fila['fundamentacion'].startswith(self._encabezados_listas):
+                    self.con_listas += 1
+
+            if cambios and not self.dry_run:
+                with self.db.transaccion(inmediata=True) as conn:
+                    conn.executemany("""
+                        UPDATE decisiones
+                        SET fundamentacion = '', plantilla_id = ?, plantilla_version = ?, parametros = ?
+                        WHERE id = ? AND plantilla_id IS NULL
+                    """, cambios)
+
+            self.revisadas += len(filas)
+            self.convertidas += len(cambios)
+            self.ultimo_id = filas[-1]['id']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='justicia.db', help='ruta de la base de datos')
+    parser.add_argument('--bloque', type=int, default=500, help='decisiones por bloque/transacción')
+    parser.add_argument('--desde-id', type=int, default=0, help='reanudar después de este id')
+    parser.add_argument('--dry-run', action='store_true', help='no escribir: solo contar lo convertible')
+    parser.add_argument('--vacuum', action='store_true', help='al terminar, VACUUM para devolver el espacio al disco')
+    parser.add_argument('--registrar', action='store_true',
+                        help='solo registrar los textos del código y de archivos que cambiaron')
+    args = parser.parse_args()
+
+    if args.registrar:
+        agregadas = obtener_plantillas(args.db).sincronizar()
+        print(f"Versiones de plantilla registradas: {agregadas}")
+        return
+
+    conversor = ConversorDecisiones(args.db, args.bloque, args.dry_run)
+    inicio = time.perf_counter()
+    conversor.ejecutar(args.desde_id)
+    duracion = time.perf_counter() - inicio
+
+    print(f"Decisiones revisadas:  {conversor.revisadas:,}")
+    print(f"Convertidas:           {conversor.convertidas:,}" + (" (dry run, sin escribir)" if args.dry_run else ""))
+    print(f"Sin plantilla:         {conversor.revisadas - conversor.convertidas:,}")
+    if conversor.con_listas:
+        print(f"  con listas (nivel 3): {conversor.con_listas:,} - no se convierten: las perspectivas y "
+              f"argumentos no se pueden recuperar del texto, que se conserva completo")
+    print(f"Bytes liberados:       {conversor.bytes_liberados:,}")
+    print(f"Último id:             {conversor.ultimo_id}")
+    print(f"Duración:              {duracion:.2f} s")
+
+    if args.vacuum and conversor.convertidas and not args.dry_run:
+        with conversor.db.conexion() as conn:
+            conn.execute("VACUUM")
+        print("VACUUM completado")
+    elif conversor.convertidas and not args.dry_run:
+        print("El espacio liberado se reutiliza en la base; para reducir el archivo, ejecute con --vacuum")
+
+
+if __name__ == '__main__':
+    main()
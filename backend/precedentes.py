@@ -0,0 +1,464 @@
+"""
+JUSTICIA.ar - Búsqueda de Precedentes
+Estrategias intercambiables para que el motor de decisión encuentre los
+precedentes más parecidos a un caso.
+"""
+import argparse
+import bisect
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import vectorizador
+from analisis import CasoAnalizado, es_termino_significativo, terminos_significativos
+from conexion import obtener_gestor
+from versiones_datos import obtener_versiones
+
+logger = logging.getLogger(__name__)
+
+# Términos candidatos de la descripción (los más largos primero) y cuántos de
+# ellos, los menos frecuentes en el corpus, entran en la consulta
+MAX_TERMINOS = 16
+MAX_TERMINOS_CONSULTA = 8
+
+# Fracción de precedentes por encima de la cual un término no distingue nada
+# (aporta poco al BM25 y obliga a puntuar casi todo el corpus). Con corpus
+# chicos puntuar todo es barato: hasta MIN_DOCUMENTOS_DESCARTE documentos
+# ningún término se descarta por frecuente
+MAX_FRECUENCIA_DOCUMENTAL = 0.05
+MIN_DOCUMENTOS_DESCARTE = 1000
+
+# Frecuencias documentales recordadas por worker (se vacían al cambiar el corpus)
+MAX_FRECUENCIAS_CACHEADAS = 50000
+
+# Columnas que el motor de decisión lee de cada precedente
+CAMPOS_PRECEDENTE = (
+    'id', 'titulo', 'tribunal', 'fecha_sentencia', 'hechos_resumidos',
+    'decision', 'monto_aproximado', 'monto_reclamado', 'monto_otorgado', 'principios_aplicados', 'revision'
+)
+
+
+class BusquedaPrecedentes(ABC):
+    """Interfaz de las estrategias de búsqueda de precedentes"""
+
+    nombre = ''
+
+    @abstractmethod
+    def buscar(self, analizado: CasoAnalizado, limite: int = 3) -> List[Dict]:
+        """Los `limite` precedentes más parecidos al caso, del más al menos parecido"""
+
+    def estadisticas(self) -> Dict:
+        """Contadores de la estrategia en este proceso"""
+        return {'estrategia': self.nombre}
+
+
+class DatosPrecedentes(NamedTuple):
+    """Vistas en memoria de casos_precedentes para una versión de datos"""
+    por_tipo: Dict[str, List[Dict]]                              # más reciente primero
+    por_id: Dict[int, Dict]
+    por_monto: Dict[str, Tuple[List[float], List[Dict]]]         # montos reclamados ordenados y sus precedentes
+
+
+class IndicePrecedentes(BusquedaPrecedentes):
+    """
+    Precedentes agrupados por tipo_caso, del más reciente al más antiguo, y
+    los que tienen monto reclamado y otorgado, por tipo_caso ordenados por
+    monto_reclamado.
+
+    El índice se reconstruye completo cuando cambia la versión de
+    casos_precedentes (en cualquier worker); en el caso común una búsqueda es
+    una consulta a un diccionario o una búsqueda binaria. Los dicts devueltos
+    son compartidos entre hilos y no deben modificarse.
+    """
+
+    nombre = 'recientes'
+
+    def __init__(self, db_path='justicia.db'):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        self.versiones = obtener_versiones(db_path)
+        self._lock = threading.Lock()
+        self._estado: Tuple[Optional[int], DatosPrecedentes] = (None, DatosPrecedentes({}, {}, {}))
+
+    def buscar(self, analizado: CasoAnalizado, limite: int = 3) -> List[Dict]:
+        """Los precedentes más recientes del mismo tipo de caso"""
+        return self.recientes(analizado.caso['tipo_caso'], limite)
+
+    def recientes(self, tipo_caso: str, limite: int = 3) -> List[Dict]:
+        """Los `limite` precedentes más recientes de un tipo de caso"""
+        return self._vigente().por_tipo.get(tipo_caso, [])[:limite]
+
+    def obtener(self, ids: Iterable[int]) -> List[Dict]:
+        """Precedentes por id, en el orden dado (se omiten los que ya no existen)"""
+        por_id = self._vigente().por_id
+        return [por_id[i] for i in ids if i in por_id]
+
+    def cercanos_por_monto(self, tipo_caso: str, monto: float, limite: int = 5) -> List[Dict]:
+        """
+        Los `limite` precedentes del tipo con monto otorgado y monto_reclamado
+        más cercano a `monto`, del más al menos cercano. Búsqueda
+        binaria más `limite` pasos.
+        """
+        montos, precedentes = self._vigente().por_monto.get(tipo_caso, ([], []))
+        derecha = bisect.bisect_left(montos, monto)
+        izquierda = derecha - 1
+        cercanos = []
+        while len(cercanos) < limite and (izquierda >= 0 or derecha < len(montos)):
+            if derecha >= len(montos) or (izquierda >= 0 and monto - montos[izquierda] <= montos[derecha] - monto):
+                cercanos.append(precedentes[izquierda])
+                izquierda -= 1
+            else:
+                cercanos.append(precedentes[derecha])
+                derecha += 1
+        return cercanos
+
+    def estadisticas(self) -> Dict:
+        """Versión cargada y tamaño del índice en este proceso"""
+        version, datos = self._estado
+        return {
+            'estrategia': self.nombre,
+            'version': version,
+            'precedentes': len(datos.por_id),
+            'tipos': len(datos.por_tipo),
+        }
+
+    def _vigente(self) -> DatosPrecedentes:
+        version = self.versiones.version('casos_precedentes')
+        estado = self._estado
+        if estado[0] == version:
+            return estado[1]
+
+        with self._lock:
+            if self._estado[0] != version:
+                self._estado = (version, self._cargar())
+                logger.info("Índice de precedentes recargado (versión %s)", version)
+            return self._estado[1]
+
+    def _cargar(self) -> DatosPrecedentes:
+        # Mismo orden que la consulta que reemplaza: fecha descendente y, a
+        # igual fecha, el último insertado primero
+        with self.db.conexion() as conn:
+            filas = conn.execute(f"""
+                SELECT tipo_caso, {', '.join(CAMPOS_PRECEDENTE)}
+                FROM casos_precedentes
+                ORDER BY tipo_caso, fecha_sentencia DESC, id DESC
+            """).fetchall()
+
+        por_tipo: Dict[str, List[Dict]] = {}
+        por_id: Dict[int, Dict] = {}
+        con_monto: Dict[str, List[Tuple[float, int, Dict]]] = {}
+        for fila in filas:
+            precedente = por_id[fila['id']] = {campo: fila[campo] for campo in CAMPOS_PRECEDENTE}
+            por_tipo.setdefault(fila['tipo_caso'], []).append(precedente)
+            if fila['monto_reclamado'] is not None and fila['monto_reclamado'] > 0 \
+                    and fila['monto_otorgado'] is not None:
+                con_monto.setdefault(fila['tipo_caso'], []).append(
+                    (fila['monto_reclamado'], fila['id'], precedente)
+                )
+
+        por_monto = {}
+        for tipo, lista in con_monto.items():
+            lista.sort(key=lambda t: t[:2])
+            por_monto[tipo] = ([t[0] for t in lista], [t[2] for t in lista])
+        return DatosPrecedentes(por_tipo, por_id, por_monto)
+
+
+_indices: Dict[str, IndicePrecedentes] = {}
+_indices_lock = threading.Lock()
+
+
+def obtener_indice_precedentes(db_path='justicia.db') -> IndicePrecedentes:
+    """Devuelve el índice en memoria compartido para una base de datos"""
+    with _indices_lock:
+        if db_path not in _indices:
+            _indices[db_path] = IndicePrecedentes(db_path)
+        return _indices[db_path]
+
+
+def terminos_clave(analizado: CasoAnalizado, campo: str = 'descripcion_hechos',
+                   maximo: int = MAX_TERMINOS) -> List[str]:
+    """Palabras significativas del campo, de la más larga a la más corta"""
+    candidatos = [t for t in analizado.tokens(campo) if es_termino_significativo(t)]
+    return sorted(candidatos, key=lambda t: (-len(t), t))[:maximo]
+
+
+class BusquedaTextoCompleto(BusquedaPrecedentes):
+    """
+    Precedentes del mismo tipo ordenados por BM25 (FTS5, tabla precedentes_fts)
+    entre los términos clave de la descripción del caso y los hechos,
+    principios y decisión del precedente.
+
+    Antes de consultar se descartan los términos presentes en más de
+    MAX_FRECUENCIA_DOCUMENTAL de los precedentes (tabla precedentes_fts_vocab):
+    así el ranking solo recorre las listas de los términos distintivos y se
+    mantiene en milisegundos con decenas de miles de precedentes.
+
+    Si el caso no tiene términos útiles o ningún precedente los comparte, se
+    recurre a la estrategia de respaldo (los más recientes del tipo).
+    """
+
+    nombre = 'texto'
+
+    # Pesos BM25 por columna: hechos, principios, decisión
+    PESOS = (1.0, 0.5, 0.5)
+
+    def __init__(self, db_path='justicia.db', respaldo: BusquedaPrecedentes = None):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        self.versiones = obtener_versiones(db_path)
+        self.respaldo = respaldo or obtener_indice_precedentes(db_path)
+        self._frecuencias: Tuple[int, int, Dict[str, int]] = (None, 0, {})
+        self._lock_stats = threading.Lock()
+        self._stats = {'consultas': 0, 'respaldo': 0, 'errores': 0}
+
+    def buscar(self, analizado: CasoAnalizado, limite: int = 3) -> List[Dict]:
+        terminos = terminos_clave(analizado)
+        precedentes = []
+        if terminos:
+            try:
+                precedentes = self._consultar(analizado.caso['tipo_caso'], terminos, limite)
+                self._contar('consultas')
+            except sqlite3.OperationalError:
+                logger.exception("Error en la búsqueda de texto de precedentes")
+                self._contar('errores')
+
+        if precedentes:
+            return precedentes
+        self._contar('respaldo')
+        return self.respaldo.buscar(analizado, limite)
+
+    def _consultar(self, tipo_caso: str, terminos: List[str], limite: int) -> List[Dict]:
+        with self.db.conexion() as conn:
+            terminos = self._distintivos(conn, terminos)
+            if not terminos:
+                return []
+
+            consulta = ' OR '.join(f'"{t}"' for t in terminos)
+            pesos = ', '.join(str(p) for p in self.PESOS)
+            # LEFT JOIN fija el orden: primero el MATCH y después cada fila por
+            # id. Con un JOIN común SQLite arma un filtro Bloom recorriendo
+            # toda casos_precedentes en cada búsqueda
+            filas = conn.execute(f"""
+                SELECT {', '.join('p.' + c for c in CAMPOS_PRECEDENTE)}
+                FROM precedentes_fts
+                LEFT JOIN casos_precedentes p ON p.id = precedentes_fts.rowid
+                WHERE precedentes_fts MATCH ? AND precedentes_fts.tipo_caso = ?
+                ORDER BY bm25(precedentes_fts, {pesos}), p.fecha_sentencia DESC, p.id DESC
+                LIMIT ?
+            """, (consulta, tipo_caso, limite)).fetchall()
+        return [{campo: fila[campo] for campo in CAMPOS_PRECEDENTE} for fila in filas]
+
+    def _distintivos(self, conn, terminos: List[str]) -> List[str]:
+        """Los términos presentes en el corpus y no demasiado frecuentes, de menor a mayor frecuencia"""
+        version = self.versiones.version('casos_precedentes')
+        if self._frecuencias[0] != version:
+            total = conn.execute("SELECT COUNT(*) FROM casos_precedentes").fetchone()[0]
+            self._frecuencias = (version, total, {})
+        _, total, frecuencias = self._frecuencias
+
+        # Cada término leído de precedentes_fts_vocab recorre su lista de
+        # documentos: se recuerda hasta que cambie el corpus
+        consulta = {t: frecuencias.get(t) for t in terminos}
+        faltantes = [t for t, frecuencia in consulta.items() if frecuencia is None]
+        if faltantes:
+            leidas = dict.fromkeys(faltantes, 0)
+            leidas.update(conn.execute(f"""
+                SELECT term, doc FROM precedentes_fts_vocab
+                WHERE term IN ({', '.join('?' * len(faltantes))})
+            """, faltantes).fetchall())
+            if len(frecuencias) + len(leidas) > MAX_FRECUENCIAS_CACHEADAS:
+                frecuencias.clear()
+            frecuencias.update(leidas)
+            consulta.update(leidas)
+
+        maximo = max(MIN_DOCUMENTOS_DESCARTE, total * MAX_FRECUENCIA_DOCUMENTAL)
+        utiles = sorted((frecuencia, t) for t, frecuencia in consulta.items() if 0 < frecuencia <= maximo)
+        return [t for _, t in utiles[:MAX_TERMINOS_CONSULTA]]
+
+    def _contar(self, contador: str):
+        with self._lock_stats:
+            self._stats[contador] += 1
+
+    def estadisticas(self) -> Dict:
+        with self._lock_stats:
+            stats = dict(self._stats)
+        return dict(stats, estrategia=self.nombre, respaldo_indice=self.respaldo.estadisticas())
+
+
+class BusquedaVectorial(BusquedaPrecedentes):
+    """
+    Precedentes del mismo tipo ordenados por similitud coseno TF-IDF entre la
+    descripción del caso y los hechos del precedente, calculada en memoria
+    (vectorizador.IndiceTfIdf) sin consultar la base.
+
+    El índice se guarda en disco por versión de casos_precedentes y los
+    workers lo abren con memory mapping. Al cambiar la versión, si solo hubo
+    inserciones (la versión de reescritura no cambió) se agregan las filas
+    nuevas; si se modificó o borró alguna, se reconstruye y se guarda.
+    Sin NumPy/SciPy la estrategia no está disponible.
+    """
+
+    nombre = 'vectorial'
+
+    def __init__(self, db_path='justicia.db', directorio: Optional[str] = None,
+                 indice: Optional[IndicePrecedentes] = None):
+        if not vectorizador.disponible():
+            raise RuntimeError('La búsqueda vectorial de precedentes requiere NumPy y SciPy')
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        self.versiones = obtener_versiones(db_path)
+        self.directorio = directorio or os.path.join(
+            os.path.dirname(os.path.abspath(db_path)), 'indices', 'precedentes_tfidf'
+        )
+        # Filas de los precedentes y respaldo cuando no hay coincidencias
+        self.indice = indice or obtener_indice_precedentes(db_path)
+        self._lock = threading.Lock()
+        # (versión, versión de reescritura, índice TF-IDF)
+        self._estado: Tuple[Optional[int], Optional[int], Optional[vectorizador.IndiceTfIdf]] = (None, None, None)
+        self._lock_stats = threading.Lock()
+        self._stats = {'consultas': 0, 'respaldo': 0, 'cargas': 0, 'reconstrucciones': 0, 'agregados': 0}
+
+    def buscar(self, analizado: CasoAnalizado, limite: int = 3) -> List[Dict]:
+        texto = analizado.textos.get('descripcion_hechos')
+        if texto is None:
+            texto = analizado.caso.get('descripcion_hechos') or ''
+        ids = self.vigente().consultar(terminos_significativos(texto), analizado.caso['tipo_caso'], limite)
+        self._contar('consultas')
+
+        precedentes = self.indice.obtener(ids)
+        if precedentes:
+            return precedentes
+        self._contar('respaldo')
+        return self.indice.buscar(analizado, limite)
+
+    def vigente(self) -> 'vectorizador.IndiceTfIdf':
+        """Índice TF-IDF de la versión actual de casos_precedentes"""
+        version = self.versiones.version('casos_precedentes')
+        estado = self._estado
+        if estado[0] == version:
+            return estado[2]
+
+        with self._lock:
+            if self._estado[0] != version:
+                self._estado = self._actualizar(version)
+            return self._estado[2]
+
+    def reconstruir(self) -> 'vectorizador.IndiceTfIdf':
+        """Reconstruye el índice desde la base y lo guarda (p. ej. tras una carga masiva)"""
+        with self._lock:
+            version = self.versiones.version('casos_precedentes')
+            reescritura = self.versiones.version('casos_precedentes_reescritura')
+            self._estado = (version, reescritura, self._construir(version, reescritura))
+            return self._estado[2]
+
+    def _actualizar(self, version: int) -> Tuple[int, int, 'vectorizador.IndiceTfIdf']:
+        reescritura = self.versiones.version('casos_precedentes_reescritura')
+        _, reescritura_cargada, indice = self._estado
+
+        if indice is None:
+            indice, reescritura_cargada = self._abrir_guardado(version, reescritura)
+        if indice is not None and reescritura_cargada == reescritura:
+            # Solo hubo inserciones desde el índice cargado: se agregan las filas nuevas
+            nuevas = self._leer(desde_id=indice.max_id)
+            if nuevas:
+                indice = indice.agregar(nuevas)
+                self._contar('agregados', len(nuevas))
+            return version, reescritura, indice
+
+        return version, reescritura, self._construir(version, reescritura)
+
+    def _construir(self, version: int, reescritura: int) -> 'vectorizador.IndiceTfIdf':
+        indice = vectorizador.IndiceTfIdf.construir(self._leer())
+        self._contar('reconstrucciones')
+        logger.info("Índice TF-IDF de precedentes reconstruido (versión %s, %s documentos)",
+                    version, indice.documentos)
+        try:
+            indice.guardar(os.path.join(self.directorio, f'v{version}'),
+                           {'version': version, 'reescritura': reescritura})
+            self._limpiar(conservar=f'v{version}')
+        except OSError:
+            logger.exception("No se pudo guardar el índice TF-IDF en %s", self.directorio)
+        return indice
+
+    def _abrir_guardado(self, version: int, reescritura: int):
+        """El índice guardado más nuevo que siga vigente (misma reescritura), o (None, None)"""
+        if not os.path.isdir(self.directorio):
+            return None, None
+        guardados = sorted(
+            (int(nombre[1:]) for nombre in os.listdir(self.directorio)
+             if nombre.startswith('v') and nombre[1:].isdigit() and int(nombre[1:]) <= version),
+            reverse=True
+        )
+        for numero in guardados:
+            try:
+                indice, meta = vectorizador.IndiceTfIdf.cargar(os.path.join(self.directorio, f'v{numero}'))
+            except (OSError, ValueError, KeyError):
+                logger.exception("Índice TF-IDF guardado ilegible: v%s", numero)
+                continue
+            if meta.get('reescritura') == reescritura:
+                self._contar('cargas')
+                return indice, reescritura
+            break
+        return None, None
+
+    def _limpiar(self, conservar: str):
+        """Borra los índices guardados de versiones anteriores"""
+        for nombre in os.listdir(self.directorio):
+            if nombre != conservar and not nombre.startswith('.tmp-'):
+                shutil.rmtree(os.path.join(self.directorio, nombre), ignore_errors=True)
+
+    def _leer(self, desde_id: int = 0) -> List[Tuple]:
+        with self.db.conexion() as conn:
+            return [tuple(fila) for fila in conn.execute("""
+                SELECT id, tipo_caso, fecha_sentencia, hechos_resumidos
+                FROM casos_precedentes
+                WHERE id > ?
+                ORDER BY id
+            """, (desde_id,))]
+
+    def _contar(self, contador: str, cantidad: int = 1):
+        with self._lock_stats:
+            self._stats[contador] += cantidad
+
+    def estadisticas(self) -> Dict:
+        with self._lock_stats:
+            stats = dict(self._stats)
+        version, reescritura, indice = self._estado
+        return dict(stats, estrategia=self.nombre, version=version, version_reescritura=reescritura,
+                    indice=indice.estadisticas() if indice is not None else None,
+                    respaldo_indice=self.indice.estadisticas())
+
+
+ESTRATEGIAS = {
+    IndicePrecedentes.nombre: obtener_indice_precedentes,
+    BusquedaTextoCompleto.nombre: BusquedaTextoCompleto,
+    BusquedaVectorial.nombre: BusquedaVectorial,
+}
+
+
+def crear_busqueda(estrategia: str = 'texto', db_path='justicia.db') -> BusquedaPrecedentes:
+    """Instancia una estrategia de búsqueda por nombre. Lanza ValueError si no existe"""
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia de búsqueda de precedentes desconocida: {estrategia} "
+                         f"(opciones: {', '.join(ESTRATEGIAS)})")
+    try:
+        return ESTRATEGIAS[estrategia](db_path)
+    except RuntimeError as e:
+        logger.warning("%s; se usa la estrategia '%s'", e, IndicePrecedentes.nombre)
+        return obtener_indice_precedentes(db_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Índice TF-IDF de precedentes')
+    parser.add_argument('--db', default='justicia.db', help='ruta de la base de datos')
+    parser.add_argument('--directorio', default=None, help='dónde guardar el índice (por defecto indices/ junto a la base)')
+    args = parser.parse_args()
+
+    busqueda = BusquedaVectorial(args.db, directorio=args.directorio)
+    indice = busqueda.reconstruir()
+    print(f"Índice guardado en {busqueda.directorio}: {indice.documentos} precedentes, "
+          f"{len(indice.terminos)} términos")
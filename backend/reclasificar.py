@@ -0,0 +1,172 @@
+"""
+JUSTICIA.ar - Reclasificación Masiva
+Vuelve a puntuar todos los casos con los criterios vigentes del clasificador,
+en paralelo, y guarda los cambios de nivel en transacciones por bloque.
+
+Ejecutar: python reclasificar.py --dry-run
+          python reclasificar.py --procesos 4 --checkpoint reclasificar.ckpt
+          python reclasificar.py --desde-id 120000     (reanudar)
+
+Nota: casos no almacena tiene_contestacion ni plantea_cuestion_constitucional;
+se reclasifica con sus valores por defecto, igual que generar_decision() en app.py.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+from conexion import obtener_gestor
+from clasificador import ClasificadorCasos
+
+NIVELES = (1, 2, 3, 4)
+
+_clasificador = None
+
+
+def _inicializar_worker(db_path: str):
+    """Cada proceso del pool construye su propio clasificador"""
+    global _clasificador
+    _clasificador = ClasificadorCasos(db_path)
+
+
+def _clasificar_bloque(casos: List[Dict]) -> List[Tuple[int, int, int]]:
+    """Clasifica un bloque. Retorna (id, nivel_anterior, nivel_nuevo) por caso"""
+    clasificaciones = _clasificador.clasificar_lote(casos)
+    return [
+        (caso['id'], caso['nivel_clasificacion'], clasificacion.nivel)
+        for caso, clasificacion in zip(casos, clasificaciones)
+    ]
+
+
+class Reclasificador:
+    """
+    Recorre casos por id en bloques (paginación por clave), los reparte entre
+    un pool de procesos y aplica los cambios de nivel en orden, un bloque por
+    transacción. Tras cada bloque confirmado se guarda el último id procesado
+    para poder reanudar.
+    """
+
+    def __init__(self, db_path='justicia.db', procesos=None, tamano_bloque=1000,
+                 dry_run=False, checkpoint=None):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        self.procesos = procesos or os.cpu_count() or 1
+        self.tamano_bloque = tamano_bloque
+        self.dry_run = dry_run
+        self.checkpoint = checkpoint
+
+        self.matriz = {(a, d): 0 for a in NIVELES + (None,) for d in NIVELES}
+        self.procesados = 0
+        self.cambiados = 0
+        self.ultimo_id = 0
+
+    def _bloques(self, desde_id: int):
+        """Genera bloques de casos con id > desde_id"""
+        ultimo = desde_id
+        while True:
+            with self.db.conexion() as conn:
+                filas = conn.execute("""
+                    SELECT id, tipo_caso, monto_reclamado, descripcion_hechos, pruebas,
+                           nivel_clasificacion
+                    FROM casos WHERE id > ? ORDER BY id LIMIT ?
+                """, (ultimo, self.tamano_bloque)).fetchall()
+            if not filas:
+                return
+            casos = [dict(zip(f.keys(), f)) for f in filas]
+            for caso in casos:
+                caso['pruebas'] = caso['pruebas'] or ''
+            ultimo = casos[-1]['id']
+            yield casos
+
+    def ejecutar(self, desde_id: int = 0):
+        """Reclasifica todos los casos con id > desde_id"""
+        self.ultimo_id = desde_id
+        en_vuelo = deque()
+        max_en_vuelo = self.procesos * 2  # Acota la memoria: no se lee toda la tabla
+
+        with multiprocessing.Pool(self.procesos, _inicializar_worker, (self.db_path,)) as pool:
+            for bloque in self._bloques(desde_id):
+                en_vuelo.append(pool.apply_async(_clasificar_bloque, (bloque,)))
+                if len(en_vuelo) >= max_en_vuelo:
+                    self._aplicar(en_vuelo.popleft().get())
+            while en_vuelo:
+                self._aplicar(en_vuelo.popleft().get())
+
+    def _aplicar(self, resultados: List[Tuple[int, int, int]]):
+        """Registra la transición de cada caso y guarda los cambios del bloque"""
+        cambios = []
+        for caso_id, anterior, nuevo in resultados:
+            self.matriz[(anterior if anterior in NIVELES else None, nuevo)] += 1
+            if anterior != nuevo:
+                cambios.append((caso_id, anterior, nuevo))
+
+        if cambios and not self.dry_run:
+            with self.db.transaccion(inmediata=True) as conn:
+                conn.executemany(
+                    "UPDATE casos SET nivel_clasificacion = ? WHERE id = ?",
+                    [(nuevo, caso_id) for caso_id, _, nuevo in cambios]
+                )
+                conn.executemany("""
+                    INSERT INTO auditoria (caso_id, tipo_evento, descripcion)
+                    VALUES (?, 'reclasificacion', ?)
+                """, [
+                    (caso_id, f"Caso reclasificado de Nivel {anterior} a Nivel {nuevo}")
+                    for caso_id, anterior, nuevo in cambios
+                ])
+
+        self.procesados += len(resultados)
+        self.cambiados += len(cambios)
+        self.ultimo_id = resultados[-1][0]
+        if self.checkpoint and not self.dry_run:
+            with open(self.checkpoint, 'w') as f:
+                f.write(str(self.ultimo_id))
+
+    def imprimir_matriz(self):
+        """Imprime la matriz de transiciones nivel anterior → nivel nuevo"""
+        print("\nTransiciones de nivel (filas: anterior, columnas: nuevo)")
+        print("          " + "".join(f"{'N' + str(d):>10}" for d in NIVELES))
+        for a in NIVELES + (None,):
+            fila = [self.matriz[(a, d)] for d in NIVELES]
+            if a is None and not any(fila):
+                continue
+            etiqueta = f"N{a}" if a else "sin nivel"
+            print(f"{etiqueta:<10}" + "".join(f"{n:>10,}" for n in fila))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='justicia.db', help='ruta de la base de datos')
+    parser.add_argument('--procesos', type=int, default=None, help='procesos del pool (por defecto, CPUs)')
+    parser.add_argument('--bloque', type=int, default=1000, help='casos por bloque/transacción')
+    parser.add_argument('--dry-run', action='store_true', help='no escribir: solo mostrar la matriz de transiciones')
+    parser.add_argument('--desde-id', type=int, default=None, help='reanudar después de este id')
+    parser.add_argument('--checkpoint', default=None, help='archivo donde guardar/leer el último id procesado')
+    args = parser.parse_args()
+
+    desde_id = args.desde_id
+    if desde_id is None and args.checkpoint and os.path.exists(args.checkpoint):
+        with open(args.checkpoint) as f:
+            desde_id = int(f.read().strip() or 0)
+        print(f"Reanudando desde checkpoint: id > {desde_id}")
+
+    reclasificador = Reclasificador(args.db, args.procesos, args.bloque, args.dry_run, args.checkpoint)
+    inicio = time.perf_counter()
+    try:
+        reclasificador.ejecutar(desde_id or 0)
+    except KeyboardInterrupt:
+        print(f"\nInterrumpido. Reanudar con: --desde-id {reclasificador.ultimo_id}")
+        sys.exit(130)
+    finally:
+        duracion = time.perf_counter() - inicio
+        reclasificador.imprimir_matriz()
+        print(f"\nCasos procesados: {reclasificador.procesados:,}")
+        print(f"Cambios de nivel: {reclasificador.cambiados:,}" + (" (dry run, sin escribir)" if args.dry_run else ""))
+        print(f"Último id:        {reclasificador.ultimo_id}")
+        print(f"Duración:         {duracion:.2f} s ({reclasificador.procesados / max(duracion, 1e-9):,.0f} casos/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+JUSTICIA.ar - Programa de Reglas de Clasificación
+Compila las filas activas de criterios_clasificacion en un programa en memoria
+que el clasificador evalúa sin consultar la base.
+"""
+import json
+from bisect import bisect_left
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from analisis import PALABRAS_MOTOR, CasoAnalizado, normalizar_texto
+from palabras_clave import BuscadorPalabras
+
+try:
+    import numpy as np
+except ImportError:  # sin NumPy, clasificar_lote usa el camino escalar
+    np = None
+
+CONDICIONES = ('palabras', 'monto_menor', 'monto_mayor', 'verdadero', 'falso')
+
+
+class Regla(NamedTuple):
+    factor: str
+    condicion: str
+    campo: Optional[str]
+    palabras: FrozenSet[str]
+    umbral_monto: Optional[float]
+    tipo_caso: Optional[str]
+    peso: int
+    nivel_minimo: int
+    etiqueta: str
+
+
+def compilar_regla(fila: Dict) -> Regla:
+    """Valida una fila de criterios_clasificacion. Lanza ValueError si es inválida"""
+    factor, condicion = fila['factor'], fila['condicion']
+    if condicion not in CONDICIONES:
+        raise ValueError(f"Criterio '{factor}': condición desconocida {condicion!r}")
+    if condicion in ('monto_menor', 'monto_mayor') and fila['umbral_monto'] is None:
+        raise ValueError(f"Criterio '{factor}': falta umbral_monto")
+    if condicion in ('palabras', 'verdadero', 'falso') and not fila['campo']:
+        raise ValueError(f"Criterio '{factor}': falta campo")
+
+    palabras = frozenset()
+    if condicion == 'palabras':
+        try:
+            lista = json.loads(fila['palabras_clave'] or '[]')
+            if not isinstance(lista, list):
+                raise TypeError
+            palabras = frozenset(normalizar_texto(p) for p in lista)
+        except (TypeError, ValueError, AttributeError):
+            raise ValueError(f"Criterio '{factor}': palabras_clave debe ser una lista JSON de textos")
+        if not palabras:
+            raise ValueError(f"Criterio '{factor}': sin palabras clave")
+
+    return Regla(
+        factor=factor,
+        condicion=condicion,
+        campo=fila['campo'],
+        palabras=palabras,
+        umbral_monto=fila['umbral_monto'],
+        tipo_caso=fila['tipo_caso'],
+        peso=fila['peso'],
+        nivel_minimo=fila['nivel_minimo'],
+        etiqueta=fila['etiqueta'] or fila['descripcion'],
+    )
+
+
+class ProgramaReglas:
+    """
+    Conjunto inmutable de reglas compiladas. Las palabras clave de todas las
+    reglas (y las que consulta el motor de decisión) comparten un solo
+    buscador, y cada campo de texto se recorre una vez por caso.
+    """
+
+    def __init__(self, reglas: Iterable[Regla], version: int = 0,
+                 palabras_extra: Dict[str, Iterable[str]] = PALABRAS_MOTOR):
+        self.version = version
+        self.reglas: Tuple[Regla, ...] = tuple(reglas)
+        self.etiquetas: Dict[str, str] = {r.factor: r.etiqueta for r in self.reglas}
+        campos: Dict[str, set] = {
+            campo: {normalizar_texto(p) for p in palabras} for campo, palabras in palabras_extra.items()
+        }
+        for regla in self.reglas:
+            if regla.condicion == 'palabras':
+                campos.setdefault(regla.campo, set()).update(regla.palabras)
+        self.campos_texto: Tuple[str, ...] = tuple(campos)
+        self.buscador = BuscadorPalabras(p for palabras in campos.values() for p in palabras)
+
+        # Lo que las reglas leen de un caso, para huella()
+        self._umbrales = sorted({
+            r.umbral_monto for r in self.reglas if r.condicion in ('monto_menor', 'monto_mayor')
+        })
+        self._tipos = frozenset(r.tipo_caso for r in self.reglas if r.tipo_caso)
+        self._banderas = tuple(dict.fromkeys(
+            (r.condicion, r.campo) for r in self.reglas if r.condicion in ('verdadero', 'falso')
+        ))
+        self._campos_palabras = tuple(dict.fromkeys(r.campo for r in self.reglas if r.condicion == 'palabras'))
+
+        if np is not None:
+            self._preparar_lote()
+
+    def _preparar_lote(self):
+        """Columnas de las reglas para la evaluación vectorizada"""
+        # (campo, palabra) -> fila de la matriz palabra x regla
+        self._indice_palabras: Dict[Tuple[str, str], int] = {}
+        for regla in self.reglas:
+            for palabra in regla.palabras:
+                self._indice_palabras.setdefault((regla.campo, palabra), len(self._indice_palabras))
+
+        self._reglas_por_palabra = np.zeros((len(self._indice_palabras), len(self.reglas)), dtype=bool)
+        for j, regla in enumerate(self.reglas):
+            for palabra in regla.palabras:
+                self._reglas_por_palabra[self._indice_palabras[(regla.campo, palabra)], j] = True
+
+        self._pesos = np.array([r.peso for r in self.reglas], dtype=np.int64)
+        self._niveles_minimos = np.array([r.nivel_minimo for r in self.reglas], dtype=np.int64)
+
+    def analizar(self, caso: Dict) -> CasoAnalizado:
+        """Normaliza los textos del caso y busca las palabras clave (una pasada por campo)"""
+        if isinstance(caso, CasoAnalizado):
+            if caso.buscador is self.buscador:
+                return caso
+            caso = caso.caso
+        return CasoAnalizado(caso, self.buscador, self.campos_texto)
+
+    def huella(self, caso: Union[Dict, CasoAnalizado]) -> Tuple:
+        """
+        Clave de los rasgos que leen las reglas, tomada sin analizar el caso:
+        tramo del monto respecto de los umbrales (un monto igual a un umbral
+        tiene su propio tramo), tipo de caso si alguna regla lo filtra,
+        banderas, y el texto crudo de los campos con reglas de palabras clave.
+        Dos casos con la misma huella reciben la misma evaluación.
+        """
+        if isinstance(caso, CasoAnalizado):
+            caso = caso.caso
+        tramo = 0
+        if self._umbrales:
+            monto = caso.get('monto_reclamado', 0)
+            i = bisect_left(self._umbrales, monto)
+            tramo = 2 * i + (i < len(self._umbrales) and self._umbrales[i] == monto)
+        tipo_caso = caso.get('tipo_caso', '')
+        return (
+            tramo,
+            tipo_caso if tipo_caso in self._tipos else None,
+            tuple(
+                bool(caso.get(campo, False)) if condicion == 'verdadero' else not caso.get(campo, True)
+                for condicion, campo in self._banderas
+            ),
+            tuple(caso.get(campo) or '' for campo in self._campos_palabras),
+        )
+
+    def evaluar(self, analizado: CasoAnalizado) -> Tuple[int, int, List[Regla]]:
+        """Retorna (puntos, nivel_minimo_forzado, reglas aplicadas en orden)"""
+        caso = analizado.caso
+        coincidencias = analizado.coincidencias
+        monto = caso.get('monto_reclamado', 0)
+        tipo_caso = caso.get('tipo_caso', '')
+
+        puntos = 0
+        nivel_minimo = 1
+        aplicadas = []
+        for regla in self.reglas:
+            if regla.tipo_caso and regla.tipo_caso != tipo_caso:
+                continue
+            condicion = regla.condicion
+            if condicion == 'palabras':
+                cumple = not regla.palabras.isdisjoint(coincidencias[regla.campo])
+            elif condicion == 'monto_menor':
+                cumple = monto < regla.umbral_monto
+            elif condicion == 'monto_mayor':
+                cumple = monto > regla.umbral_monto
+            elif condicion == 'verdadero':
+                cumple = bool(caso.get(regla.campo, False))
+            else:
+                cumple = not caso.get(regla.campo, True)
+
+            if cumple:
+                puntos += regla.peso
+                nivel_minimo = max(nivel_minimo, regla.nivel_minimo)
+                aplicadas.append(regla)
+
+        return puntos, nivel_minimo, aplicadas
+
+    def evaluar_lote(self, analizados: List[CasoAnalizado]) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        Versión vectorizada de evaluar() (requiere NumPy).
+
+        Retorna (puntos, nivel_minimo_forzado, cumple) donde cumple es una
+        matriz booleana casos x reglas, en el orden de self.reglas.
+        """
+        casos = [analizado.caso for analizado in analizados]
+        n = len(casos)
+        cumple = np.zeros((n, len(self.reglas)), dtype=bool)
+
+        # Palabras clave (ya buscadas al analizar cada caso): los aciertos se
+        # vuelcan como pares (caso, palabra) y se expanden a reglas en bloque
+        filas, palabras = [], []
+        indice = self._indice_palabras
+        for i, analizado in enumerate(analizados):
+            for campo, encontradas in analizado.coincidencias.items():
+                for palabra in encontradas:
+                    k = indice.get((campo, palabra))
+                    if k is not None:
+                        filas.append(i)
+                        palabras.append(k)
+        if filas:
+            np.logical_or.at(cumple, np.array(filas), self._reglas_por_palabra[np.array(palabras)])
+
+        monto = None
+        tipos = None
+        for j, regla in enumerate(self.reglas):
+            condicion = regla.condicion
+            if condicion in ('monto_menor', 'monto_mayor'):
+                if monto is None:
+                    monto = np.fromiter((c.get('monto_reclamado', 0) for c in casos), dtype=np.float64, count=n)
+                if condicion == 'monto_menor':
+                    cumple[:, j] = monto < regla.umbral_monto
+                else:
+                    cumple[:, j] = monto > regla.umbral_monto
+            elif condicion == 'verdadero':
+                cumple[:, j] = np.fromiter((bool(c.get(regla.campo, False)) for c in casos), dtype=bool, count=n)
+            elif condicion == 'falso':
+                cumple[:, j] = np.fromiter((not c.get(regla.campo, True) for c in casos), dtype=bool, count=n)
+
+            if regla.tipo_caso:
+                if tipos is None:
+                    tipos = np.array([c.get('tipo_caso', '') for c in casos], dtype=object)
+                cumple[:, j] &= tipos == regla.tipo_caso
+
+        puntos = cumple @ self._pesos
+        nivel_minimo = np.where(cumple, self._niveles_minimos, 1).max(axis=1, initial=1)
+        return puntos, nivel_minimo, cumple
+
+
+def cargar_programa(conn, version: int = 0) -> ProgramaReglas:
+    """Compila las reglas activas de criterios_clasificacion"""
+    filas = conn.execute("""
+        SELECT factor, descripcion, peso, nivel_minimo, condicion, campo,
+               palabras_clave, umbral_monto, tipo_caso, etiqueta
+        FROM criterios_clasificacion
+        WHERE activo = 1 AND condicion IS NOT NULL
+        ORDER BY orden, id
+    """).fetchall()
+    return ProgramaReglas([compilar_regla(dict(zip(f.keys(), f))) for f in filas], version)
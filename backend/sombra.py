@@ -0,0 +1,292 @@
+"""
+JUSTICIA.ar - Evaluación en Sombra de Criterios Candidatos
+Aplica conjuntos de criterios candidatos a los casos nuevos en un hilo de
+fondo y acumula su comparación con el nivel de producción.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from clasificador import evaluar_programa
+from conexion import obtener_gestor
+from reglas import ProgramaReglas, compilar_regla
+from versiones_datos import obtener_versiones
+
+logger = logging.getLogger(__name__)
+
+NIVELES = (1, 2, 3, 4)
+
+# Discrepancias guardadas por conjunto (las más recientes); los totales se
+# acumulan en comparacion_sombra
+MAX_DISCREPANCIAS = 1000
+
+# Columnas de un criterio candidato y su valor por defecto
+CAMPOS_CRITERIO = {
+    'factor': None,
+    'descripcion': '',
+    'peso': None,
+    'nivel_minimo': 1,
+    'condicion': None,
+    'campo': None,
+    'palabras_clave': None,
+    'umbral_monto': None,
+    'tipo_caso': None,
+    'etiqueta': None,
+    'orden': 100,
+    'activo': 1,
+}
+
+
+def validar_criterio(criterio: Dict) -> Dict:
+    """Completa y valida un criterio candidato. Lanza ValueError si es inválido"""
+    if not isinstance(criterio, dict):
+        raise ValueError('Cada criterio debe ser un objeto JSON')
+    fila = {campo: criterio.get(campo, defecto) for campo, defecto in CAMPOS_CRITERIO.items()}
+    for requerido in ('factor', 'peso', 'condicion'):
+        if fila[requerido] is None:
+            raise ValueError(f'Campo requerido faltante en criterio: {requerido}')
+    if (not isinstance(fila['peso'], int) or isinstance(fila['peso'], bool)
+            or isinstance(fila['nivel_minimo'], bool) or fila['nivel_minimo'] not in NIVELES):
+        raise ValueError(f"Criterio '{fila['factor']}': peso debe ser entero y nivel_minimo entre 1 y 4")
+    if isinstance(fila['palabras_clave'], list):
+        fila['palabras_clave'] = json.dumps(fila['palabras_clave'], ensure_ascii=False)
+    compilar_regla(fila)
+    return fila
+
+
+class EvaluadorSombra:
+    """
+    Cola acotada de casos clasificados más un hilo de fondo por worker.
+
+    `enviar` nunca bloquea: si la cola está llena el caso se descarta y se
+    cuenta, así la evaluación en sombra no puede frenar a los workers que
+    atienden peticiones. El hilo toma los casos de a lotes, los clasifica con
+    cada conjunto candidato activo y guarda la matriz de confusión y las
+    discrepancias en una transacción por lote. De las discrepancias se
+    conservan solo las últimas `max_discrepancias` por conjunto.
+    """
+
+    def __init__(self, db_path='justicia.db', capacidad=1000, tamano_lote=100,
+                 max_discrepancias=MAX_DISCREPANCIAS):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        self.versiones = obtener_versiones(db_path)
+        self.tamano_lote = tamano_lote
+        self.max_discrepancias = max_discrepancias
+
+        self._cola: 'queue.Queue[Tuple[int, Dict, int]]' = queue.Queue(maxsize=capacidad)
+        self._detener = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+        self._lock_stats = threading.Lock()
+        self._programas: Tuple[Optional[int], Dict[str, ProgramaReglas]] = (None, {})
+        self._stats = {'encolados': 0, 'descartados': 0, 'evaluados': 0, 'errores': 0}
+
+    def iniciar(self):
+        """Arranca el hilo de evaluación en este proceso (idempotente, seguro tras fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._detener.clear()
+            threading.Thread(target=self._bucle, name='sombra', daemon=True).start()
+
+    def detener(self):
+        """Pide al hilo que termine después del lote en curso"""
+        self._detener.set()
+        self._pid = None
+
+    # ===== API =====
+
+    def enviar(self, caso_id: int, caso: Dict, nivel_produccion: int):
+        """Encola un caso ya clasificado en producción (no bloquea)"""
+        try:
+            self._cola.put_nowait((caso_id, caso, nivel_produccion))
+            self._contar('encolados')
+        except queue.Full:
+            self._contar('descartados')
+
+    def _contar(self, contador: str, cantidad: int = 1):
+        with self._lock_stats:
+            self._stats[contador] += cantidad
+
+    def registrar_conjunto(self, conjunto: str, criterios: List[Dict]) -> int:
+        """
+        Crea o reemplaza un conjunto candidato y reinicia su comparación.
+        Lanza ValueError si algún criterio es inválido.
+        """
+        if not criterios:
+            raise ValueError('El conjunto debe tener al menos un criterio')
+        filas = [validar_criterio(c) for c in criterios]
+        columnas = list(CAMPOS_CRITERIO)
+
+        with self.db.transaccion(inmediata=True) as conn:
+            self._borrar(conn, conjunto)
+            conn.executemany(f"""
+                INSERT INTO criterios_candidatos (conjunto, {', '.join(columnas)})
+                VALUES (?, {', '.join('?' * len(columnas))})
+            """, [(conjunto, *(fila[c] for c in columnas)) for fila in filas])
+        return len(filas)
+
+    def eliminar_conjunto(self, conjunto: str) -> bool:
+        """Elimina un conjunto candidato y sus resultados"""
+        with self.db.transaccion(inmediata=True) as conn:
+            return self._borrar(conn, conjunto) > 0
+
+    def _borrar(self, conn, conjunto: str) -> int:
+        borrados = conn.execute("DELETE FROM criterios_candidatos WHERE conjunto = ?", (conjunto,)).rowcount
+        conn.execute("DELETE FROM comparacion_sombra WHERE conjunto = ?", (conjunto,))
+        conn.execute("DELETE FROM discrepancias_sombra WHERE conjunto = ?", (conjunto,))
+        return borrados
+
+    def reporte(self, conjunto: str, discrepancias: int = 20) -> Optional[Dict]:
+        """Tasa de acuerdo, matriz de confusión y últimas discrepancias de un conjunto"""
+        with self.db.transaccion() as conn:
+            criterios = conn.execute(
+                "SELECT COUNT(*) FROM criterios_candidatos WHERE conjunto = ?", (conjunto,)
+            ).fetchone()[0]
+            celdas = conn.execute("""
+                SELECT nivel_produccion, nivel_candidato, total
+                FROM comparacion_sombra WHERE conjunto = ?
+            """, (conjunto,)).fetchall()
+            recientes = conn.execute("""
+                SELECT caso_id, nivel_produccion, nivel_candidato, puntos_candidato,
+                       factores_candidato, fecha_evento
+                FROM discrepancias_sombra WHERE conjunto = ?
+                ORDER BY id DESC LIMIT ?
+            """, (conjunto, discrepancias)).fetchall()
+
+        if not criterios and not celdas:
+            return None
+
+        matriz = {str(p): {str(c): 0 for c in NIVELES} for p in NIVELES}
+        evaluados = coincidencias = 0
+        for produccion, candidato, total in celdas:
+            matriz[str(produccion)][str(candidato)] = total
+            evaluados += total
+            if produccion == candidato:
+                coincidencias += total
+
+        return {
+            'conjunto': conjunto,
+            'criterios': criterios,
+            'evaluados': evaluados,
+            'coincidencias': coincidencias,
+            'discrepancias': evaluados - coincidencias,
+            'tasa_acuerdo': round(coincidencias / evaluados, 4) if evaluados else None,
+            'matriz_confusion': matriz,
+            'discrepancias_recientes': [
+                dict(zip(fila.keys(), fila), factores_candidato=json.loads(fila['factores_candidato']))
+                for fila in recientes
+            ]
+        }
+
+    def estadisticas(self) -> Dict:
+        """Contadores de la cola en este proceso"""
+        with self._lock_stats:
+            stats = dict(self._stats)
+        return dict(stats, pendientes=self._cola.qsize(), capacidad=self._cola.maxsize)
+
+    # ===== PROCESAMIENTO =====
+
+    def _programas_vigentes(self) -> Tuple[int, Dict[str, ProgramaReglas]]:
+        """Programas de los conjuntos candidatos; se recompilan si cambió la tabla"""
+        version = self.versiones.version('criterios_candidatos')
+        if self._programas[0] == version:
+            return self._programas
+
+        with self.db.conexion() as conn:
+            filas = conn.execute("""
+                SELECT conjunto, factor, descripcion, peso, nivel_minimo, condicion, campo,
+                       palabras_clave, umbral_monto, tipo_caso, etiqueta
+                FROM criterios_candidatos
+                WHERE activo = 1
+                ORDER BY conjunto, orden, id
+            """).fetchall()
+
+        por_conjunto: Dict[str, List] = {}
+        for fila in filas:
+            por_conjunto.setdefault(fila['conjunto'], []).append(dict(zip(fila.keys(), fila)))
+
+        programas = {}
+        for conjunto, filas_conjunto in por_conjunto.items():
+            try:
+                programas[conjunto] = ProgramaReglas([compilar_regla(f) for f in filas_conjunto], version)
+            except ValueError:
+                logger.exception("Conjunto candidato '%s' inválido; se omite", conjunto)
+
+        self._programas = (version, programas)
+        return self._programas
+
+    def _bucle(self):
+        """Toma lotes de la cola y los evalúa hasta que se pida detener"""
+        while not self._detener.is_set():
+            try:
+                lote = [self._cola.get(timeout=1.0)]
+            except queue.Empty:
+                continue
+            while len(lote) < self.tamano_lote:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._evaluar_lote(lote)
+                self._contar('evaluados', len(lote))
+            except Exception:
+                logger.exception("Error en la evaluación en sombra")
+                self._contar('errores', len(lote))
+
+    def _evaluar_lote(self, lote: List[Tuple[int, Dict, int]]):
+        """Clasifica el lote con cada candidato y acumula los resultados"""
+        version, programas = self._programas_vigentes()
+        if not programas:
+            return
+
+        conteos = Counter()
+        discrepancias = []
+        for caso_id, caso, nivel_produccion in lote:
+            for conjunto, programa in programas.items():
+                resultado = evaluar_programa(programa, programa.analizar(caso))
+                conteos[(conjunto, nivel_produccion, resultado.nivel)] += 1
+                if resultado.nivel != nivel_produccion:
+                    discrepancias.append((
+                        conjunto, caso_id, nivel_produccion, resultado.nivel,
+                        resultado.puntos, json.dumps(resultado.factores)
+                    ))
+
+        with self.db.transaccion(inmediata=True) as conn:
+            # Si los candidatos cambiaron mientras se evaluaba, el lote se descarta
+            vigente = conn.execute(
+                "SELECT version FROM versiones_datos WHERE tabla = 'criterios_candidatos'"
+            ).fetchone()
+            if vigente is None or vigente[0] != version:
+                return
+
+            conn.executemany("""
+                INSERT INTO comparacion_sombra (conjunto, nivel_produccion, nivel_candidato, total)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (conjunto, nivel_produccion, nivel_candidato)
+                DO UPDATE SET total = total + excluded.total
+            """, [clave + (total,) for clave, total in conteos.items()])
+            conn.executemany("""
+                INSERT INTO discrepancias_sombra (
+                    conjunto, caso_id, nivel_produccion, nivel_candidato,
+                    puntos_candidato, factores_candidato
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, discrepancias)
+            for conjunto in {d[0] for d in discrepancias}:
+                conn.execute("""
+                    DELETE FROM discrepancias_sombra
+                    WHERE conjunto = ? AND id <= (
+                        SELECT id FROM discrepancias_sombra WHERE conjunto = ?
+                        ORDER BY id DESC LIMIT 1 OFFSET ?
+                    )
+                """, (conjunto, conjunto, self.max_discrepancias))
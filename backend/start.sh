@@ -8,12 +8,10 @@ echo "  Asistida por IA"
 echo "=========================================="
 echo ""
 
-# Verificar si la base de datos existe
-if [ ! -f "justicia.db" ]; then
-    echo "⚠️  Base de datos no encontrada. Inicializando..."
-    python3 init_db.py
-    echo ""
-fi
+# Crear la base si no existe y aplicar migraciones pendientes (no borra datos)
+echo "🗄️  Verificando esquema de base de datos..."
+python3 init_db.py
+echo ""
 
 echo "🚀 Iniciando servidor backend..."
 echo ""
@@ -0,0 +1,135 @@
+"""
+JUSTICIA.ar - Prueba de estrés del asignador de expedientes
+Lanza varios procesos que ingresan casos en paralelo sobre la misma base y
+verifica que no haya números de expediente duplicados ni huecos.
+
+Ejecutar: python stress_expedientes.py --procesos 8 --casos 500
+          python stress_expedientes.py --legado   (numeración con COUNT(*))
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from conexion import obtener_gestor
+from expedientes import AsignadorExpedientes
+from migraciones import MigradorEsquema
+
+
+def _insertar_casos(db_path, cantidad, resultados):
+    """Trabajo de cada proceso: ingresa `cantidad` casos de a uno"""
+    db = obtener_gestor(db_path)
+    asignador = AsignadorExpedientes(db_path)
+    errores = 0
+
+    for _ in range(cantidad):
+        try:
+            with db.transaccion(inmediata=True) as conn:
+                numero = asignador.reservar()[0]
+
+                conn.execute("""
+                    INSERT INTO casos (
+                        numero_expediente, tipo_caso, actor_id, demandado_nombre,
+                        monto_reclamado, descripcion_hechos, pruebas,
+                        nivel_clasificacion, estado
+                    ) VALUES (?, 'cobro_suma_dinero', 4, 'Demandado', 100000,
+                              'Caso de estrés', '', 1, 'clasificado')
+                """, (numero,))
+        except sqlite3.Error:
+            errores += 1
+
+    resultados.put(errores)
+
+
+def _insertar_casos_legado(db_path, cantidad, resultados):
+    """Reproduce crear_caso original: conexión nueva y transacción diferida"""
+    errores = 0
+    for _ in range(cantidad):
+        conn = sqlite3.connect(db_path, timeout=5)
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM casos").fetchone()[0]
+            numero = f"JUS-{datetime.now().year}-{total + 1:05d}"
+            conn.execute("""
+                INSERT INTO casos (
+                    numero_expediente, tipo_caso, actor_id, demandado_nombre,
+                    monto_reclamado, descripcion_hechos, pruebas,
+                    nivel_clasificacion, estado
+                ) VALUES (?, 'cobro_suma_dinero', 4, 'Demandado', 100000,
+                          'Caso de estrés', '', 1, 'clasificado')
+            """, (numero,))
+            conn.commit()
+        except sqlite3.Error:
+            errores += 1
+        finally:
+            conn.close()
+    resultados.put(errores)
+
+
+def ejecutar(procesos: int, casos: int, legado: bool = False) -> bool:
+    """Ejecuta la prueba y retorna True si no hubo duplicados ni errores"""
+    directorio = tempfile.mkdtemp(prefix='justicia_stress_')
+    db_path = os.path.join(directorio, 'stress.db')
+
+    MigradorEsquema(db_path).migrar(verbose=False)
+    obtener_gestor(db_path).cerrar()
+
+    resultados = multiprocessing.Queue()
+    objetivo = _insertar_casos_legado if legado else _insertar_casos
+    workers = [multiprocessing.Process(target=objetivo, args=(db_path, casos, resultados))
+               for _ in range(procesos)]
+
+    inicio = time.perf_counter()
+    for w in workers:
+        w.start()
+    errores = sum(resultados.get() for _ in workers)
+    for w in workers:
+        w.join()
+    duracion = time.perf_counter() - inicio
+
+    conn = sqlite3.connect(db_path)
+    total, distintos = conn.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT numero_expediente) FROM casos"
+    ).fetchone()
+    numeros = sorted(int(n.rsplit('-', 1)[1]) for (n,) in
+                     conn.execute("SELECT numero_expediente FROM casos"))
+    conn.close()
+    shutil.rmtree(directorio, ignore_errors=True)
+
+    esperados = procesos * casos
+    sin_huecos = numeros == list(range(1, total + 1))
+
+    print("=" * 70)
+    print(f"Asignador: {'COUNT(*) + 1 (legado)' if legado else 'contadores_expediente'}")
+    print("=" * 70)
+    print(f"Procesos:            {procesos}")
+    print(f"Casos intentados:    {esperados}")
+    print(f"Casos insertados:    {total}")
+    print(f"Errores (UNIQUE/BUSY): {errores}")
+    print(f"Expedientes únicos:  {distintos}")
+    print(f"Numeración continua: {'sí' if sin_huecos else 'no'}")
+    print(f"Duración:            {duracion:.2f} s")
+    print(f"Inserciones/seg:     {total / duracion:,.0f}")
+
+    return errores == 0 and total == esperados == distintos and sin_huecos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--procesos', type=int, default=8, help='procesos concurrentes')
+    parser.add_argument('--casos', type=int, default=250, help='casos por proceso')
+    parser.add_argument('--legado', action='store_true',
+                        help='usar la numeración anterior basada en COUNT(*) para comparar')
+    args = parser.parse_args()
+
+    ok = ejecutar(args.procesos, args.casos, args.legado)
+    print("\nRESULTADO:", "OK - sin duplicados" if ok else "FALLO")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
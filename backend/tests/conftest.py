@@ -0,0 +1,32 @@
+"""
+Fixtures compartidas: cada prueba trabaja sobre una base nueva, creada como
+la crea init_db.py (migraciones y registro de plantillas).
+
+Ejecutar desde backend/: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conexion import obtener_gestor  # noqa: E402
+from migraciones import MigradorEsquema  # noqa: E402
+from plantillas import obtener_plantillas  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Ruta de una base migrada con los datos iniciales"""
+    ruta = str(tmp_path / 'justicia.db')
+    MigradorEsquema(ruta).migrar(verbose=False)
+    obtener_plantillas(ruta).sincronizar()
+    yield ruta
+    obtener_gestor(ruta).cerrar()
+
+
+@pytest.fixture
+def db(db_path):
+    """Gestor de conexiones de la base de prueba"""
+    return obtener_gestor(db_path)
@@ -0,0 +1,64 @@
+import pytest
+
+from analisis import CasoAnalizado, normalizar_texto, terminos_significativos
+from clasificador import ClasificadorCasos
+from motor_decision import MotorDecision
+from palabras_clave import BuscadorPalabras
+
+
+@pytest.mark.parametrize('texto,esperado', [
+    ('Pagaré', 'pagare'),
+    ('PAGARÉ', 'pagare'),
+    ('pagare', 'pagare'),
+    ('Daños y Perjuicios', 'danos y perjuicios'),
+    ('Cigüeña', 'ciguena'),
+    ('', ''),
+])
+def test_normalizar_texto_sin_tildes_ni_mayusculas(texto, esperado):
+    assert normalizar_texto(texto) == esperado
+
+
+def test_terminos_significativos():
+    assert terminos_significativos('El demandado firmó el Pagaré 1234 para la compra') == ['firmo', 'pagare', 'compra']
+
+
+def test_contiene_sin_importar_tildes():
+    analizado = CasoAnalizado({'pruebas': 'Copia del PAGARE firmado', 'descripcion_hechos': None},
+                              BuscadorPalabras(['pagare']))
+
+    assert analizado.coincidencias == {'descripcion_hechos': set(), 'pruebas': {'pagare'}}
+    assert analizado.contiene('pruebas', 'pagaré')
+    assert analizado.contiene('pruebas', 'Firmado')  # fuera del buscador: recorre el texto
+    assert not analizado.contiene('descripcion_hechos', 'pagaré')
+    assert analizado.tokens('pruebas') == {'copia', 'del', 'pagare', 'firmado'}
+
+
+@pytest.fixture
+def contar_busquedas(monkeypatch):
+    """Textos recorridos por BuscadorPalabras.buscar"""
+    textos = []
+    buscar = BuscadorPalabras.buscar
+
+    def contando(self, texto):
+        textos.append(texto)
+        return buscar(self, texto)
+
+    monkeypatch.setattr(BuscadorPalabras, 'buscar', contando)
+    return textos
+
+
+def test_clasificador_y_motor_comparten_el_analisis(db_path, contar_busquedas):
+    clasificador = ClasificadorCasos(db_path, max_cache=0)
+    motor = MotorDecision(db_path, busqueda_precedentes='recientes')
+    caso = {'tipo_caso': 'cobro_suma_dinero', 'monto_reclamado': 100000,
+            'descripcion_hechos': 'Préstamo impago', 'pruebas': 'PAGARE firmado'}
+
+    analizado = clasificador.analizar(caso)
+    assert len(contar_busquedas) == 2  # un recorrido por campo de texto
+    clasificacion = clasificador.clasificar_caso(analizado)
+    decision = motor.decidir_caso(analizado, clasificacion.nivel)
+
+    assert len(contar_busquedas) == 2
+    assert clasificacion.nivel == 1
+    assert decision['resultado'] == 'acoge'
+    assert decision['monto_otorgado'] == pytest.approx(115000)
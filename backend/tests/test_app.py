@@ -0,0 +1,282 @@
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+from conexion import obtener_gestor
+from migraciones import MigradorEsquema
+from plantillas import obtener_plantillas
+
+CASO = {
+    'tipo_caso': 'cobro_suma_dinero',
+    'actor_id': 4,
+    'demandado_nombre': 'Deudor S.A.',
+    'monto_reclamado': 200000,
+    'descripcion_hechos': 'Préstamo documentado en pagaré',
+    'pruebas': 'pagaré firmado',
+}
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """Módulo app apuntando a una base nueva (la usan todas las pruebas del archivo)"""
+    ruta = str(tmp_path_factory.mktemp('app') / 'justicia.db')
+    MigradorEsquema(ruta).migrar(verbose=False)
+    obtener_plantillas(ruta).sincronizar()
+
+    os.environ['JUSTICIA_DB'] = ruta
+    try:
+        modulo = importlib.reload(sys.modules['app']) if 'app' in sys.modules else importlib.import_module('app')
+    finally:
+        del os.environ['JUSTICIA_DB']
+    yield modulo
+    obtener_gestor(ruta).cerrar()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.app.test_client()
+
+
+def crear_casos(cliente, cantidad, **campos):
+    respuesta = cliente.post('/api/casos/lote', json=[dict(CASO, **campos)] * cantidad)
+    assert respuesta.status_code == 201
+    return [r['caso_id'] for r in respuesta.get_json()['resultados']]
+
+
+def decisiones_por_caso(app, ids):
+    with app.db.conexion() as conn:
+        filas = conn.execute(f"""
+            SELECT caso_id, COUNT(*) AS total FROM decisiones
+            WHERE caso_id IN ({', '.join('?' * len(ids))}) GROUP BY caso_id
+        """, ids).fetchall()
+    return {fila['caso_id']: fila['total'] for fila in filas}
+
+
+def test_lote_falla_parcial(app, cliente):
+    lote = [
+        CASO,
+        {k: v for k, v in CASO.items() if k != 'demandado_nombre'},
+        dict(CASO, tipo_caso='sucesion'),
+        dict(CASO, monto_reclamado='mucho'),
+        dict(CASO, monto_reclamado=150000),
+    ]
+    respuesta = cliente.post('/api/casos/lote', json=lote)
+
+    assert respuesta.status_code == 201
+    cuerpo = respuesta.get_json()
+    assert (cuerpo['creados'], cuerpo['rechazados']) == (2, 3)
+    resultados = cuerpo['resultados']
+    assert [r['indice'] for r in resultados] == list(range(5))
+    assert [r['success'] for r in resultados] == [True, False, False, False, True]
+    assert 'demandado_nombre' in resultados[1]['error']
+    assert 'sucesion' in resultados[2]['error']
+
+    creados = [resultados[0], resultados[4]]
+    assert creados[0]['numero_expediente'] != creados[1]['numero_expediente']
+    with app.db.conexion() as conn:
+        for resultado in creados:
+            caso = conn.execute("SELECT * FROM casos WHERE id = ?", (resultado['caso_id'],)).fetchone()
+            assert caso['numero_expediente'] == resultado['numero_expediente']
+            assert caso['nivel_clasificacion'] == resultado['nivel']
+            assert conn.execute("""
+                SELECT COUNT(*) FROM auditoria WHERE caso_id = ? AND tipo_evento = 'clasificacion'
+            """, (resultado['caso_id'],)).fetchone()[0] == 1
+
+
+def test_justificacion_solo_si_se_pide(app, cliente):
+    respuesta = cliente.post('/api/casos', json=CASO)
+    assert respuesta.status_code == 201
+    datos = respuesta.get_json()
+    assert 'justificacion' not in datos
+    assert datos['factores'] and all(isinstance(factor, str) for factor in datos['factores'])
+
+    datos = cliente.post('/api/casos?justificacion=1', json=CASO).get_json()
+    clasificacion = app.clasificador.clasificar_caso(CASO)
+    assert (datos['nivel'], datos['puntos'], datos['factores']) == (
+        clasificacion.nivel, clasificacion.puntos, list(clasificacion.factores))
+    assert datos['justificacion'] == app.clasificador.justificacion(clasificacion)
+
+
+def test_lote_ndjson_con_linea_invalida(cliente):
+    cuerpo = '\n'.join([json.dumps(CASO), '{no es json', '', json.dumps(CASO)])
+    respuesta = cliente.post('/api/casos/lote', data=cuerpo, content_type='application/x-ndjson')
+
+    assert respuesta.status_code == 201
+    resultados = respuesta.get_json()['resultados']
+    assert [r['success'] for r in resultados] == [True, False, True]
+    assert resultados[1]['error'].startswith('JSON inválido')
+
+
+def test_lote_campos_de_texto_invalidos(cliente):
+    lote = [dict(CASO, descripcion_hechos=['lista']), dict(CASO, pruebas=7), CASO]
+    respuesta = cliente.post('/api/casos/lote', json=lote)
+
+    assert respuesta.status_code == 201
+    resultados = respuesta.get_json()['resultados']
+    assert [r['success'] for r in resultados] == [False, False, True]
+    assert 'descripcion_hechos' in resultados[0]['error']
+    assert 'pruebas' in resultados[1]['error']
+
+
+def test_lote_maximo(app, cliente):
+    respuesta = cliente.post('/api/casos/lote', json=[CASO] * app.MAX_CASOS_LOTE)
+
+    assert respuesta.status_code == 201
+    resultados = respuesta.get_json()['resultados']
+    assert len({r['caso_id'] for r in resultados}) == app.MAX_CASOS_LOTE
+    with app.db.conexion() as conn:
+        ids = [r['caso_id'] for r in resultados]
+        assert [conn.execute("SELECT numero_expediente FROM casos WHERE id = ?", (caso_id,)).fetchone()[0]
+                for caso_id in ids] == [r['numero_expediente'] for r in resultados]
+
+
+def test_lote_sin_validos_no_crea(cliente):
+    respuesta = cliente.post('/api/casos/lote', json=[{'tipo_caso': 'cobro_suma_dinero'}])
+
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['creados'] == 0
+
+
+def test_paginacion_por_cursor_estable(app, cliente):
+    # El lote comparte fecha_ingreso: el orden lo desempata el id
+    esperados = crear_casos(cliente, 7, demandado_nombre='Paginado')[::-1]
+
+    vistos, cursor = [], None
+    for pagina in range(10):
+        url = '/api/casos?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        cuerpo = cliente.get(url).get_json()
+        vistos += [c['id'] for c in cuerpo['casos'] if c['demandado_nombre'] == 'Paginado']
+        if pagina == 0:
+            # Un caso nuevo entre páginas no desplaza las siguientes
+            crear_casos(cliente, 1, demandado_nombre='Paginado')
+        cursor = cuerpo['next_cursor']
+        if not cursor:
+            break
+
+    assert vistos == esperados
+
+
+def test_paginacion_cursor_invalido(cliente):
+    assert cliente.get('/api/casos?cursor=basura').status_code == 400
+
+
+@pytest.mark.parametrize('url,tabla,alta', [
+    ('/api/articulos', 'articulos_legales', """
+        INSERT INTO articulos_legales (codigo, numero_articulo, texto, categoria)
+        VALUES ('CCyC', '9999', 'Artículo de prueba', 'prueba')
+    """),
+    ('/api/precedentes?tipo_caso=cobro_suma_dinero', 'casos_precedentes', """
+        INSERT INTO casos_precedentes (titulo, tribunal, fecha_sentencia, tipo_caso, hechos_resumidos,
+                                       decision, principios_aplicados)
+        VALUES ('Prueba c/ Prueba', 'Juzgado de prueba', '2024-01-01', 'cobro_suma_dinero',
+                'Hechos de prueba', 'Se acoge la demanda', 'Principios de prueba')
+    """),
+], ids=['articulos', 'precedentes'])
+def test_etag_y_304(app, cliente, url, tabla, alta):
+    primera = cliente.get(url)
+    assert primera.status_code == 200
+    etag = primera.headers['ETag']
+    assert tabla in etag
+
+    repetida = cliente.get(url, headers={'If-None-Match': etag})
+    assert repetida.status_code == 304
+    assert repetida.headers['ETag'] == etag
+    assert repetida.data == b''
+
+    with app.db.transaccion(inmediata=True) as conn:
+        conn.execute(alta)
+
+    cambiada = cliente.get(url, headers={'If-None-Match': etag})
+    assert cambiada.status_code == 200
+    assert cambiada.headers['ETag'] != etag
+    assert cambiada.get_json() != primera.get_json()
+
+
+def test_decidir_dos_veces_devuelve_la_existente(app, cliente):
+    caso_id = crear_casos(cliente, 1)[0]
+
+    primera = cliente.post(f'/api/casos/{caso_id}/decidir')
+    segunda = cliente.post(f'/api/casos/{caso_id}/decidir')
+
+    assert primera.status_code == 201
+    assert segunda.status_code == 200
+    assert segunda.get_json()['existente'] is True
+    assert segunda.get_json()['decision_id'] == primera.get_json()['decision_id']
+    assert decisiones_por_caso(app, [caso_id]) == {caso_id: 1}
+
+
+def test_barrido_idempotente(app, cliente):
+    ids = crear_casos(cliente, 5, demandado_nombre='Barrido')
+    # Uno ya decidido por la API: el barrido lo omite
+    assert cliente.post(f'/api/casos/{ids[0]}/decidir').status_code == 201
+
+    primera = cliente.post('/api/sistema/barrido-nivel-1?async=0&bloque=2').get_json()
+    segunda = cliente.post('/api/sistema/barrido-nivel-1?async=0&bloque=2').get_json()
+
+    assert primera['completo'] and segunda['completo']
+    assert primera['resueltos'] >= 4
+    assert segunda['resueltos'] == 0 and segunda['procesados'] == 0
+    assert decisiones_por_caso(app, ids) == {caso_id: 1 for caso_id in ids}
+    with app.db.conexion() as conn:
+        estados = {row['estado'] for row in conn.execute(
+            f"SELECT estado FROM casos WHERE id IN ({', '.join('?' * len(ids))})", ids
+        )}
+        # La auditoría referencia la decisión de su propio caso
+        assert conn.execute(f"""
+            SELECT COUNT(*) FROM auditoria a JOIN decisiones d ON d.id = a.decision_id
+            WHERE a.tipo_evento = 'decision_generada' AND a.caso_id IN ({', '.join('?' * len(ids))})
+              AND d.caso_id = a.caso_id
+        """, ids).fetchone()[0] == len(ids)
+    assert estados == {'resuelto'}
+
+
+def test_barrido_sincronico_acotado(app, cliente, monkeypatch):
+    crear_casos(cliente, 5, demandado_nombre='Acotado')
+    monkeypatch.setattr(app, 'MAX_CASOS_TRAMO_BARRIDO', 4)
+
+    parcial = cliente.post('/api/sistema/barrido-nivel-1?async=0&bloque=2').get_json()
+    assert (parcial['bloques'], parcial['resueltos'], parcial['completo']) == (2, 4, False)
+
+    resto = cliente.post(f"/api/sistema/barrido-nivel-1?async=0&bloque=2&desde_id={parcial['ultimo_id']}").get_json()
+    assert resto['completo']
+    assert resto['resueltos'] == 1
+
+
+def test_barrido_por_defecto_se_encola(app, cliente):
+    respuesta = cliente.post('/api/sistema/barrido-nivel-1')
+
+    assert respuesta.status_code == 202
+    trabajo = app.cola_trabajos.obtener(respuesta.get_json()['job_id'])
+    assert (trabajo['tipo'], trabajo['estado']) == ('barrido_nivel_1', 'pendiente')
+
+
+def ejecutar_trabajos(app):
+    """Toma y ejecuta los trabajos pendientes como lo haría un hilo de la cola"""
+    while (trabajo := app.cola_trabajos._tomar('prueba')) is not None:
+        app.cola_trabajos._ejecutar(trabajo, 'prueba')
+
+
+def test_barrido_encolado_por_tramos_encadenados(app, cliente, monkeypatch):
+    ejecutar_trabajos(app)
+    ids = crear_casos(cliente, 5, demandado_nombre='Tramos')
+    monkeypatch.setattr(app, 'MAX_CASOS_TRAMO_BARRIDO', 2)
+
+    trabajo_id = cliente.post('/api/sistema/barrido-nivel-1?bloque=1').get_json()['job_id']
+    ejecutar_trabajos(app)
+
+    cadena = [app.cola_trabajos.obtener(trabajo_id)]
+    while 'siguiente_job_id' in cadena[-1]['resultado']:
+        siguiente = app.cola_trabajos.obtener(cadena[-1]['resultado']['siguiente_job_id'])
+        assert siguiente['parametros'] == {'bloque': 1, 'desde_id': cadena[-1]['resultado']['ultimo_id']}
+        cadena.append(siguiente)
+
+    # Cada trabajo resuelve a lo sumo un tramo, lejos del plazo de la cola
+    assert len(cadena) >= 3
+    assert all(t['estado'] == 'completado' and t['intentos'] == 1 for t in cadena)
+    assert all(t['resultado']['procesados'] <= 2 for t in cadena)
+    assert [t['resultado']['completo'] for t in cadena] == [False] * (len(cadena) - 1) + [True]
+    assert sum(t['resultado']['resueltos'] for t in cadena) >= len(ids)
+    assert decisiones_por_caso(app, ids) == {caso_id: 1 for caso_id in ids}
@@ -0,0 +1,75 @@
+import pytest
+
+from benchmarks.clasificador import comparar, ejecutar, medir
+from benchmarks.generador import PALABRAS_DESCRIPCION, PALABRAS_PRUEBAS, VOCABULARIO, GeneradorCasos
+
+
+def test_generador_reproducible_por_semilla():
+    assert GeneradorCasos(semilla=3).casos(20) == GeneradorCasos(semilla=3).casos(20)
+    assert GeneradorCasos(semilla=3).casos(20) != GeneradorCasos(semilla=4).casos(20)
+
+
+def test_largo_de_los_textos():
+    # Se corta al llegar al largo pedido: a lo sumo un fragmento de más
+    fragmento_max = max(len(p) for p in VOCABULARIO + PALABRAS_DESCRIPCION + PALABRAS_PRUEBAS)
+    for caso in GeneradorCasos(largo_descripcion=2000, largo_pruebas=50).casos(50):
+        assert 2000 - 1 <= len(caso['descripcion_hechos']) < 2000 + fragmento_max
+        assert 50 - 1 <= len(caso['pruebas']) < 50 + fragmento_max
+
+
+def test_densidad_de_palabras_clave():
+    sin_palabras = GeneradorCasos(densidad=0).casos(30)
+    assert not any(p in c['pruebas'] for c in sin_palabras for p in PALABRAS_PRUEBAS)
+
+    solo_palabras = GeneradorCasos(densidad=1, palabras_pruebas=['pagaré']).casos(30)
+    assert all(set(c['pruebas'].split()) == {'pagaré'} for c in solo_palabras)
+
+
+def test_mezcla_de_tipos_y_banderas():
+    casos = GeneradorCasos(tipos={'a': 3, 'b': 1}, prob_sin_contestacion=0,
+                           prob_constitucional=1).casos(2000)
+    proporcion_a = sum(c['tipo_caso'] == 'a' for c in casos) / len(casos)
+
+    assert {c['tipo_caso'] for c in casos} == {'a', 'b'}
+    assert proporcion_a == pytest.approx(0.75, abs=0.05)
+    assert all(c['tiene_contestacion'] and c['plantea_cuestion_constitucional'] for c in casos)
+
+
+def test_masivos_repiten_textos_modelo():
+    casos = GeneradorCasos().masivos(200, modelos=5)
+
+    assert len(casos) == 200
+    assert len({(c['descripcion_hechos'], c['pruebas']) for c in casos}) <= 5
+    assert len({c['demandado_nombre'] for c in casos}) == 200
+    assert {c['tipo_caso'] for c in casos} == {'cobro_suma_dinero'}
+
+
+def test_medir():
+    llamadas = []
+    resultado = medir(lambda: llamadas.append([0] * 10), cantidad=10, repeticiones=3)
+
+    assert len(llamadas) == 4  # las repeticiones más la corrida con tracemalloc
+    assert set(resultado) == {'ops_s', 'kb_pico', 'bloques_por_op'}
+    assert resultado['ops_s'] > 0
+
+
+def test_ejecutar_mide_todas_las_operaciones(db_path):
+    generador = GeneradorCasos()
+    resultados = ejecutar(generador.casos(20), generador.masivos(20, 3), db_path, repeticiones=1)
+
+    assert set(resultados) == {'clasificar_caso', 'justificacion', 'clasificar_lote',
+                               'clasificar_caso_masivo', 'clasificar_lote_masivo'}
+    assert all(r['ops_s'] > 0 for r in resultados.values())
+
+
+def test_comparar_detecta_regresiones(capsys):
+    base = {'resultados': {'op': {'ops_s': 1000, 'kb_pico': 1, 'bloques_por_op': 1}}}
+
+    def resultado(ops_s):
+        return {'op': {'ops_s': ops_s, 'kb_pico': 1, 'bloques_por_op': 1}}
+
+    assert not comparar(resultado(900), base, umbral=15)
+    assert comparar(resultado(800), base, umbral=15)
+    assert 'REGRESIÓN' in capsys.readouterr().out
+    # Sin línea base para la operación: se informa sin comparar
+    assert not comparar(resultado(1), {}, umbral=15)
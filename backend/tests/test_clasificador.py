@@ -0,0 +1,164 @@
+import pytest
+
+import clasificador as modulo
+from clasificador import ClasificadorCasos
+from reglas import ProgramaReglas
+
+TEXTOS = [
+    ('Préstamo documentado en pagaré impago', 'pagaré firmado'),
+    ('Accidente de tránsito con lesiones graves y daño moral', 'fotos, testigos'),
+    ('Incumplimiento de contrato de locación, el demandado admite la deuda', 'contrato firmado'),
+    ('Planteo de inconstitucionalidad de la ley de emergencia', ''),
+    ('', ''),
+]
+
+
+def casos():
+    """Combinaciones de tipo, monto, textos y banderas (incluye bordes de monto)"""
+    resultado = []
+    for i, (hechos, pruebas) in enumerate(TEXTOS):
+        for tipo in ('cobro_suma_dinero', 'daños_perjuicios', 'incumplimiento_contractual'):
+            for monto in (0, 299999.99, 300000, 500000, 2500000, 10**8):
+                resultado.append({
+                    'tipo_caso': tipo,
+                    'monto_reclamado': monto,
+                    'descripcion_hechos': hechos,
+                    'pruebas': pruebas,
+                    'tiene_contestacion': bool(i % 2),
+                    'plantea_cuestion_constitucional': i == 3,
+                })
+    return resultado
+
+
+@pytest.mark.parametrize('sin_numpy', [False, True], ids=['numpy', 'escalar'])
+def test_lote_igual_a_escalar(db_path, monkeypatch, sin_numpy):
+    if sin_numpy:
+        monkeypatch.setattr(modulo, 'np', None)
+    elif modulo.np is None:
+        pytest.skip('NumPy no instalado')
+    clasificador = ClasificadorCasos(db_path, max_cache=0)
+    lote = casos()
+
+    esperado = [clasificador.clasificar_caso(caso) for caso in lote]
+
+    assert clasificador.clasificar_lote(lote) == esperado
+    assert clasificador.clasificar_lote([clasificador.analizar(caso) for caso in lote]) == esperado
+    assert len({c.nivel for c in esperado}) > 1
+
+
+def test_lote_vacio_y_unitario(db_path):
+    clasificador = ClasificadorCasos(db_path, max_cache=0)
+    caso = casos()[0]
+
+    assert clasificador.clasificar_lote([]) == []
+    assert clasificador.clasificar_lote([caso]) == [clasificador.clasificar_caso(caso)]
+
+
+@pytest.fixture
+def contar_analisis(monkeypatch):
+    """Cuenta los casos que pasan por ProgramaReglas.analizar"""
+    llamadas = []
+    analizar = ProgramaReglas.analizar
+
+    def contando(self, caso):
+        llamadas.append(caso)
+        return analizar(self, caso)
+
+    monkeypatch.setattr(ProgramaReglas, 'analizar', contando)
+    return llamadas
+
+
+def test_cache_da_el_mismo_resultado_que_sin_cache(db_path):
+    sin_cache = ClasificadorCasos(db_path, max_cache=0)
+    con_cache = ClasificadorCasos(db_path)
+    lote = casos()
+    esperado = [sin_cache.clasificar_caso(caso) for caso in lote]
+
+    # Dos pasadas: la segunda sale de la caché
+    assert [con_cache.clasificar_caso(caso) for caso in lote] == esperado
+    assert [con_cache.clasificar_caso(caso) for caso in lote] == esperado
+    assert con_cache.clasificar_lote(lote + lote[::-1]) == esperado + esperado[::-1]
+    assert ClasificadorCasos(db_path).clasificar_lote(lote + lote) == esperado + esperado
+    assert con_cache.cache.estadisticas()['aciertos'] >= 3 * len(lote)
+
+
+def test_cache_evita_analizar_casos_del_mismo_modelo(db_path, contar_analisis):
+    clasificador = ClasificadorCasos(db_path)
+    modelo = casos()[0]
+    # Otro demandado y otro monto del mismo tramo (menor a 300.000)
+    parecido = dict(modelo, demandado_nombre='Otro deudor', monto_reclamado=120000)
+    otro_tramo = dict(modelo, monto_reclamado=300000)
+
+    primera = clasificador.clasificar_caso(modelo)
+    assert clasificador.clasificar_caso(parecido) == primera
+    assert len(contar_analisis) == 1
+
+    assert clasificador.clasificar_caso(otro_tramo) != primera
+    assert len(contar_analisis) == 2
+    estadisticas = clasificador.cache.estadisticas()
+    assert (estadisticas['aciertos'], estadisticas['fallos'], estadisticas['entradas']) == (1, 2, 2)
+
+
+def test_lote_analiza_una_vez_por_huella(db_path, contar_analisis):
+    # Tres textos modelo distintos, cada caso con su demandado
+    modelos = casos()[::18][:3]
+    lote = [dict(modelos[i % 3], demandado_nombre=f'Deudor {i}') for i in range(30)]
+    esperado = [ClasificadorCasos(db_path, max_cache=0).clasificar_caso(caso) for caso in lote]
+    contar_analisis.clear()
+    clasificador = ClasificadorCasos(db_path)
+
+    assert clasificador.clasificar_lote(lote) == esperado
+    assert len(contar_analisis) == 3
+    assert clasificador.clasificar_lote(lote) == esperado
+    assert len(contar_analisis) == 3
+
+
+def test_cache_se_invalida_al_cambiar_las_reglas(db, db_path):
+    clasificador = ClasificadorCasos(db_path)
+    caso = casos()[0]
+    antes = clasificador.clasificar_caso(caso)
+    assert 'prueba_clara' in antes.factores
+
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("UPDATE criterios_clasificacion SET peso = peso + 10 WHERE factor = 'prueba_clara'")
+
+    despues = clasificador.clasificar_caso(caso)
+    assert despues.puntos == antes.puntos + 10
+    estadisticas = clasificador.cache.estadisticas()
+    assert estadisticas['invalidaciones'] == 1
+    assert estadisticas['version_reglas'] == clasificador.programa.version
+    assert estadisticas['entradas'] == 1
+
+
+def test_cache_lru_acotada(db_path):
+    clasificador = ClasificadorCasos(db_path, max_cache=2)
+    modelo = casos()[0]
+    for texto in ('uno', 'dos', 'tres'):
+        clasificador.clasificar_caso(dict(modelo, descripcion_hechos=texto))
+
+    assert clasificador.cache.estadisticas()['entradas'] == 2
+    clasificador.clasificar_caso(dict(modelo, descripcion_hechos='uno'))
+    assert clasificador.cache.estadisticas()['aciertos'] == 0
+
+
+def test_justificacion_por_nivel_con_factores_en_orden(db_path):
+    clasificador = ClasificadorCasos(db_path)
+    clasificacion = clasificador.clasificar_caso(casos()[0])
+    etiquetas = clasificador.programa.etiquetas
+
+    texto = clasificador.justificacion(clasificacion)
+
+    assert texto.startswith(modulo.ENCABEZADO_NIVEL[clasificacion.nivel])
+    assert texto.endswith(modulo.CONCLUSION_NIVEL[clasificacion.nivel])
+    assert f"Puntaje de clasificación: {clasificacion.puntos}\n" in texto
+    lineas = [f"{i}. {etiquetas[factor]}" for i, factor in enumerate(clasificacion.factores, 1)]
+    assert len(lineas) > 1
+    assert [linea for linea in texto.splitlines() if linea[:1].isdigit()] == lineas
+
+
+def test_justificacion_de_cada_nivel_y_factor_desconocido(db_path):
+    clasificador = ClasificadorCasos(db_path)
+    for nivel in (1, 2, 3, 4):
+        texto = clasificador.justificacion(modulo.Clasificacion(nivel, 0.5, -3, ('retirado',)))
+        assert texto == (modulo.ENCABEZADO_NIVEL[nivel] + "Puntaje de clasificación: -3\n\nFactores considerados:\n"
+                         + "1. retirado\n" + modulo.CONCLUSION_NIVEL[nivel])
@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+
+import pytest
+
+from conexion import GestorConexiones, obtener_gestor
+
+
+@pytest.fixture
+def gestor(tmp_path):
+    gestor = GestorConexiones(str(tmp_path / 'prueba.db'))
+    with gestor.transaccion() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    yield gestor
+    gestor.cerrar()
+
+
+def contar(gestor):
+    with gestor.conexion() as conn:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+def en_hilo(funcion):
+    resultado = []
+    hilo = threading.Thread(target=lambda: resultado.append(funcion()))
+    hilo.start()
+    hilo.join()
+    return resultado[0]
+
+
+def test_pragmas_de_la_conexion(gestor):
+    with gestor.conexion() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -16384
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_una_conexion_por_hilo(gestor):
+    with gestor.conexion() as primera, gestor.conexion() as segunda:
+        assert primera is segunda
+
+    def conexion_del_hilo():
+        with gestor.conexion() as conn:
+            return id(conn)
+
+    assert en_hilo(conexion_del_hilo) != id(primera)
+    # Al abrir otra, las de hilos terminados se cierran
+    en_hilo(conexion_del_hilo)
+    estadisticas = gestor.estadisticas()
+    assert estadisticas['conexiones_creadas'] == 3
+    assert estadisticas['conexiones_abiertas'] == 2
+
+
+def test_transaccion_confirma_o_revierte(gestor):
+    with gestor.transaccion(inmediata=True) as conn:
+        conn.execute("INSERT INTO t VALUES (1)")
+    assert contar(gestor) == 1
+
+    with pytest.raises(ValueError):
+        with gestor.transaccion(inmediata=True) as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+            raise ValueError('falla')
+    assert contar(gestor) == 1
+    assert gestor.estadisticas()['rollbacks'] == 1
+
+
+def test_transaccion_anidada_se_une_a_la_exterior(gestor):
+    with pytest.raises(ValueError):
+        with gestor.transaccion(inmediata=True) as exterior:
+            exterior.execute("INSERT INTO t VALUES (1)")
+            with gestor.transaccion() as interior:
+                assert interior is exterior
+                interior.execute("INSERT INTO t VALUES (2)")
+            assert exterior.in_transaction
+            raise ValueError('falla después de la interior')
+    assert contar(gestor) == 0
+
+
+def test_conexion_revierte_transacciones_abiertas(gestor):
+    with gestor.conexion() as conn:
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO t VALUES (1)")
+    assert not conn.in_transaction
+    assert contar(gestor) == 0
+
+
+def test_espera_y_error_por_bloqueo(tmp_path, gestor):
+    tomado, liberar = threading.Event(), threading.Event()
+
+    def escritor():
+        with gestor.transaccion(inmediata=True):
+            tomado.set()
+            liberar.wait(5)
+
+    hilo = threading.Thread(target=escritor)
+    hilo.start()
+    tomado.wait(5)
+
+    impaciente = GestorConexiones(gestor.db_path, busy_timeout_ms=50)
+    with pytest.raises(sqlite3.OperationalError):
+        with impaciente.transaccion(inmediata=True):
+            pass
+    assert impaciente.estadisticas()['errores_bloqueo'] == 1
+
+    threading.Timer(0.2, liberar.set).start()
+    with gestor.transaccion(inmediata=True) as conn:
+        conn.execute("INSERT INTO t VALUES (1)")
+    hilo.join()
+    impaciente.cerrar()
+
+    estadisticas = gestor.estadisticas()
+    assert estadisticas['esperas_bloqueo'] >= 2
+    assert estadisticas['espera_bloqueo_max_ms'] >= 100
+
+
+def test_obtener_gestor_compartido_por_ruta(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    gestor = obtener_gestor('compartida.db')
+    try:
+        assert obtener_gestor(str(tmp_path / 'compartida.db')) is gestor
+        assert obtener_gestor('otra.db') is not gestor
+    finally:
+        gestor.cerrar()
+        obtener_gestor('otra.db').cerrar()
@@ -0,0 +1,48 @@
+import itertools
+
+from estadisticas import EstadisticasCasos
+
+expedientes = itertools.count(1)
+
+
+def insertar_caso(conn, nivel, estado):
+    return conn.execute("""
+        INSERT INTO casos (numero_expediente, tipo_caso, actor_id, demandado_nombre,
+                           monto_reclamado, descripcion_hechos, nivel_clasificacion, estado)
+        VALUES (?, 'cobro_suma_dinero', 4, 'X', 1000, 'Hechos', ?, ?)
+    """, (f'PRUEBA-{next(expedientes)}', nivel, estado)).lastrowid
+
+
+def test_triggers_sin_desvios(db, db_path):
+    estadisticas = EstadisticasCasos(db_path)
+    with db.transaccion(inmediata=True) as conn:
+        ids = [insertar_caso(conn, nivel, 'clasificado') for nivel in (1, 1, 2, 3, None)]
+        conn.execute("UPDATE casos SET estado = 'resuelto' WHERE id = ?", (ids[0],))
+        conn.execute("UPDATE casos SET nivel_clasificacion = 4, estado = 'en_revision' WHERE id = ?", (ids[3],))
+        conn.execute("UPDATE casos SET nivel_clasificacion = 1 WHERE id = ?", (ids[4],))
+        # Sin cambio real: los triggers no deben contar dos veces
+        conn.execute("UPDATE casos SET estado = estado, nivel_clasificacion = nivel_clasificacion WHERE id = ?",
+                     (ids[1],))
+        conn.execute("DELETE FROM casos WHERE id = ?", (ids[2],))
+
+    assert estadisticas.reconciliar() == []
+    assert estadisticas.resumen() == estadisticas.recalcular()
+    resumen = estadisticas.resumen()
+    assert resumen['casos_por_nivel']['1'] >= 3
+    assert resumen['resueltos'] >= 1
+
+
+def test_reconciliar_detecta_y_corrige_desvios(db, db_path):
+    estadisticas = EstadisticasCasos(db_path)
+    with db.transaccion(inmediata=True) as conn:
+        insertar_caso(conn, 2, 'clasificado')
+        conn.execute("UPDATE estadisticas_casos SET total = total + 5 WHERE dimension = 'nivel' AND valor = '2'")
+
+    desvios = estadisticas.reconciliar()
+    assert [(d['dimension'], d['valor'], d['contador'] - d['real']) for d in desvios] == [('nivel', '2', 5)]
+    # Sin corregir no escribe
+    assert estadisticas.reconciliar() == desvios
+
+    assert estadisticas.reconciliar(corregir=True) == desvios
+    assert estadisticas.reconciliar() == []
+    assert estadisticas.resumen() == estadisticas.recalcular()
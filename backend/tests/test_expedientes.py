@@ -0,0 +1,51 @@
+import threading
+
+from expedientes import AsignadorExpedientes
+
+
+def test_reservar_sin_duplicados_entre_hilos(db_path):
+    asignador = AsignadorExpedientes(db_path)
+    numeros, errores = [], []
+    inicio = threading.Barrier(8)
+
+    def reservar(cantidad):
+        try:
+            inicio.wait()
+            for _ in range(20):
+                numeros.extend(asignador.reservar(cantidad, anio=2030))
+        except Exception as e:  # pragma: no cover - se informa abajo
+            errores.append(e)
+
+    hilos = [threading.Thread(target=reservar, args=(1 + i % 3,)) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    total = 20 * sum(1 + i % 3 for i in range(8))
+    assert len(numeros) == len(set(numeros)) == total
+    assert sorted(numeros) == [AsignadorExpedientes.formatear(2030, n) for n in range(1, total + 1)]
+
+
+def test_reservar_continua_desde_casos_existentes(db, db_path):
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("""
+            INSERT INTO casos (numero_expediente, tipo_caso, actor_id, demandado_nombre,
+                               monto_reclamado, descripcion_hechos, estado)
+            VALUES ('JUS-2031-00041', 'cobro_suma_dinero', 4, 'X', 1000, 'Hechos', 'ingresado')
+        """)
+
+    assert AsignadorExpedientes(db_path).reservar(2, anio=2031) == ['JUS-2031-00042', 'JUS-2031-00043']
+
+
+def test_reservar_se_deshace_con_la_transaccion(db, db_path):
+    asignador = AsignadorExpedientes(db_path)
+    try:
+        with db.transaccion(inmediata=True):
+            asignador.reservar(anio=2032)
+            raise RuntimeError('falla el INSERT del caso')
+    except RuntimeError:
+        pass
+
+    assert asignador.reservar(anio=2032) == ['JUS-2032-00001']
@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+
+import pytest
+
+from exportacion import Exportador, validar_fecha
+from motor_decision import MotorDecision
+from plantillas import columnas_decision
+
+FECHAS = ['2024-02-28 10:00:00', '2024-03-01 00:00:00', '2024-03-15 12:30:00',
+          '2024-03-31 23:59:59', '2024-04-01 00:00:00', '2024-05-10 09:00:00', '2024-06-01 08:00:00']
+
+
+@pytest.fixture
+def casos(db):
+    """Siete casos, uno por fecha de FECHAS, en orden de id"""
+    with db.transaccion(inmediata=True) as conn:
+        return [conn.execute("""
+            INSERT INTO casos (numero_expediente, tipo_caso, actor_id, demandado_nombre,
+                               monto_reclamado, descripcion_hechos, fecha_ingreso)
+            VALUES (?, 'cobro_suma_dinero', 4, ?, 1000, 'Hechos, con "comillas"', ?)
+        """, (f'EXP-{i}', f'Demandado {i}', fecha)).lastrowid for i, fecha in enumerate(FECHAS)]
+
+
+def test_ndjson_por_bloques_en_orden_de_id(db_path, casos):
+    fragmentos = list(Exportador(db_path, tamano_bloque=3).exportar('casos'))
+
+    assert len(fragmentos) == 3
+    filas = [json.loads(linea) for fragmento in fragmentos for linea in fragmento.splitlines()]
+    assert [f['id'] for f in filas] == casos
+    assert filas[0]['descripcion_hechos'] == 'Hechos, con "comillas"'
+
+
+def test_csv_con_encabezado(db_path, casos):
+    texto = ''.join(Exportador(db_path, tamano_bloque=2).exportar('casos', 'csv'))
+
+    filas = list(csv.reader(io.StringIO(texto)))
+    assert filas[0][:3] == ['id', 'numero_expediente', 'tipo_caso']
+    assert [int(f[0]) for f in filas[1:]] == casos
+    assert filas[1][filas[0].index('descripcion_hechos')] == 'Hechos, con "comillas"'
+
+
+def test_csv_vacio_solo_encabezado(db_path):
+    texto = ''.join(Exportador(db_path).exportar('auditoria', 'csv'))
+    assert len(list(csv.reader(io.StringIO(texto)))) == 1
+
+
+@pytest.mark.parametrize('desde,hasta,indices', [
+    ('2024-03-01', '2024-03-31', [1, 2, 3]),
+    ('2024-04-01', None, [4, 5, 6]),
+    (None, '2024-02-28', [0]),
+    ('2024-07-01', None, []),
+])
+def test_filtro_por_rango_de_fechas_inclusivo(db_path, casos, desde, hasta, indices):
+    texto = ''.join(Exportador(db_path, tamano_bloque=2).exportar('casos', 'ndjson', desde, hasta))
+    assert [json.loads(linea)['id'] for linea in texto.splitlines()] == [casos[i] for i in indices]
+
+
+def test_decisiones_con_fundamentacion_de_plantilla(db, db_path, casos):
+    decision = MotorDecision(db_path, busqueda_precedentes='recientes').decidir_caso({
+        'tipo_caso': 'cobro_suma_dinero', 'monto_reclamado': 1000,
+        'descripcion_hechos': 'Pagaré impago', 'pruebas': 'pagaré',
+    }, 1)
+    fundamentacion, plantilla_id, version, parametros = columnas_decision(decision)
+    assert not fundamentacion  # se guarda la plantilla, no el texto
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("""
+            INSERT INTO decisiones (caso_id, tipo_decision, resultado, fundamentacion,
+                                    plantilla_id, plantilla_version, parametros)
+            VALUES (?, 'automatica', 'acoge', ?, ?, ?, ?)
+        """, (casos[0], fundamentacion, plantilla_id, version, parametros))
+
+    fila = json.loads(''.join(Exportador(db_path).exportar('decisiones')))
+    assert fila['fundamentacion'] == decision['fundamentacion']
+
+
+def test_parametros_invalidos_fallan_antes_de_transmitir(db_path):
+    exportador = Exportador(db_path)
+    with pytest.raises(ValueError):
+        exportador.exportar('usuarios')
+    with pytest.raises(ValueError):
+        exportador.exportar('casos', 'xml')
+    with pytest.raises(ValueError):
+        validar_fecha('2024-02-30')
+    assert validar_fecha('') is None
+    assert validar_fecha('2024-02-29') == '2024-02-29'
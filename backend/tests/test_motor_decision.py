@@ -0,0 +1,93 @@
+import pytest
+
+from motor_decision import MotorDecision
+
+
+def agregar_precedente(db, tipo_caso, monto_reclamado, monto_otorgado, titulo='Precedente'):
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("""
+            INSERT INTO casos_precedentes (
+                titulo, tribunal, fecha_sentencia, hechos_resumidos, decision,
+                monto_aproximado, monto_reclamado, monto_otorgado, tipo_caso, principios_aplicados
+            ) VALUES (?, 'Juzgado', '2023-01-01', 'Hechos', 'Decisión', ?, ?, ?, ?, 'Principios')
+        """, (titulo, monto_otorgado, monto_reclamado, monto_otorgado, tipo_caso))
+
+
+@pytest.fixture
+def motor(db_path):
+    return MotorDecision(db_path, busqueda_precedentes='recientes')
+
+
+def test_sin_precedentes_del_tipo_usa_ajuste_conservador(motor):
+    assert motor._sugerir_monto('tipo_sin_precedentes', 100000.0) == (90000.0, [])
+
+
+def test_precedentes_sin_monto_otorgado_usan_ajuste_conservador(db, motor):
+    agregar_precedente(db, 'tipo_prueba', 100000.0, None)
+    assert motor._sugerir_monto('tipo_prueba', 100000.0) == (90000.0, [])
+
+
+def test_aplica_la_proporcion_otorgada_al_reclamo(db, motor):
+    # Un precedente con el mismo reclamo otorgó la mitad
+    agregar_precedente(db, 'tipo_prueba', 400000.0, 200000.0)
+    monto, referencias = motor._sugerir_monto('tipo_prueba', 100000.0)
+    assert monto == pytest.approx(50000.0)
+    assert [p['monto_otorgado'] for p in referencias] == [200000.0]
+
+
+def test_pondera_por_cercania_del_reclamo(db, motor):
+    agregar_precedente(db, 'tipo_prueba', 100000.0, 50000.0, 'Cercano')
+    agregar_precedente(db, 'tipo_prueba', 900000.0, 900000.0, 'Lejano')
+    monto, referencias = motor._sugerir_monto('tipo_prueba', 110000.0)
+    assert [p['titulo'] for p in referencias] == ['Cercano', 'Lejano']
+    assert 110000.0 * 0.5 < monto < 110000.0 * 0.6
+
+
+def test_no_supera_lo_reclamado(db, motor):
+    agregar_precedente(db, 'tipo_prueba', 100000.0, 150000.0)
+    monto, _ = motor._sugerir_monto('tipo_prueba', 100000.0)
+    assert monto == 100000.0
+
+
+def test_migracion_completa_montos_de_los_precedentes_cargados(db):
+    with db.conexion() as conn:
+        montos = {
+            f['titulo'].split(' ')[0]: (f['monto_reclamado'], f['monto_otorgado'])
+            for f in conn.execute("SELECT titulo, monto_reclamado, monto_otorgado FROM casos_precedentes")
+        }
+    # monto_aproximado es la condena: los parciales reclamaron más
+    assert montos['Rodríguez'] == (280000, 250000)
+    assert montos['Torres'] == (320000, 280000)
+    assert montos['García'] == (450000, 450000)
+    assert montos['Pérez'] == (200000, 200000)
+
+
+def test_precedente_parcial_baja_la_sugerencia(db, motor):
+    caso = {
+        'tipo_caso': 'daños_perjuicios',
+        'monto_reclamado': 300000,
+        'descripcion_hechos': 'Filtraciones desde la obra vecina dañaron el departamento',
+        'pruebas': 'pericia',
+    }
+    sugerido = motor.decidir_caso(caso, 2)['monto_otorgado']
+    assert sugerido < 300000
+    # Rodríguez (reclamo de $280.000, condena de $250.000) es el más cercano
+    assert sugerido == pytest.approx(300000 * 250 / 280, rel=0.02)
+
+    # Con un solo precedente acogido completo no se reduce
+    assert motor.decidir_caso(dict(caso, tipo_caso='cobro_suma_dinero', monto_reclamado=150000), 2)[
+        'monto_otorgado'] == 150000
+
+
+@pytest.mark.parametrize('pruebas', ['pagaré firmado', 'PAGARE firmado', 'Pagare'])
+def test_nivel_1_reconoce_el_pagare_sin_importar_tildes(motor, pruebas):
+    decision = motor.decidir_caso({'tipo_caso': 'cobro_suma_dinero', 'monto_reclamado': 1000,
+                                   'descripcion_hechos': 'Préstamo impago', 'pruebas': pruebas}, 1)
+    assert decision['resultado'] == 'acoge'
+    assert decision['plantilla']['id'] == 'nivel1_pagare'
+
+
+def test_nivel_1_sin_pagare_es_generico(motor):
+    decision = motor.decidir_caso({'tipo_caso': 'cobro_suma_dinero', 'monto_reclamado': 1000,
+                                   'descripcion_hechos': 'Préstamo impago', 'pruebas': 'recibos'}, 1)
+    assert decision['plantilla']['id'] == 'nivel1_generico'
@@ -0,0 +1,39 @@
+import random
+
+from palabras_clave import BuscadorPalabras
+
+
+def ingenuo(palabras, texto):
+    return {palabra for palabra in palabras if palabra and palabra in texto}
+
+
+def test_solapadas_contenidas_y_con_prefijo_comun():
+    palabras = ['sentencia', 'sentencia firme', 'tencia', 'firme', 'pericia', 'pericial', 'ab', 'bab']
+    buscador = BuscadorPalabras(palabras)
+
+    for texto in ('hay sentencia firme y pericial', 'sentencias', 'abab', 'peric', 'tencia', ''):
+        assert buscador.buscar(texto) == ingenuo(palabras, texto), texto
+
+
+def test_caracteres_especiales_de_regex():
+    palabras = ['a.b', '(x)', 'c++', 'art. 5*', '$100']
+    buscador = BuscadorPalabras(palabras)
+
+    assert buscador.buscar('ver art. 5* con (x) por $100') == {'art. 5*', '(x)', '$100'}
+    assert buscador.buscar('axb c+ ab') == set()
+
+
+def test_sin_palabras():
+    assert BuscadorPalabras([]).buscar('cualquier texto') == set()
+    assert BuscadorPalabras(['']).buscar('texto') == set()
+
+
+def test_igual_a_buscar_cada_palabra():
+    # Alfabeto chico: muchas palabras solapadas y contenidas unas en otras
+    rng = random.Random(7)
+    for _ in range(200):
+        palabras = {''.join(rng.choice('abc ') for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 30))}
+        buscador = BuscadorPalabras(palabras)
+        for _ in range(5):
+            texto = ''.join(rng.choice('abcd ') for _ in range(rng.randint(0, 60)))
+            assert buscador.buscar(texto) == ingenuo(palabras, texto)
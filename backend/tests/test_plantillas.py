@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from motor_decision import MotorDecision
+from plantillas import ConversorDecisiones, columnas_decision, obtener_plantillas
+
+CASO = {
+    'tipo_caso': 'daños_perjuicios',
+    'monto_reclamado': 400000,
+    'descripcion_hechos': 'Accidente de tránsito con daños en el vehículo',
+    'pruebas': 'fotos',
+    'tiene_contestacion': True,
+    'plantea_cuestion_constitucional': False,
+}
+
+
+@pytest.fixture
+def motor(db_path):
+    return MotorDecision(db_path, busqueda_precedentes='recientes')
+
+
+def guardar(db, decision, plantilla=True):
+    fundamentacion, plantilla_id, version, parametros = columnas_decision(decision)
+    if not plantilla:
+        fundamentacion, plantilla_id, version, parametros = decision['fundamentacion'], None, None, None
+    with db.transaccion(inmediata=True) as conn:
+        return conn.execute("""
+            INSERT INTO decisiones (caso_id, tipo_decision, resultado, fundamentacion,
+                                    plantilla_id, plantilla_version, parametros)
+            VALUES (1, 'asistida', 'acoge_parcial', ?, ?, ?, ?)
+        """, (fundamentacion, plantilla_id, version, parametros)).lastrowid
+
+
+def leer(db, db_path, decision_id):
+    with db.conexion() as conn:
+        fila = dict(conn.execute("SELECT * FROM decisiones WHERE id = ?", (decision_id,)).fetchone())
+    return obtener_plantillas(db_path).completar_decision(fila)
+
+
+def test_nivel_2_guarda_el_precedente_por_id(db, db_path, motor):
+    decision = motor.decidir_caso(CASO, 2)
+    parametros = json.loads(columnas_decision(decision)[3])
+    assert 'precedente_id' in parametros
+    assert 'precedente_titulo' not in parametros and 'principios' not in parametros
+
+    fila = leer(db, db_path, guardar(db, decision))
+    assert fila['fundamentacion'] == decision['fundamentacion']
+
+
+def test_editar_o_borrar_el_precedente_no_cambia_decisiones_dictadas(db, db_path, motor):
+    decision = motor.decidir_caso(CASO, 2)
+    decision_id = guardar(db, decision)
+    precedente_id = decision['plantilla']['parametros']['precedente_id']
+    assert decision['plantilla']['parametros']['precedente_revision'] == 1
+
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("UPDATE casos_precedentes SET titulo = 'Título corregido' WHERE id = ?", (precedente_id,))
+    obtener_plantillas(db_path)._renderizados.clear()
+    assert leer(db, db_path, decision_id)['fundamentacion'] == decision['fundamentacion']
+
+    # Una decisión nueva cita la revisión nueva
+    nueva = motor.decidir_caso(CASO, 2)
+    assert nueva['plantilla']['parametros']['precedente_revision'] == 2
+    assert 'Título corregido' in leer(db, db_path, guardar(db, nueva))['fundamentacion']
+
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("DELETE FROM casos_precedentes WHERE id = ?", (precedente_id,))
+    obtener_plantillas(db_path)._renderizados.clear()
+    assert leer(db, db_path, decision_id)['fundamentacion'] == decision['fundamentacion']
+
+
+def test_revisiones_de_precedentes_inmutables(db):
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("UPDATE casos_precedentes SET tribunal = 'Otro tribunal' WHERE id = 1")
+    with pytest.raises(Exception, match='inmutables'):
+        with db.transaccion(inmediata=True) as conn:
+            conn.execute("UPDATE precedentes_revisiones SET titulo = 'x'")
+
+
+def test_conversion_compacta_nivel_2_y_conserva_nivel_3(db, db_path, motor):
+    nivel_2 = motor.decidir_caso(CASO, 2)
+    id_nivel_2 = guardar(db, nivel_2, plantilla=False)
+    id_nivel_3 = guardar(db, motor.decidir_caso(CASO, 3), plantilla=False)
+
+    conversor = ConversorDecisiones(db_path)
+    conversor.ejecutar()
+    assert (conversor.revisadas, conversor.convertidas, conversor.con_listas) == (2, 1, 1)
+
+    convertida = leer(db, db_path, id_nivel_2)
+    assert convertida['fundamentacion'] == nivel_2['fundamentacion']
+    parametros = json.loads(convertida['parametros'])
+    assert (parametros['precedente_id'], parametros['precedente_revision']) == (
+        nivel_2['plantilla']['parametros']['precedente_id'], 1)
+    assert leer(db, db_path, id_nivel_3)['plantilla_id'] is None
+
+
+def test_vigentes_no_registra(tmp_path):
+    from conexion import obtener_gestor
+    from migraciones import MigradorEsquema
+    from plantillas import RepositorioPlantillas
+
+    ruta = str(tmp_path / 'sin_registrar.db')
+    MigradorEsquema(ruta).migrar(verbose=False)
+    try:
+        repositorio = RepositorioPlantillas(ruta)
+        assert repositorio.vigentes() == {}
+        with pytest.raises(ValueError, match='init_db'):
+            repositorio.aplicar('nivel1_pagare', {'monto': '1,000.00'})
+
+        assert repositorio.sincronizar() > 0
+        assert 'nivel1_pagare' in repositorio.vigentes()
+        assert repositorio.sincronizar() == 0
+    finally:
+        obtener_gestor(ruta).cerrar()
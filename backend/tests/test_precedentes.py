@@ -0,0 +1,171 @@
+import pytest
+
+import precedentes
+from analisis import CasoAnalizado
+import vectorizador
+from precedentes import BusquedaPrecedentes, BusquedaTextoCompleto, BusquedaVectorial, IndicePrecedentes
+
+
+def agregar_precedente(db, titulo, fecha='2023-01-01', tipo_caso='tipo_prueba', hechos='Hechos',
+                       monto_reclamado=None, monto_otorgado=None):
+    with db.transaccion(inmediata=True) as conn:
+        return conn.execute("""
+            INSERT INTO casos_precedentes (
+                titulo, tribunal, fecha_sentencia, hechos_resumidos, decision,
+                monto_aproximado, monto_reclamado, monto_otorgado, tipo_caso, principios_aplicados
+            ) VALUES (?, 'Juzgado', ?, ?, 'Decisión', ?, ?, ?, ?, 'Principios')
+        """, (titulo, fecha, hechos, monto_otorgado, monto_reclamado, monto_otorgado, tipo_caso)).lastrowid
+
+
+def analizado(tipo_caso='tipo_prueba', descripcion=''):
+    return CasoAnalizado({'tipo_caso': tipo_caso, 'descripcion_hechos': descripcion})
+
+
+def test_busqueda_precedentes_es_abstracta():
+    with pytest.raises(TypeError):
+        BusquedaPrecedentes()
+
+
+def test_indice_recientes_por_fecha_y_luego_por_id(db, db_path):
+    viejo = agregar_precedente(db, 'Viejo', '2020-05-01')
+    nuevo = agregar_precedente(db, 'Nuevo', '2024-05-01')
+    empate = agregar_precedente(db, 'Empate', '2024-05-01')
+    agregar_precedente(db, 'Otro tipo', '2025-01-01', tipo_caso='otro_tipo')
+    indice = IndicePrecedentes(db_path)
+
+    assert [p['id'] for p in indice.recientes('tipo_prueba', 5)] == [empate, nuevo, viejo]
+    assert [p['id'] for p in indice.buscar(analizado(), 2)] == [empate, nuevo]
+    assert indice.recientes('tipo_inexistente') == []
+
+
+def test_indice_obtener_en_orden_y_omite_inexistentes(db, db_path):
+    a = agregar_precedente(db, 'A')
+    b = agregar_precedente(db, 'B')
+    indice = IndicePrecedentes(db_path)
+
+    assert [p['titulo'] for p in indice.obtener([b, 999999, a])] == ['B', 'A']
+
+
+def test_indice_cercanos_por_monto(db, db_path):
+    for reclamado in (100000, 200000, 300000, 400000):
+        agregar_precedente(db, f'Reclamo {reclamado}', monto_reclamado=reclamado, monto_otorgado=reclamado / 2)
+    # Sin monto otorgado no entra en la búsqueda por monto
+    agregar_precedente(db, 'Sin otorgado', monto_reclamado=260000)
+    indice = IndicePrecedentes(db_path)
+
+    cercanos = indice.cercanos_por_monto('tipo_prueba', 260000, limite=3)
+    assert [p['monto_reclamado'] for p in cercanos] == [300000, 200000, 400000]
+    assert [p['monto_reclamado'] for p in indice.cercanos_por_monto('tipo_prueba', 10, limite=2)] == [100000, 200000]
+    assert len(indice.cercanos_por_monto('tipo_prueba', 0, limite=10)) == 4
+    assert indice.cercanos_por_monto('tipo_inexistente', 100000) == []
+
+
+def test_indice_se_recarga_al_cambiar_la_version(db, db_path):
+    primero = agregar_precedente(db, 'Primero', '2022-01-01')
+    indice = IndicePrecedentes(db_path)
+    assert [p['id'] for p in indice.recientes('tipo_prueba')] == [primero]
+    version = indice.estadisticas()['version']
+
+    segundo = agregar_precedente(db, 'Segundo', '2023-01-01')
+    assert [p['id'] for p in indice.recientes('tipo_prueba')] == [segundo, primero]
+
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("DELETE FROM casos_precedentes WHERE id = ?", (segundo,))
+    assert [p['id'] for p in indice.recientes('tipo_prueba')] == [primero]
+    assert indice.obtener([segundo]) == []
+    assert indice.estadisticas()['version'] != version
+
+
+def test_texto_ordena_por_bm25_dentro_del_tipo(db, db_path):
+    agregar_precedente(db, 'Reciente', '2024-01-01', hechos='Contrato de locacion de inmueble urbano')
+    uno = agregar_precedente(db, 'Un termino', '2020-01-01', hechos='Pagare vencido sin protesto')
+    dos = agregar_precedente(db, 'Dos terminos', '2019-01-01', hechos='Pagare vencido firmado por el garante solidario')
+    agregar_precedente(db, 'Otro tipo', '2024-01-01', tipo_caso='otro_tipo', hechos='Pagare firmado por el garante')
+    busqueda = BusquedaTextoCompleto(db_path)
+
+    encontrados = busqueda.buscar(analizado(descripcion='El garante firmado un pagare'), limite=5)
+
+    assert [p['id'] for p in encontrados] == [dos, uno]
+    assert busqueda.estadisticas()['consultas'] == 1
+
+
+def test_texto_sin_coincidencias_usa_los_mas_recientes(db, db_path):
+    agregar_precedente(db, 'Viejo', '2020-01-01', hechos='Pagare vencido')
+    reciente = agregar_precedente(db, 'Reciente', '2024-01-01', hechos='Locacion de inmueble')
+    busqueda = BusquedaTextoCompleto(db_path)
+
+    assert [p['id'] for p in busqueda.buscar(analizado(descripcion='Accidente de transito'), 1)] == [reciente]
+    assert [p['id'] for p in busqueda.buscar(analizado(descripcion='muy del'), 1)] == [reciente]
+    assert busqueda.estadisticas()['respaldo'] == 2
+
+
+def test_texto_sigue_los_cambios_de_precedentes(db, db_path):
+    precedente = agregar_precedente(db, 'Editado', hechos='Locacion de inmueble')
+    busqueda = BusquedaTextoCompleto(db_path)
+    caso = analizado(descripcion='Cheque rechazado por falta de fondos')
+    assert busqueda.buscar(caso)[0]['id'] == precedente
+    assert busqueda.estadisticas()['respaldo'] == 1
+
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("UPDATE casos_precedentes SET hechos_resumidos = 'Cheque rechazado' WHERE id = ?",
+                     (precedente,))
+    assert busqueda.buscar(caso)[0]['hechos_resumidos'] == 'Cheque rechazado'
+    assert busqueda.estadisticas()['respaldo'] == 1
+
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("DELETE FROM casos_precedentes WHERE id = ?", (precedente,))
+    assert busqueda.buscar(caso) == []
+
+
+def test_texto_descarta_terminos_demasiado_frecuentes(db, db_path, monkeypatch):
+    monkeypatch.setattr(precedentes, 'MIN_DOCUMENTOS_DESCARTE', 0)
+    monkeypatch.setattr(precedentes, 'MAX_FRECUENCIA_DOCUMENTAL', 0.3)
+    for i in range(4):
+        agregar_precedente(db, f'Comun {i}', f'2020-01-0{i + 1}', hechos=f'Demanda comun numero{"x" * i}')
+    raro = agregar_precedente(db, 'Raro', '2019-01-01', hechos='Demanda comun por usufructo')
+    busqueda = BusquedaTextoCompleto(db_path)
+
+    # 'demanda' y 'comun' superan el 30% de los precedentes (con los de la base): solo 'usufructo' cuenta
+    assert [p['id'] for p in busqueda.buscar(analizado(descripcion='Demanda comun usufructo'), 5)] == [raro]
+    assert busqueda.estadisticas()['respaldo'] == 0
+
+
+requiere_scipy = pytest.mark.skipif(not vectorizador.disponible(), reason='requiere NumPy y SciPy')
+
+
+@requiere_scipy
+def test_vectorial_ordena_por_similitud_y_recurre_a_recientes(db, db_path, tmp_path):
+    reciente = agregar_precedente(db, 'Reciente', '2024-01-01', hechos='Locacion de inmueble urbano')
+    uno = agregar_precedente(db, 'Uno', '2020-01-01', hechos='Pagare vencido sin protesto')
+    dos = agregar_precedente(db, 'Dos', '2019-01-01', hechos='Pagare vencido firmado por el garante')
+    agregar_precedente(db, 'Otro tipo', '2024-01-01', tipo_caso='otro_tipo', hechos='Pagare del garante')
+    busqueda = BusquedaVectorial(db_path, directorio=str(tmp_path / 'tfidf'))
+
+    assert [p['id'] for p in busqueda.buscar(analizado(descripcion='Garante de un pagare'), 5)] == [dos, uno]
+    assert [p['id'] for p in busqueda.buscar(analizado(descripcion='Accidente de transito'), 1)] == [reciente]
+    assert busqueda.estadisticas()['respaldo'] == 1
+
+
+@requiere_scipy
+def test_vectorial_agrega_inserciones_y_reconstruye_al_editar(db, db_path, tmp_path):
+    directorio = str(tmp_path / 'tfidf')
+    agregar_precedente(db, 'Inicial', hechos='Pagare vencido')
+    busqueda = BusquedaVectorial(db_path, directorio=directorio)
+    busqueda.vigente()
+    assert busqueda.estadisticas()['reconstrucciones'] == 1
+
+    nuevo = agregar_precedente(db, 'Nuevo', hechos='Usufructo vitalicio')
+    assert [p['id'] for p in busqueda.buscar(analizado(descripcion='usufructo'))] == [nuevo]
+    stats = busqueda.estadisticas()
+    assert (stats['reconstrucciones'], stats['agregados']) == (1, 1)
+
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("UPDATE casos_precedentes SET hechos_resumidos = 'Servidumbre de paso' WHERE id = ?", (nuevo,))
+    assert [p['id'] for p in busqueda.buscar(analizado(descripcion='servidumbre'))] == [nuevo]
+    assert busqueda.estadisticas()['reconstrucciones'] == 2
+
+    # Otro worker abre el índice guardado sin reconstruirlo
+    otro = BusquedaVectorial(db_path, directorio=directorio)
+    assert [p['id'] for p in otro.buscar(analizado(descripcion='servidumbre'))] == [nuevo]
+    stats = otro.estadisticas()
+    assert (stats['cargas'], stats['reconstrucciones']) == (1, 0)
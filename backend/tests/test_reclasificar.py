@@ -0,0 +1,87 @@
+import itertools
+
+import pytest
+
+from clasificador import ClasificadorCasos
+from reclasificar import Reclasificador
+
+expedientes = itertools.count(1)
+
+TEXTOS = [
+    ('Préstamo documentado en pagaré impago', 'pagaré firmado', 200000),
+    ('Accidente de tránsito con versiones encontradas', 'testigos', 450000),
+    ('Caso novedoso sin precedentes', None, 900000),
+]
+
+
+@pytest.fixture
+def casos(db):
+    """Doce casos guardados con nivel 4 (o sin nivel): casi todos cambian al reclasificar"""
+    with db.transaccion(inmediata=True) as conn:
+        return [conn.execute("""
+            INSERT INTO casos (numero_expediente, tipo_caso, actor_id, demandado_nombre, monto_reclamado,
+                               descripcion_hechos, pruebas, nivel_clasificacion)
+            VALUES (?, 'cobro_suma_dinero', 4, 'X', ?, ?, ?, ?)
+        """, (f'RC-{next(expedientes)}', monto, hechos, pruebas, None if i == 0 else 4)).lastrowid
+            for i, (hechos, pruebas, monto) in enumerate(TEXTOS * 4)]
+
+
+def niveles(db):
+    with db.conexion() as conn:
+        return {fila['id']: fila['nivel_clasificacion'] for fila in conn.execute("SELECT id, nivel_clasificacion FROM casos")}
+
+
+def esperados(db_path, ids):
+    clasificador = ClasificadorCasos(db_path, max_cache=0)
+    with clasificador.db.conexion() as conn:
+        filas = conn.execute("SELECT * FROM casos ORDER BY id").fetchall()
+    return {
+        fila['id']: clasificador.clasificar_caso(dict(fila, pruebas=fila['pruebas'] or '')).nivel
+        for fila in filas if fila['id'] in ids
+    }
+
+
+def reclasificaciones(db):
+    with db.conexion() as conn:
+        return conn.execute("SELECT COUNT(*) FROM auditoria WHERE tipo_evento = 'reclasificacion'").fetchone()[0]
+
+
+def test_dry_run_solo_cuenta_transiciones(db, db_path, casos):
+    antes = niveles(db)
+    reclasificador = Reclasificador(db_path, procesos=2, tamano_bloque=5, dry_run=True)
+    reclasificador.ejecutar()
+
+    assert niveles(db) == antes
+    assert reclasificaciones(db) == 0
+    assert reclasificador.procesados == len(casos)
+    assert sum(reclasificador.matriz.values()) == len(casos)
+    assert sum(n for (anterior, _), n in reclasificador.matriz.items() if anterior is None) == 1
+    nuevos = esperados(db_path, casos)
+    assert reclasificador.cambiados == sum(1 for caso_id in casos if nuevos[caso_id] != antes[caso_id])
+
+
+def test_aplica_cambios_por_bloque_y_guarda_checkpoint(db, db_path, casos, tmp_path):
+    checkpoint = tmp_path / 'rc.ckpt'
+    reclasificador = Reclasificador(db_path, procesos=2, tamano_bloque=5, checkpoint=str(checkpoint))
+    reclasificador.ejecutar()
+
+    assert niveles(db) == esperados(db_path, casos)
+    assert reclasificaciones(db) == reclasificador.cambiados > 0
+    assert checkpoint.read_text() == str(casos[-1]) == str(reclasificador.ultimo_id)
+
+    # Ya reclasificados: una segunda pasada no cambia nada
+    segunda = Reclasificador(db_path, procesos=1, tamano_bloque=5)
+    segunda.ejecutar()
+    assert (segunda.procesados, segunda.cambiados) == (len(casos), 0)
+
+
+def test_reanuda_desde_id(db, db_path, casos):
+    antes = niveles(db)
+    reclasificador = Reclasificador(db_path, procesos=2, tamano_bloque=4)
+    reclasificador.ejecutar(desde_id=casos[5])
+
+    despues = niveles(db)
+    assert reclasificador.procesados == len(casos) - 6
+    assert all(despues[caso_id] == antes[caso_id] for caso_id in casos[:6])
+    nuevos = esperados(db_path, casos[6:])
+    assert all(despues[caso_id] == nuevos[caso_id] for caso_id in casos[6:])
@@ -0,0 +1,118 @@
+import pytest
+
+from analisis import CasoAnalizado
+from clasificador import ClasificadorCasos
+from reglas import ProgramaReglas, cargar_programa, compilar_regla
+
+
+def fila(**campos):
+    base = {
+        'factor': 'prueba', 'descripcion': 'Regla de prueba', 'peso': 1, 'nivel_minimo': 1,
+        'condicion': 'palabras', 'campo': 'pruebas', 'palabras_clave': '["Pagaré"]',
+        'umbral_monto': None, 'tipo_caso': None, 'etiqueta': None,
+    }
+    return dict(base, **campos)
+
+
+@pytest.mark.parametrize('campos', [
+    {'condicion': 'parecido'},
+    {'condicion': 'monto_mayor', 'umbral_monto': None},
+    {'condicion': 'verdadero', 'campo': None},
+    {'palabras_clave': 'no es json'},
+    {'palabras_clave': '{"a": 1}'},
+    {'palabras_clave': '[1, 2]'},
+    {'palabras_clave': '[]'},
+], ids=['condicion', 'umbral', 'campo', 'json', 'no_lista', 'no_textos', 'vacia'])
+def test_compilar_regla_invalida(campos):
+    with pytest.raises(ValueError):
+        compilar_regla(fila(**campos))
+
+
+def test_compilar_regla_normaliza_palabras_y_etiqueta():
+    regla = compilar_regla(fila(palabras_clave='["Pagaré", "CONTRATO firmado"]'))
+    assert regla.palabras == {'pagare', 'contrato firmado'}
+    assert regla.etiqueta == 'Regla de prueba'
+
+
+def test_evaluar_suma_pesos_y_toma_el_mayor_nivel_minimo():
+    programa = ProgramaReglas([
+        compilar_regla(fila(factor='pagare', peso=3)),
+        compilar_regla(fila(factor='bajo', condicion='monto_menor', umbral_monto=1000, campo=None, peso=2)),
+        compilar_regla(fila(factor='solo_danos', peso=5, tipo_caso='daños_perjuicios')),
+        compilar_regla(fila(factor='constitucional', condicion='verdadero',
+                            campo='plantea_cuestion_constitucional', peso=-4, nivel_minimo=4)),
+        compilar_regla(fila(factor='sin_contestacion', condicion='falso', campo='tiene_contestacion', peso=1)),
+    ])
+    caso = {'tipo_caso': 'cobro_suma_dinero', 'monto_reclamado': 500, 'pruebas': 'PAGARE firmado',
+            'plantea_cuestion_constitucional': True, 'tiene_contestacion': True}
+
+    puntos, nivel_minimo, aplicadas = programa.evaluar(programa.analizar(caso))
+
+    assert [r.factor for r in aplicadas] == ['pagare', 'bajo', 'constitucional']
+    assert (puntos, nivel_minimo) == (1, 4)
+    # La regla 'falso' pide el campo en False (si falta, no se aplica); el tipo habilita 'solo_danos'
+    caso = {'tipo_caso': 'daños_perjuicios', 'monto_reclamado': 5000, 'pruebas': 'pagaré'}
+    _, _, aplicadas = programa.evaluar(programa.analizar(caso))
+    assert [r.factor for r in aplicadas] == ['pagare', 'solo_danos']
+    puntos, _, aplicadas = programa.evaluar(programa.analizar(dict(caso, tiene_contestacion=False)))
+    assert [r.factor for r in aplicadas] == ['pagare', 'solo_danos', 'sin_contestacion']
+    assert puntos == 9
+
+
+def test_analizar_reutiliza_el_analisis_del_mismo_programa():
+    programa = ProgramaReglas([compilar_regla(fila())])
+    analizado = programa.analizar({'pruebas': 'pagaré'})
+    assert programa.analizar(analizado) is analizado
+
+    otro = ProgramaReglas([compilar_regla(fila())])
+    assert otro.analizar(analizado) is not analizado
+    assert isinstance(otro.analizar(analizado), CasoAnalizado)
+
+
+def test_cargar_programa_solo_activas_en_orden(db):
+    with db.conexion() as conn:
+        programa = cargar_programa(conn, version=7)
+
+    assert programa.version == 7
+    assert [r.factor for r in programa.reglas][:3] == ['monto_bajo', 'monto_elevado', 'prueba_clara']
+    assert 'jurisprudencia_uniforme' not in programa.etiquetas
+
+
+def test_recarga_en_caliente_en_todos_los_clasificadores(db, db_path):
+    # Dos instancias: como dos workers de gunicorn sobre la misma base
+    uno, otro = ClasificadorCasos(db_path), ClasificadorCasos(db_path)
+    caso = {'tipo_caso': 'cobro_suma_dinero', 'monto_reclamado': 500000,
+            'descripcion_hechos': 'Usufructo impago', 'pruebas': ''}
+    antes = uno.clasificar_caso(caso)
+    assert otro.clasificar_caso(caso) == antes
+
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("""
+            INSERT INTO criterios_clasificacion (factor, descripcion, peso, nivel_minimo, condicion, campo,
+                                                 palabras_clave, orden, activo)
+            VALUES ('usufructo', 'Usufructo', -5, 3, 'palabras', 'descripcion_hechos', '["usufructo"]', 90, 1)
+        """)
+
+    for clasificador in (uno, otro):
+        despues = clasificador.clasificar_caso(caso)
+        assert despues.factores == antes.factores + ('usufructo',)
+        assert despues.puntos == antes.puntos - 5
+        assert despues.nivel >= 3
+
+
+def test_recarga_invalida_conserva_las_reglas_anteriores(db, db_path):
+    clasificador = ClasificadorCasos(db_path)
+    caso = {'tipo_caso': 'cobro_suma_dinero', 'monto_reclamado': 100000,
+            'descripcion_hechos': 'Hechos', 'pruebas': 'pagaré'}
+    antes = clasificador.clasificar_caso(caso)
+    version = clasificador.programa.version
+
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("""
+            INSERT INTO criterios_clasificacion (factor, descripcion, peso, nivel_minimo, condicion, orden, activo)
+            VALUES ('rota', 'Sin campo', 1, 1, 'verdadero', 1, 1)
+        """)
+
+    assert clasificador.clasificar_caso(caso) == antes
+    assert clasificador.programa.version != version
+    assert 'rota' not in clasificador.programa.etiquetas
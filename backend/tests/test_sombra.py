@@ -0,0 +1,77 @@
+import pytest
+
+from sombra import EvaluadorSombra, validar_criterio
+
+CASO = {
+    'tipo_caso': 'cobro_suma_dinero',
+    'monto_reclamado': 200000,
+    'descripcion_hechos': 'Préstamo documentado en pagaré',
+    'pruebas': 'pagaré firmado',
+}
+
+SIEMPRE_NIVEL_4 = {'factor': 'todo_constitucional', 'peso': 0, 'nivel_minimo': 4,
+                   'condicion': 'monto_mayor', 'umbral_monto': -1}
+
+
+@pytest.mark.parametrize('cambio,mensaje', [
+    ({'nivel_minimo': True}, 'nivel_minimo'),
+    ({'nivel_minimo': 5}, 'nivel_minimo'),
+    ({'peso': True}, 'peso'),
+    ({'peso': 1.5}, 'peso'),
+    ({'peso': None}, 'peso'),
+    ({'condicion': 'siempre'}, 'condición desconocida'),
+    ({'condicion': 'monto_menor', 'umbral_monto': None}, 'umbral_monto'),
+])
+def test_criterio_invalido(cambio, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        validar_criterio(dict(SIEMPRE_NIVEL_4, **cambio))
+
+
+def test_criterio_completa_valores_por_defecto():
+    fila = validar_criterio({'factor': 'pagare', 'peso': 3, 'condicion': 'palabras',
+                             'campo': 'pruebas', 'palabras_clave': ['pagaré']})
+    assert (fila['nivel_minimo'], fila['activo'], fila['palabras_clave']) == (1, 1, '["pagaré"]')
+
+
+def test_reporte_de_conjunto_candidato(db_path):
+    evaluador = EvaluadorSombra(db_path)
+    assert evaluador.reporte('candidato') is None
+    evaluador.registrar_conjunto('candidato', [SIEMPRE_NIVEL_4])
+
+    evaluador._evaluar_lote([(1, CASO, 1), (2, CASO, 4), (3, CASO, 2)])
+
+    reporte = evaluador.reporte('candidato')
+    assert (reporte['criterios'], reporte['evaluados'], reporte['coincidencias'], reporte['discrepancias']) == (1, 3, 1, 2)
+    assert reporte['tasa_acuerdo'] == round(1 / 3, 4)
+    assert reporte['matriz_confusion']['1']['4'] == reporte['matriz_confusion']['2']['4'] == 1
+    assert [d['caso_id'] for d in reporte['discrepancias_recientes']] == [3, 1]
+    assert reporte['discrepancias_recientes'][0]['factores_candidato'] == ['todo_constitucional']
+
+    # Reemplazar el conjunto reinicia la comparación
+    evaluador.registrar_conjunto('candidato', [SIEMPRE_NIVEL_4])
+    assert evaluador.reporte('candidato')['evaluados'] == 0
+    assert evaluador.eliminar_conjunto('candidato')
+    assert evaluador.reporte('candidato') is None
+
+
+def test_discrepancias_acotadas_por_conjunto(db_path):
+    evaluador = EvaluadorSombra(db_path, max_discrepancias=3)
+    evaluador.registrar_conjunto('a', [SIEMPRE_NIVEL_4])
+    evaluador.registrar_conjunto('b', [SIEMPRE_NIVEL_4])
+
+    evaluador._evaluar_lote([(caso_id, CASO, 1) for caso_id in range(1, 6)])
+    evaluador._evaluar_lote([(6, CASO, 1)])
+
+    for conjunto in ('a', 'b'):
+        reporte = evaluador.reporte(conjunto)
+        assert reporte['discrepancias'] == 6
+        assert [d['caso_id'] for d in reporte['discrepancias_recientes']] == [6, 5, 4]
+
+
+def test_cola_llena_descarta_sin_bloquear(db_path):
+    evaluador = EvaluadorSombra(db_path, capacidad=2)
+    for caso_id in range(5):
+        evaluador.enviar(caso_id, CASO, 1)
+
+    stats = evaluador.estadisticas()
+    assert (stats['encolados'], stats['descartados'], stats['pendientes']) == (2, 3, 2)
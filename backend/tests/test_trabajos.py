@@ -0,0 +1,79 @@
+import pytest
+
+from trabajos import ColaTrabajos
+
+
+@pytest.fixture
+def cola(db_path):
+    """Cola sin hilos: las pruebas toman y ejecutan los trabajos a mano"""
+    cola = ColaTrabajos(db_path, hilos=0, max_intentos=2)
+    cola.registrar('sumar', lambda p: {'total': p['a'] + p['b']})
+    cola.registrar('fallar', lambda p: 1 / 0)
+    return cola
+
+
+def vencer(db, trabajo_id):
+    with db.transaccion(inmediata=True) as conn:
+        conn.execute("UPDATE trabajos SET vence_en = '2000-01-01 00:00:00.000' WHERE id = ?", (trabajo_id,))
+
+
+def test_ciclo_completo(cola):
+    trabajo_id = cola.encolar('sumar', {'a': 2, 'b': 3})
+    assert cola.obtener(trabajo_id)['estado'] == 'pendiente'
+
+    trabajo = cola._tomar('w1')
+    assert trabajo == {'id': trabajo_id, 'tipo': 'sumar', 'parametros': {'a': 2, 'b': 3}}
+    assert cola.obtener(trabajo_id)['estado'] == 'en_proceso'
+    assert cola._tomar('w2') is None
+
+    cola._ejecutar(trabajo, 'w1')
+    final = cola.obtener(trabajo_id)
+    assert (final['estado'], final['resultado'], final['intentos']) == ('completado', {'total': 5}, 1)
+    assert final['duracion_ms'] is not None and final['espera_ms'] is not None
+    assert cola.estadisticas() == {'completado': 1}
+
+
+def test_manejador_que_falla(cola):
+    trabajo_id = cola.encolar('fallar', {})
+    cola._ejecutar(cola._tomar('w1'), 'w1')
+
+    final = cola.obtener(trabajo_id)
+    assert final['estado'] == 'fallido'
+    assert 'division' in final['error']
+
+
+def test_tipo_desconocido(cola):
+    with pytest.raises(ValueError):
+        cola.encolar('inexistente', {})
+
+
+def test_trabajo_vencido_se_reclama(cola, db):
+    trabajo_id = cola.encolar('sumar', {'a': 1, 'b': 1})
+    abandonado = cola._tomar('w1')
+    vencer(db, trabajo_id)
+
+    reclamado = cola._tomar('w2')
+    assert reclamado['id'] == trabajo_id
+    assert cola.obtener(trabajo_id)['intentos'] == 2
+
+    # El worker original termina tarde: su resultado se descarta
+    cola.registrar('sumar', lambda p: {'total': -1})
+    cola._ejecutar(abandonado, 'w1')
+    assert cola.obtener(trabajo_id)['estado'] == 'en_proceso'
+
+    cola.registrar('sumar', lambda p: {'total': p['a'] + p['b']})
+    cola._ejecutar(reclamado, 'w2')
+    final = cola.obtener(trabajo_id)
+    assert (final['estado'], final['resultado']) == ('completado', {'total': 2})
+
+
+def test_vencido_sin_intentos_queda_fallido(cola, db):
+    trabajo_id = cola.encolar('sumar', {'a': 1, 'b': 1})
+    for worker in ('w1', 'w2'):
+        assert cola._tomar(worker)['id'] == trabajo_id
+        vencer(db, trabajo_id)
+
+    assert cola._tomar('w3') is None
+    final = cola.obtener(trabajo_id)
+    assert (final['estado'], final['error'], final['intentos']) == ('fallido', 'Plazo de ejecución vencido', 2)
+    assert final['fecha_fin'] is not None
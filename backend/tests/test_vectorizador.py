@@ -0,0 +1,104 @@
+import math
+
+import pytest
+
+pytest.importorskip('scipy')
+
+import numpy as np  # noqa: E402
+
+from analisis import terminos_significativos  # noqa: E402
+from vectorizador import IndiceTfIdf  # noqa: E402
+
+DOCUMENTOS = [
+    (1, 'cobro', '2020-01-01', 'Pagare vencido firmado por el garante'),
+    (2, 'cobro', '2021-01-01', 'Cheque rechazado por falta de fondos'),
+    (3, 'cobro', '2022-01-01', 'Pagare vencido y cheque rechazado'),
+    (4, 'danos', '2023-01-01', 'Pagare vencido en accidente de transito'),
+    (5, 'cobro', '2019-01-01', 'Garante solidario del pagare pagare pagare'),
+]
+
+
+def coseno_denso(documentos, consulta, tipo):
+    """Similitud coseno con tf sublineal e idf suavizado, calculada término a término"""
+    tfs = {i: {t: 1 + math.log(v) for t, v in _contar(terminos_significativos(texto)).items()}
+           for i, _, _, texto in documentos}
+    idf = {}
+    for tf in tfs.values():
+        for t in tf:
+            idf[t] = idf.get(t, 0) + 1
+    idf = {t: math.log((1 + len(documentos)) / (1 + df)) + 1 for t, df in idf.items()}
+    q = {t: 1 + math.log(v) for t, v in _contar(consulta).items() if t in idf}
+
+    puntajes = {}
+    for i, tipo_documento, _, _ in documentos:
+        norma = math.sqrt(sum((w * idf[t]) ** 2 for t, w in tfs[i].items())) or 1.0
+        puntaje = sum(q[t] * idf[t] ** 2 * tfs[i].get(t, 0) for t in q) / norma
+        if tipo_documento == tipo and puntaje > 0:
+            puntajes[i] = puntaje
+    return puntajes
+
+
+def _contar(terminos):
+    veces = {}
+    for t in terminos:
+        veces[t] = veces.get(t, 0) + 1
+    return veces
+
+
+def test_consulta_ordena_por_coseno_dentro_del_tipo():
+    indice = IndiceTfIdf.construir(DOCUMENTOS)
+    consulta = ['pagare', 'garante']
+
+    esperado = coseno_denso(DOCUMENTOS, consulta, 'cobro')
+    ids = indice.consultar(consulta, 'cobro', limite=10)
+
+    assert set(ids) == set(esperado)
+    assert ids == sorted(esperado, key=lambda i: -esperado[i])
+    assert indice.consultar(consulta, 'cobro', limite=1) == ids[:1]
+    assert indice.consultar(['inexistente'], 'cobro') == []
+    assert indice.consultar(consulta, 'tipo_inexistente') == []
+
+
+def test_a_igual_similitud_gana_el_mas_reciente():
+    indice = IndiceTfIdf.construir([
+        (1, 'cobro', '2020-01-01', 'Cheque rechazado'),
+        (2, 'cobro', '2022-01-01', 'Cheque rechazado'),
+        (3, 'cobro', '2022-01-01', 'Cheque rechazado'),
+    ])
+    assert indice.consultar(['cheque'], 'cobro') == [3, 2, 1]
+
+
+def test_agregar_equivale_a_construir_todo():
+    completo = IndiceTfIdf.construir(DOCUMENTOS)
+    incremental = IndiceTfIdf.construir(DOCUMENTOS[:2]).agregar(DOCUMENTOS[2:])
+
+    assert incremental.terminos == completo.terminos
+    assert np.allclose(incremental.idf, completo.idf)
+    assert np.allclose(incremental.normas, completo.normas)
+    assert (incremental.tf != completo.tf).nnz == 0
+    assert incremental.max_id == 5
+    for consulta in (['pagare'], ['cheque', 'fondos'], ['garante', 'solidario', 'pagare']):
+        assert incremental.consultar(consulta, 'cobro', 5) == completo.consultar(consulta, 'cobro', 5)
+
+
+def test_agregar_no_modifica_el_original():
+    original = IndiceTfIdf.construir(DOCUMENTOS[:2])
+    original.agregar(DOCUMENTOS[2:])
+
+    assert original.documentos == 2
+    assert 'transito' not in original.vocabulario
+
+
+def test_guardar_y_cargar_con_memory_mapping(tmp_path):
+    indice = IndiceTfIdf.construir(DOCUMENTOS)
+    indice.guardar(str(tmp_path / 'v1'), {'version': 1})
+
+    cargado, meta = IndiceTfIdf.cargar(str(tmp_path / 'v1'))
+
+    assert meta == {'version': 1}
+    assert isinstance(cargado.ids, np.memmap)
+    assert cargado.estadisticas() == indice.estadisticas()
+    assert cargado.consultar(['pagare', 'cheque'], 'cobro', 5) == indice.consultar(['pagare', 'cheque'], 'cobro', 5)
+    # Un índice cargado admite agregar filas (el resultado vive en memoria)
+    ampliado = cargado.agregar([(6, 'cobro', '2024-01-01', 'Usufructo')])
+    assert ampliado.consultar(['usufructo'], 'cobro') == [6]
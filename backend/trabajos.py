@@ -0,0 +1,186 @@
+"""
+JUSTICIA.ar - Cola de Trabajos Asíncronos
+Cola durable en la tabla `trabajos` procesada por un pool acotado de hilos
+dentro de cada worker.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Callable, Dict, Optional
+
+from conexion import obtener_gestor
+
+logger = logging.getLogger(__name__)
+
+AHORA = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+class ColaTrabajos:
+    """
+    Encola trabajos en la base y los ejecuta en segundo plano.
+
+    Cada trabajo se toma con BEGIN IMMEDIATE (un solo hilo de un solo worker lo
+    obtiene) y queda "en_proceso" con un plazo de vencimiento. Si el proceso
+    muere, el trabajo vuelve a "pendiente" al vencer el plazo, hasta agotar los
+    intentos; los pendientes sobreviven a los reinicios porque viven en la base.
+    """
+
+    def __init__(self, db_path='justicia.db', hilos=2, intervalo_s=1.0,
+                 plazo_s=300, max_intentos=3):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        self.hilos = hilos
+        self.intervalo_s = intervalo_s
+        self.plazo_s = plazo_s
+        self.max_intentos = max_intentos
+
+        self._manejadores: Dict[str, Callable[[Dict], Dict]] = {}
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo: str, manejador: Callable[[Dict], Dict]):
+        """Asocia un tipo de trabajo con la función que lo ejecuta"""
+        self._manejadores[tipo] = manejador
+
+    def iniciar(self):
+        """Arranca el pool de hilos en este proceso (idempotente, seguro tras fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._detener.clear()
+            for i in range(self.hilos):
+                threading.Thread(
+                    target=self._bucle, name=f'trabajos-{i}', daemon=True
+                ).start()
+
+    def detener(self):
+        """Pide a los hilos que terminen después del trabajo en curso"""
+        self._detener.set()
+        self._despertar.set()
+        self._pid = None
+
+    # ===== API =====
+
+    def encolar(self, tipo: str, parametros: Dict) -> int:
+        """Registra un trabajo pendiente y retorna su id"""
+        if tipo not in self._manejadores:
+            raise ValueError(f'Tipo de trabajo desconocido: {tipo}')
+
+        with self.db.transaccion(inmediata=True) as conn:
+            cursor = conn.execute(
+                "INSERT INTO trabajos (tipo, parametros) VALUES (?, ?)",
+                (tipo, json.dumps(parametros))
+            )
+            trabajo_id = cursor.lastrowid
+
+        self._despertar.set()
+        return trabajo_id
+
+    def obtener(self, trabajo_id: int) -> Optional[Dict]:
+        """Estado, tiempos y resultado de un trabajo"""
+        with self.db.conexion() as conn:
+            row = conn.execute("""
+                SELECT id, tipo, parametros, estado, resultado, error, intentos,
+                       fecha_creacion, fecha_inicio, fecha_fin,
+                       (julianday(fecha_inicio) - julianday(fecha_creacion)) * 86400000.0 as espera_ms,
+                       (julianday(fecha_fin) - julianday(fecha_inicio)) * 86400000.0 as duracion_ms
+                FROM trabajos WHERE id = ?
+            """, (trabajo_id,)).fetchone()
+
+        if not row:
+            return None
+
+        trabajo = dict(zip(row.keys(), row))
+        trabajo['parametros'] = json.loads(trabajo['parametros'])
+        if trabajo['resultado'] is not None:
+            trabajo['resultado'] = json.loads(trabajo['resultado'])
+        for campo in ('espera_ms', 'duracion_ms'):
+            if trabajo[campo] is not None:
+                trabajo[campo] = round(trabajo[campo], 1)
+        return trabajo
+
+    def estadisticas(self) -> Dict:
+        """Cantidad de trabajos por estado"""
+        with self.db.conexion() as conn:
+            return {row['estado']: row['total'] for row in conn.execute(
+                "SELECT estado, COUNT(*) as total FROM trabajos GROUP BY estado"
+            )}
+
+    # ===== PROCESAMIENTO =====
+
+    def _bucle(self):
+        """Toma y ejecuta trabajos hasta que se pida detener"""
+        worker = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while not self._detener.is_set():
+            try:
+                trabajo = self._tomar(worker)
+            except Exception:
+                logger.exception("Error al tomar trabajo de la cola")
+                trabajo = None
+
+            if trabajo is None:
+                self._despertar.wait(self.intervalo_s)
+                self._despertar.clear()
+                continue
+
+            self._ejecutar(trabajo, worker)
+
+    def _tomar(self, worker: str) -> Optional[Dict]:
+        """Reclama trabajos vencidos y toma el pendiente más antiguo"""
+        with self.db.transaccion(inmediata=True) as conn:
+            # Trabajos de procesos caídos: reintentar o marcar fallidos
+            conn.execute(f"""
+                UPDATE trabajos
+                SET estado = CASE WHEN intentos >= ? THEN 'fallido' ELSE 'pendiente' END,
+                    error = 'Plazo de ejecución vencido',
+                    fecha_fin = CASE WHEN intentos >= ? THEN {AHORA} ELSE NULL END
+                WHERE estado = 'en_proceso' AND vence_en < {AHORA}
+            """, (self.max_intentos, self.max_intentos))
+
+            row = conn.execute("""
+                SELECT id, tipo, parametros FROM trabajos
+                WHERE estado = 'pendiente' ORDER BY id LIMIT 1
+            """).fetchone()
+            if not row:
+                return None
+
+            conn.execute(f"""
+                UPDATE trabajos
+                SET estado = 'en_proceso', intentos = intentos + 1, worker = ?,
+                    fecha_inicio = {AHORA},
+                    vence_en = strftime('%Y-%m-%d %H:%M:%f', 'now', ?)
+                WHERE id = ?
+            """, (worker, f'+{int(self.plazo_s)} seconds', row['id']))
+
+        return {'id': row['id'], 'tipo': row['tipo'], 'parametros': json.loads(row['parametros'])}
+
+    def _ejecutar(self, trabajo: Dict, worker: str):
+        """
+        Ejecuta el manejador y guarda el resultado o el error. Si el plazo
+        venció y otro hilo reclamó el trabajo, el resultado se descarta: el
+        trabajo ya no es de este worker. Por eso los manejadores deben ser
+        idempotentes.
+        """
+        try:
+            resultado = self._manejadores[trabajo['tipo']](trabajo['parametros'])
+            estado, resultado_json, error = 'completado', json.dumps(resultado), None
+        except Exception as e:
+            logger.exception("Trabajo %s fallido", trabajo['id'])
+            estado, resultado_json, error = 'fallido', None, str(e)
+
+        with self.db.transaccion(inmediata=True) as conn:
+            cursor = conn.execute(f"""
+                UPDATE trabajos
+                SET estado = ?, resultado = ?, error = ?, fecha_fin = {AHORA}, vence_en = NULL
+                WHERE id = ? AND worker = ? AND estado = 'en_proceso'
+            """, (estado, resultado_json, error, trabajo['id'], worker))
+            if cursor.rowcount == 0:
+                logger.warning("Trabajo %s reclamado por otro worker tras vencer el plazo; "
+                               "se descarta el resultado de %s", trabajo['id'], worker)
@@ -0,0 +1,210 @@
+"""
+JUSTICIA.ar - Vectorizador TF-IDF
+Matriz TF-IDF dispersa de los hechos de los precedentes, persistible en disco
+(se carga con memory mapping) y consultable por similitud coseno con un
+producto matriz-vector.
+"""
+import json
+import math
+import os
+import shutil
+import tempfile
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from analisis import terminos_significativos
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # sin NumPy/SciPy no hay búsqueda vectorial
+    np = sparse = None
+
+# Arreglos que se guardan como .npy (uno por archivo, para poder mapearlos)
+ARREGLOS = ('data', 'indices', 'indptr', 'frecuencias', 'idf', 'normas', 'ids', 'codigos_tipo', 'fechas')
+
+
+def disponible() -> bool:
+    """Indica si NumPy y SciPy están instalados"""
+    return sparse is not None
+
+
+def ordinal_fecha(fecha: Optional[str]) -> int:
+    """'2023-05-17' -> 20230517 (0 si no hay fecha), para ordenar sin comparar textos"""
+    digitos = ''.join(c for c in (fecha or '') if c.isdigit())[:8]
+    return int(digitos) if digitos else 0
+
+
+class IndiceTfIdf:
+    """
+    Matriz CSC documentos × términos con tf sublineal (1 + log tf), la
+    frecuencia documental de cada término, y el idf y la norma de cada
+    documento derivados de ellas.
+
+    Una consulta es un producto entre las columnas de sus términos y un vector
+    de pesos, así que solo recorre las listas de esos términos. El índice es
+    inmutable: `agregar` devuelve uno nuevo con las filas agregadas y recalcula
+    idf y normas sin volver a tokenizar el corpus.
+    """
+
+    def __init__(self, terminos: List[str], tipos: List[str], tf, frecuencias, ids,
+                 codigos_tipo, fechas, idf=None, normas=None):
+        self.terminos = terminos
+        self.vocabulario: Dict[str, int] = {t: j for j, t in enumerate(terminos)}
+        self.tipos = tipos
+        self._codigo_por_tipo = {t: i for i, t in enumerate(tipos)}
+        self.tf = tf
+        self.frecuencias = frecuencias
+        self.ids = ids
+        self.codigos_tipo = codigos_tipo
+        self.fechas = fechas
+
+        if idf is None:
+            idf = (np.log((1.0 + len(ids)) / (1.0 + frecuencias)) + 1.0).astype(np.float32)
+        if normas is None:
+            normas = np.sqrt(tf.multiply(tf) @ (idf * idf)).astype(np.float32)
+            normas[normas == 0] = 1.0
+        self.idf = idf
+        self.normas = normas
+
+    @classmethod
+    def vacio(cls) -> 'IndiceTfIdf':
+        return cls([], [], sparse.csc_matrix((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64),
+                   np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+
+    @classmethod
+    def construir(cls, documentos: Iterable[Tuple[int, str, str, str]]) -> 'IndiceTfIdf':
+        """Índice de documentos (id, tipo_caso, fecha, texto)"""
+        return cls.vacio().agregar(documentos)
+
+    @property
+    def documentos(self) -> int:
+        return len(self.ids)
+
+    @property
+    def max_id(self) -> int:
+        return int(self.ids.max()) if len(self.ids) else 0
+
+    # ===== ACTUALIZACIÓN =====
+
+    def agregar(self, documentos: Iterable[Tuple[int, str, str, str]]) -> 'IndiceTfIdf':
+        """Nuevo índice con los documentos (id, tipo_caso, fecha, texto) agregados al final"""
+        terminos = list(self.terminos)
+        vocabulario = dict(self.vocabulario)
+        tipos = list(self.tipos)
+        codigo_por_tipo = dict(self._codigo_por_tipo)
+
+        data: List[float] = []
+        indices: List[int] = []
+        indptr = [0]
+        ids, codigos, fechas = [], [], []
+        for id_documento, tipo, fecha, texto in documentos:
+            for termino, veces in Counter(terminos_significativos(texto or '')).items():
+                j = vocabulario.get(termino)
+                if j is None:
+                    j = vocabulario[termino] = len(terminos)
+                    terminos.append(termino)
+                indices.append(j)
+                data.append(1.0 + math.log(veces))
+            indptr.append(len(indices))
+            if tipo not in codigo_por_tipo:
+                codigo_por_tipo[tipo] = len(tipos)
+                tipos.append(tipo)
+            ids.append(id_documento)
+            codigos.append(codigo_por_tipo[tipo])
+            fechas.append(ordinal_fecha(fecha))
+
+        if not ids:
+            return self
+
+        n_terminos = len(terminos)
+        nuevos = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(ids), n_terminos)
+        )
+        # Columnas vacías para los términos nuevos (en CSC basta extender indptr)
+        anterior = self.tf
+        indptr_ext = np.concatenate([
+            anterior.indptr, np.full(n_terminos - anterior.shape[1], anterior.indptr[-1], dtype=anterior.indptr.dtype)
+        ])
+        anterior = sparse.csc_matrix((anterior.data, anterior.indices, indptr_ext),
+                                     shape=(anterior.shape[0], n_terminos))
+        tf = sparse.vstack([anterior, nuevos], format='csc', dtype=np.float32)
+
+        frecuencias = np.zeros(n_terminos, dtype=np.int64)
+        frecuencias[:len(self.frecuencias)] = self.frecuencias
+        frecuencias += np.bincount(indices, minlength=n_terminos)
+
+        return IndiceTfIdf(
+            terminos, tipos, tf, frecuencias,
+            np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)]),
+            np.concatenate([self.codigos_tipo, np.asarray(codigos, dtype=np.int32)]),
+            np.concatenate([self.fechas, np.asarray(fechas, dtype=np.int32)]),
+        )
+
+    # ===== CONSULTA =====
+
+    def consultar(self, terminos: Sequence[str], tipo: str, limite: int = 3) -> List[int]:
+        """
+        Ids de los `limite` documentos del tipo más parecidos (coseno) a los
+        términos dados; a igual similitud, el más reciente y luego el de id mayor.
+        """
+        codigo = self._codigo_por_tipo.get(tipo)
+        veces = Counter(t for t in terminos if t in self.vocabulario)
+        if codigo is None or not veces:
+            return []
+
+        columnas = np.fromiter((self.vocabulario[t] for t in veces), dtype=np.int64, count=len(veces))
+        pesos = np.fromiter((1.0 + math.log(v) for v in veces.values()), dtype=np.float32, count=len(veces))
+        pesos *= self.idf[columnas] ** 2
+
+        puntajes = (self.tf[:, columnas] @ pesos) / self.normas
+        candidatos = np.flatnonzero((puntajes > 0) & (self.codigos_tipo == codigo))
+        if len(candidatos) > limite:
+            umbral = np.partition(puntajes[candidatos], -limite)[-limite]
+            candidatos = candidatos[puntajes[candidatos] >= umbral]
+
+        orden = np.lexsort((-self.ids[candidatos], -self.fechas[candidatos], -puntajes[candidatos]))
+        return [int(i) for i in self.ids[candidatos[orden[:limite]]]]
+
+    def estadisticas(self) -> Dict:
+        return {'documentos': self.documentos, 'terminos': len(self.terminos), 'no_nulos': int(self.tf.nnz)}
+
+    # ===== PERSISTENCIA =====
+
+    def guardar(self, directorio: str, meta: Optional[Dict] = None):
+        """
+        Escribe el índice en `directorio`. Se arma en un directorio temporal y
+        se renombra, así nunca queda a medio escribir; si otro proceso ya lo
+        escribió, se conserva el existente.
+        """
+        padre = os.path.dirname(os.path.abspath(directorio))
+        os.makedirs(padre, exist_ok=True)
+        temporal = tempfile.mkdtemp(prefix='.tmp-', dir=padre)
+        arreglos = {
+            'data': self.tf.data, 'indices': self.tf.indices, 'indptr': self.tf.indptr,
+            'frecuencias': self.frecuencias, 'idf': self.idf, 'normas': self.normas,
+            'ids': self.ids, 'codigos_tipo': self.codigos_tipo, 'fechas': self.fechas,
+        }
+        try:
+            for nombre in ARREGLOS:
+                np.save(os.path.join(temporal, nombre + '.npy'), arreglos[nombre])
+            with open(os.path.join(temporal, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(dict(meta or {}, terminos=self.terminos, tipos=self.tipos,
+                               forma=list(self.tf.shape)), f, ensure_ascii=False)
+            os.rename(temporal, directorio)
+        except OSError:
+            shutil.rmtree(temporal, ignore_errors=True)
+            if not os.path.isdir(directorio):
+                raise
+
+    @classmethod
+    def cargar(cls, directorio: str) -> Tuple['IndiceTfIdf', Dict]:
+        """Abre un índice guardado con memory mapping. Devuelve (índice, meta)"""
+        with open(os.path.join(directorio, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        a = {nombre: np.load(os.path.join(directorio, nombre + '.npy'), mmap_mode='r') for nombre in ARREGLOS}
+        tf = sparse.csc_matrix((a['data'], a['indices'], a['indptr']), shape=tuple(meta.pop('forma')), copy=False)
+        indice = cls(meta.pop('terminos'), meta.pop('tipos'), tf, a['frecuencias'], a['ids'],
+                     a['codigos_tipo'], a['fechas'], idf=a['idf'], normas=a['normas'])
+        return indice, meta
@@ -0,0 +1,53 @@
+"""
+JUSTICIA.ar - Versiones de Datos
+Sellos de versión por tabla (tabla versiones_datos) para invalidar cachés en
+memoria de todos los workers sin consultar la tabla en cada petición.
+"""
+import threading
+from typing import Dict
+
+from conexion import obtener_gestor
+
+
+class VersionesDatos:
+    """
+    Devuelve la versión vigente de una tabla de referencia.
+
+    Las versiones se releen de `versiones_datos` solo cuando cambia la marca de
+    la conexión del hilo (PRAGMA data_version / total_changes); en el caso
+    común la consulta se reduce a un PRAGMA sin E/S.
+    """
+
+    def __init__(self, db_path='justicia.db'):
+        self.db_path = db_path
+        self.db = obtener_gestor(db_path)
+        self._local = threading.local()
+
+    def version(self, tabla: str) -> int:
+        """Versión actual de `tabla` (0 si no está registrada)"""
+        return self.todas().get(tabla, 0)
+
+    def todas(self) -> Dict[str, int]:
+        """Versiones actuales de todas las tablas registradas"""
+        marca = self.db.marca_cambios()
+        local = self._local
+        if getattr(local, 'marca', None) != marca:
+            with self.db.conexion() as conn:
+                local.versiones = {
+                    row['tabla']: row['version']
+                    for row in conn.execute("SELECT tabla, version FROM versiones_datos")
+                }
+            local.marca = marca
+        return local.versiones
+
+
+_instancias: Dict[str, VersionesDatos] = {}
+_instancias_lock = threading.Lock()
+
+
+def obtener_versiones(db_path='justicia.db') -> VersionesDatos:
+    """Devuelve el lector de versiones compartido para una base de datos"""
+    with _instancias_lock:
+        if db_path not in _instancias:
+            _instancias[db_path] = VersionesDatos(db_path)
+        return _instancias[db_path]
@@ -0,0 +1,6 @@
+-- migracion: online
+-- Índices para el listado paginado de casos (orden por fecha_ingreso, id)
+
+CREATE INDEX IF NOT EXISTS idx_casos_fecha ON casos(fecha_ingreso, id);
+CREATE INDEX IF NOT EXISTS idx_casos_estado_fecha ON casos(estado, fecha_ingreso, id);
+CREATE INDEX IF NOT EXISTS idx_casos_nivel_fecha ON casos(nivel_clasificacion, fecha_ingreso, id);
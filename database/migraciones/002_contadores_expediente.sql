@@ -0,0 +1,6 @@
+-- Contadores de número de expediente por año
+
+CREATE TABLE IF NOT EXISTS contadores_expediente (
+    anio INTEGER PRIMARY KEY,
+    ultimo INTEGER NOT NULL
+);
@@ -0,0 +1,14 @@
+-- migracion: online
+-- Índices para las consultas frecuentes del backend
+
+-- Última decisión de un caso (obtener_caso)
+CREATE INDEX IF NOT EXISTS idx_decisiones_caso_fecha ON decisiones(caso_id, fecha_decision);
+
+-- Precedentes por tipo de caso, más recientes primero (motor de decisión)
+CREATE INDEX IF NOT EXISTS idx_precedentes_tipo_fecha ON casos_precedentes(tipo_caso, fecha_sentencia);
+
+-- Historial de auditoría de un caso
+CREATE INDEX IF NOT EXISTS idx_auditoria_caso_fecha ON auditoria(caso_id, fecha_evento);
+
+-- Casos de un actor (JOIN con usuarios)
+CREATE INDEX IF NOT EXISTS idx_casos_actor ON casos(actor_id);
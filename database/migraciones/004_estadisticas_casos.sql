@@ -0,0 +1,66 @@
+-- Contadores de casos por nivel y por estado, mantenidos por triggers.
+-- /api/estadisticas lee esta tabla en lugar de agregar toda la tabla casos.
+
+CREATE TABLE IF NOT EXISTS estadisticas_casos (
+    dimension TEXT NOT NULL CHECK(dimension IN ('nivel', 'estado')),
+    valor TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, valor)
+) WITHOUT ROWID;
+
+-- Carga inicial desde los casos existentes
+DELETE FROM estadisticas_casos;
+
+INSERT INTO estadisticas_casos (dimension, valor, total)
+SELECT 'nivel', COALESCE(CAST(nivel_clasificacion AS TEXT), ''), COUNT(*)
+FROM casos GROUP BY nivel_clasificacion;
+
+INSERT INTO estadisticas_casos (dimension, valor, total)
+SELECT 'estado', estado, COUNT(*)
+FROM casos GROUP BY estado;
+
+CREATE TRIGGER IF NOT EXISTS trg_estadisticas_casos_insert
+AFTER INSERT ON casos
+BEGIN
+    INSERT INTO estadisticas_casos (dimension, valor, total)
+    VALUES ('nivel', COALESCE(CAST(NEW.nivel_clasificacion AS TEXT), ''), 1)
+    ON CONFLICT(dimension, valor) DO UPDATE SET total = total + 1;
+
+    INSERT INTO estadisticas_casos (dimension, valor, total)
+    VALUES ('estado', NEW.estado, 1)
+    ON CONFLICT(dimension, valor) DO UPDATE SET total = total + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_estadisticas_casos_delete
+AFTER DELETE ON casos
+BEGIN
+    UPDATE estadisticas_casos SET total = total - 1
+    WHERE dimension = 'nivel' AND valor = COALESCE(CAST(OLD.nivel_clasificacion AS TEXT), '');
+
+    UPDATE estadisticas_casos SET total = total - 1
+    WHERE dimension = 'estado' AND valor = OLD.estado;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_estadisticas_casos_nivel
+AFTER UPDATE OF nivel_clasificacion ON casos
+WHEN OLD.nivel_clasificacion IS NOT NEW.nivel_clasificacion
+BEGIN
+    UPDATE estadisticas_casos SET total = total - 1
+    WHERE dimension = 'nivel' AND valor = COALESCE(CAST(OLD.nivel_clasificacion AS TEXT), '');
+
+    INSERT INTO estadisticas_casos (dimension, valor, total)
+    VALUES ('nivel', COALESCE(CAST(NEW.nivel_clasificacion AS TEXT), ''), 1)
+    ON CONFLICT(dimension, valor) DO UPDATE SET total = total + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_estadisticas_casos_estado
+AFTER UPDATE OF estado ON casos
+WHEN OLD.estado IS NOT NEW.estado
+BEGIN
+    UPDATE estadisticas_casos SET total = total - 1
+    WHERE dimension = 'estado' AND valor = OLD.estado;
+
+    INSERT INTO estadisticas_casos (dimension, valor, total)
+    VALUES ('estado', NEW.estado, 1)
+    ON CONFLICT(dimension, valor) DO UPDATE SET total = total + 1;
+END;
@@ -0,0 +1,40 @@
+-- Versión de datos por tabla de referencia. Los triggers la incrementan en
+-- cada escritura; los workers la usan para invalidar sus cachés en memoria.
+
+CREATE TABLE IF NOT EXISTS versiones_datos (
+    tabla TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+INSERT OR IGNORE INTO versiones_datos (tabla, version) VALUES ('articulos_legales', 1);
+INSERT OR IGNORE INTO versiones_datos (tabla, version) VALUES ('casos_precedentes', 1);
+
+CREATE TRIGGER IF NOT EXISTS trg_version_articulos_insert AFTER INSERT ON articulos_legales
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'articulos_legales';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_articulos_update AFTER UPDATE ON articulos_legales
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'articulos_legales';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_articulos_delete AFTER DELETE ON articulos_legales
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'articulos_legales';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_precedentes_insert AFTER INSERT ON casos_precedentes
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'casos_precedentes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_precedentes_update AFTER UPDATE ON casos_precedentes
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'casos_precedentes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_precedentes_delete AFTER DELETE ON casos_precedentes
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'casos_precedentes';
+END;
@@ -0,0 +1,19 @@
+-- Cola durable de trabajos asíncronos (p. ej. generación de decisiones).
+-- Los tiempos se guardan con milisegundos para informar espera y duración.
+
+CREATE TABLE IF NOT EXISTS trabajos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL,
+    parametros TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente' CHECK(estado IN ('pendiente', 'en_proceso', 'completado', 'fallido')),
+    resultado TEXT,
+    error TEXT,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    fecha_creacion TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    fecha_inicio TIMESTAMP,
+    fecha_fin TIMESTAMP,
+    vence_en TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos(estado, id);
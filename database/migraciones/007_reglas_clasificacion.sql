@@ -0,0 +1,92 @@
+-- Criterios de clasificación ejecutables: cada fila activa es una regla que
+-- el clasificador compila en memoria. Condiciones:
+--   palabras     alguna de palabras_clave (JSON) aparece en `campo`
+--   monto_menor  monto_reclamado < umbral_monto
+--   monto_mayor  monto_reclamado > umbral_monto
+--   verdadero    el campo booleano `campo` es verdadero (ausente = falso)
+--   falso        el campo booleano `campo` es falso (ausente = verdadero)
+-- tipo_caso restringe la regla a un tipo; orden fija su lugar en la justificación.
+
+ALTER TABLE criterios_clasificacion ADD COLUMN condicion TEXT
+    CHECK(condicion IN ('palabras', 'monto_menor', 'monto_mayor', 'verdadero', 'falso'));
+ALTER TABLE criterios_clasificacion ADD COLUMN campo TEXT;
+ALTER TABLE criterios_clasificacion ADD COLUMN palabras_clave TEXT;
+ALTER TABLE criterios_clasificacion ADD COLUMN umbral_monto REAL;
+ALTER TABLE criterios_clasificacion ADD COLUMN tipo_caso TEXT;
+ALTER TABLE criterios_clasificacion ADD COLUMN etiqueta TEXT;
+ALTER TABLE criterios_clasificacion ADD COLUMN orden INTEGER NOT NULL DEFAULT 100;
+ALTER TABLE criterios_clasificacion ADD COLUMN activo INTEGER NOT NULL DEFAULT 0;
+
+-- Reglas que hasta ahora estaban fijas en clasificador.py
+INSERT INTO criterios_clasificacion (factor, descripcion, peso, nivel_minimo)
+SELECT 'monto_elevado', 'Monto mayor a $800.000', -1, 1
+WHERE NOT EXISTS (SELECT 1 FROM criterios_clasificacion WHERE factor = 'monto_elevado');
+
+INSERT INTO criterios_clasificacion (factor, descripcion, peso, nivel_minimo)
+SELECT 'cobro_ejecutivo', 'Cobro de suma de dinero con título ejecutivo (pagaré)', 3, 1
+WHERE NOT EXISTS (SELECT 1 FROM criterios_clasificacion WHERE factor = 'cobro_ejecutivo');
+
+UPDATE criterios_clasificacion
+SET condicion = 'monto_menor', umbral_monto = 300000, orden = 10, activo = 1,
+    etiqueta = 'Monto bajo (< $300.000)'
+WHERE factor = 'monto_bajo';
+
+UPDATE criterios_clasificacion
+SET condicion = 'monto_mayor', umbral_monto = 800000, orden = 11, activo = 1,
+    etiqueta = 'Monto elevado (> $800.000)'
+WHERE factor = 'monto_elevado';
+
+UPDATE criterios_clasificacion
+SET condicion = 'palabras', campo = 'pruebas', orden = 20, activo = 1,
+    palabras_clave = '["pagaré", "contrato firmado", "sentencia", "documento fehaciente"]',
+    etiqueta = 'Prueba documental clara'
+WHERE factor = 'prueba_clara';
+
+UPDATE criterios_clasificacion
+SET condicion = 'falso', campo = 'tiene_contestacion', orden = 30, activo = 1,
+    etiqueta = 'Demandado no contestó o admite hechos'
+WHERE factor = 'admision_hechos';
+
+UPDATE criterios_clasificacion
+SET condicion = 'palabras', campo = 'pruebas', tipo_caso = 'cobro_suma_dinero', orden = 40, activo = 1,
+    palabras_clave = '["pagaré"]',
+    etiqueta = 'Cobro ejecutivo con título'
+WHERE factor = 'cobro_ejecutivo';
+
+-- Incluye las palabras de necesidad_pericial: ambas se evaluaban como un solo factor
+UPDATE criterios_clasificacion
+SET condicion = 'palabras', campo = 'descripcion_hechos', orden = 50, activo = 1,
+    palabras_clave = '["pericial", "técnico", "controvertido", "testigos contradictorios", "versiones encontradas"]',
+    etiqueta = 'Requiere prueba compleja o hechos controvertidos'
+WHERE factor = 'cuestion_compleja_hecho';
+
+UPDATE criterios_clasificacion
+SET condicion = 'verdadero', campo = 'plantea_cuestion_constitucional', orden = 60, activo = 1,
+    etiqueta = 'Plantea cuestión constitucional'
+WHERE factor = 'cuestion_constitucional';
+
+UPDATE criterios_clasificacion
+SET condicion = 'palabras', campo = 'descripcion_hechos', orden = 70, activo = 1,
+    palabras_clave = '["novedoso", "sin precedentes"]',
+    etiqueta = 'Cuestión jurídica novedosa sin precedentes claros'
+WHERE factor = 'cuestion_compleja_derecho';
+
+-- jurisprudencia_uniforme, precedente_contradictorio y necesidad_pericial quedan
+-- inactivos (sin condición) hasta que se les defina una.
+
+INSERT OR IGNORE INTO versiones_datos (tabla, version) VALUES ('criterios_clasificacion', 1);
+
+CREATE TRIGGER IF NOT EXISTS trg_version_criterios_insert AFTER INSERT ON criterios_clasificacion
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'criterios_clasificacion';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_criterios_update AFTER UPDATE ON criterios_clasificacion
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'criterios_clasificacion';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_criterios_delete AFTER DELETE ON criterios_clasificacion
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'criterios_clasificacion';
+END;
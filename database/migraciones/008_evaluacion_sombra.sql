@@ -0,0 +1,64 @@
+-- Evaluación en sombra de criterios de clasificación candidatos.
+-- Cada conjunto candidato tiene las mismas columnas que criterios_clasificacion;
+-- un hilo de fondo lo aplica a los casos nuevos y acumula la comparación con
+-- el nivel de producción.
+
+CREATE TABLE IF NOT EXISTS criterios_candidatos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conjunto TEXT NOT NULL,
+    factor TEXT NOT NULL,
+    descripcion TEXT NOT NULL DEFAULT '',
+    peso INTEGER NOT NULL,
+    nivel_minimo INTEGER NOT NULL DEFAULT 1,
+    condicion TEXT NOT NULL
+        CHECK(condicion IN ('palabras', 'monto_menor', 'monto_mayor', 'verdadero', 'falso')),
+    campo TEXT,
+    palabras_clave TEXT,
+    umbral_monto REAL,
+    tipo_caso TEXT,
+    etiqueta TEXT,
+    orden INTEGER NOT NULL DEFAULT 100,
+    activo INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE INDEX IF NOT EXISTS idx_criterios_candidatos_conjunto ON criterios_candidatos(conjunto);
+
+-- Matriz de confusión acumulada: casos por (nivel producción, nivel candidato)
+CREATE TABLE IF NOT EXISTS comparacion_sombra (
+    conjunto TEXT NOT NULL,
+    nivel_produccion INTEGER NOT NULL,
+    nivel_candidato INTEGER NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (conjunto, nivel_produccion, nivel_candidato)
+) WITHOUT ROWID;
+
+-- Un registro por caso en que el candidato difiere de producción
+CREATE TABLE IF NOT EXISTS discrepancias_sombra (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conjunto TEXT NOT NULL,
+    caso_id INTEGER NOT NULL,
+    nivel_produccion INTEGER NOT NULL,
+    nivel_candidato INTEGER NOT NULL,
+    puntos_candidato INTEGER NOT NULL,
+    factores_candidato TEXT NOT NULL,
+    fecha_evento TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_discrepancias_sombra_conjunto ON discrepancias_sombra(conjunto, id);
+
+INSERT OR IGNORE INTO versiones_datos (tabla, version) VALUES ('criterios_candidatos', 1);
+
+CREATE TRIGGER IF NOT EXISTS trg_version_candidatos_insert AFTER INSERT ON criterios_candidatos
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'criterios_candidatos';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_candidatos_update AFTER UPDATE ON criterios_candidatos
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'criterios_candidatos';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_candidatos_delete AFTER DELETE ON criterios_candidatos
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'criterios_candidatos';
+END;
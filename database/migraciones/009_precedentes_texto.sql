@@ -0,0 +1,40 @@
+-- Índice de texto completo (FTS5) sobre los precedentes para buscar por los
+-- hechos del caso con ranking BM25. Tabla de contenido externo: el texto vive
+-- en casos_precedentes y los triggers mantienen el índice sincronizado.
+-- tipo_caso no se indexa: solo filtra las coincidencias y no entra al ranking.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS precedentes_fts USING fts5(
+    hechos_resumidos,
+    principios_aplicados,
+    decision,
+    tipo_caso UNINDEXED,
+    content = 'casos_precedentes',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+INSERT INTO precedentes_fts (precedentes_fts) VALUES ('rebuild');
+
+-- Frecuencia documental de cada término, para descartar de la consulta los
+-- términos que aparecen en casi todos los precedentes
+CREATE VIRTUAL TABLE IF NOT EXISTS precedentes_fts_vocab USING fts5vocab(precedentes_fts, 'row');
+
+CREATE TRIGGER IF NOT EXISTS trg_precedentes_fts_insert AFTER INSERT ON casos_precedentes
+BEGIN
+    INSERT INTO precedentes_fts (rowid, hechos_resumidos, principios_aplicados, decision, tipo_caso)
+    VALUES (new.id, new.hechos_resumidos, new.principios_aplicados, new.decision, new.tipo_caso);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_precedentes_fts_delete AFTER DELETE ON casos_precedentes
+BEGIN
+    INSERT INTO precedentes_fts (precedentes_fts, rowid, hechos_resumidos, principios_aplicados, decision, tipo_caso)
+    VALUES ('delete', old.id, old.hechos_resumidos, old.principios_aplicados, old.decision, old.tipo_caso);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_precedentes_fts_update AFTER UPDATE ON casos_precedentes
+BEGIN
+    INSERT INTO precedentes_fts (precedentes_fts, rowid, hechos_resumidos, principios_aplicados, decision, tipo_caso)
+    VALUES ('delete', old.id, old.hechos_resumidos, old.principios_aplicados, old.decision, old.tipo_caso);
+    INSERT INTO precedentes_fts (rowid, hechos_resumidos, principios_aplicados, decision, tipo_caso)
+    VALUES (new.id, new.hechos_resumidos, new.principios_aplicados, new.decision, new.tipo_caso);
+END;
@@ -0,0 +1,16 @@
+-- Versión de casos_precedentes que solo cambia al modificar o borrar filas,
+-- no al insertarlas. El índice vectorial de precedentes la compara para
+-- distinguir un agregado (que aplica de forma incremental) de una reescritura
+-- (que obliga a reconstruirlo).
+
+INSERT OR IGNORE INTO versiones_datos (tabla, version) VALUES ('casos_precedentes_reescritura', 1);
+
+CREATE TRIGGER IF NOT EXISTS trg_version_precedentes_reescritura_update AFTER UPDATE ON casos_precedentes
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'casos_precedentes_reescritura';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_precedentes_reescritura_delete AFTER DELETE ON casos_precedentes
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'casos_precedentes_reescritura';
+END;
@@ -0,0 +1,51 @@
+-- Plantillas de fundamentación versionadas. Una decisión generada con
+-- plantilla guarda solo plantilla_id, plantilla_version y sus parámetros
+-- (JSON); el texto se arma al leerla. Las versiones son inmutables: un cambio
+-- de texto se registra como versión nueva y las decisiones ya guardadas
+-- conservan la suya.
+
+CREATE TABLE IF NOT EXISTS plantillas_decision (
+    plantilla_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    texto TEXT NOT NULL,
+    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (plantilla_id, version)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_plantillas_decision_inmutable BEFORE UPDATE OF texto ON plantillas_decision
+BEGIN
+    SELECT RAISE(ABORT, 'Las versiones de plantilla son inmutables: registre una versión nueva');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_plantillas_decision_en_uso BEFORE DELETE ON plantillas_decision
+WHEN EXISTS (
+    SELECT 1 FROM decisiones
+    WHERE plantilla_id = old.plantilla_id AND plantilla_version = old.version
+)
+BEGIN
+    SELECT RAISE(ABORT, 'Versión de plantilla en uso por decisiones guardadas');
+END;
+
+-- fundamentacion queda vacía en las decisiones con plantilla
+ALTER TABLE decisiones ADD COLUMN plantilla_id TEXT;
+ALTER TABLE decisiones ADD COLUMN plantilla_version INTEGER;
+ALTER TABLE decisiones ADD COLUMN parametros TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_decisiones_plantilla ON decisiones(plantilla_id, plantilla_version);
+
+INSERT OR IGNORE INTO versiones_datos (tabla, version) VALUES ('plantillas_decision', 1);
+
+CREATE TRIGGER IF NOT EXISTS trg_version_plantillas_insert AFTER INSERT ON plantillas_decision
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'plantillas_decision';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_plantillas_update AFTER UPDATE ON plantillas_decision
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'plantillas_decision';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_plantillas_delete AFTER DELETE ON plantillas_decision
+BEGIN
+    UPDATE versiones_datos SET version = version + 1 WHERE tabla = 'plantillas_decision';
+END;
@@ -0,0 +1,9 @@
+-- Origen de cada versión de plantilla: 'codigo' (plantillas.py), 'archivo'
+-- (plantillas_decision/<id>.txt) o 'base' (cargada directamente en la tabla).
+-- Las versiones de origen 'base' no se reemplazan al registrar los textos del
+-- código o de archivos.
+
+ALTER TABLE plantillas_decision ADD COLUMN origen TEXT NOT NULL DEFAULT 'base'
+    CHECK(origen IN ('codigo', 'archivo', 'base'));
+
+UPDATE plantillas_decision SET origen = 'codigo';
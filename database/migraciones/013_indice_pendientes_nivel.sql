@@ -0,0 +1,6 @@
+-- migracion: online
+-- Casos clasificados pendientes de decisión, por nivel y en orden de id (barrido
+-- de nivel 1). Índice parcial: solo contiene los casos en estado 'clasificado'.
+
+CREATE INDEX IF NOT EXISTS idx_casos_pendientes_nivel ON casos(nivel_clasificacion, id)
+WHERE estado = 'clasificado';
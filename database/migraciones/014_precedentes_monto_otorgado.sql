@@ -0,0 +1,13 @@
+-- Monto de la condena en cada precedente. NULL si no se registró. (Esta
+-- migración tomó monto_aproximado como el reclamado; la 015 lo corrige.)
+
+ALTER TABLE casos_precedentes ADD COLUMN monto_otorgado REAL;
+
+-- Precedentes cargados: una demanda acogida sin reducción otorga lo reclamado
+-- y una rechazada no otorga nada; los acogidos parcialmente quedan sin monto
+-- hasta cargarlo
+UPDATE casos_precedentes SET monto_otorgado = monto_aproximado
+WHERE monto_aproximado IS NOT NULL AND decision LIKE 'Se acoge la demanda%';
+
+UPDATE casos_precedentes SET monto_otorgado = 0
+WHERE monto_aproximado IS NOT NULL AND decision LIKE 'Se rechaza%';
@@ -0,0 +1,24 @@
+-- Monto reclamado en cada precedente. monto_aproximado es el monto de la
+-- condena (Rodríguez: reclamó $280.000 y obtuvo $250.000, cargado como
+-- 250000), no el reclamado: la 014 lo tomó como reclamo y dejó sin monto
+-- otorgado a los acogidos parcialmente. Los precedentes cercanos se buscan
+-- por monto_reclamado y el monto sugerido aplica la proporción
+-- monto_otorgado / monto_reclamado.
+
+ALTER TABLE casos_precedentes ADD COLUMN monto_reclamado REAL;
+
+-- La condena es monto_aproximado también en los acogidos parcialmente
+UPDATE casos_precedentes SET monto_otorgado = monto_aproximado
+WHERE monto_otorgado IS NULL AND monto_aproximado IS NOT NULL
+  AND decision LIKE 'Se acoge%';
+
+-- Acogidos sin reducción: se otorgó lo reclamado
+UPDATE casos_precedentes SET monto_reclamado = monto_aproximado
+WHERE monto_aproximado IS NOT NULL AND decision LIKE 'Se acoge la demanda%';
+
+-- Acogidos parcialmente de los datos iniciales: reclamo según los hechos
+UPDATE casos_precedentes SET monto_reclamado = 280000
+WHERE titulo = 'Rodríguez c/ Constructora del Sur SRL s/ Daños' AND monto_reclamado IS NULL;
+
+UPDATE casos_precedentes SET monto_reclamado = 320000
+WHERE titulo = 'Torres c/ Empresa de Mudanzas Express s/ Daños' AND monto_reclamado IS NULL;
@@ -0,0 +1,57 @@
+-- Revisiones de los precedentes citados por decisiones. Una decisión de
+-- nivel 2 guarda precedente_id y precedente_revision y su texto se arma con
+-- los datos de esa revisión: editar o borrar un precedente no cambia la
+-- fundamentación de decisiones ya dictadas. Antes de cambiar los datos que
+-- se citan (o de borrar la fila) se archiva la revisión anterior, que es
+-- inmutable.
+
+ALTER TABLE casos_precedentes ADD COLUMN revision INTEGER NOT NULL DEFAULT 1;
+
+CREATE TABLE IF NOT EXISTS precedentes_revisiones (
+    precedente_id INTEGER NOT NULL,
+    revision INTEGER NOT NULL,
+    titulo TEXT NOT NULL,
+    tribunal TEXT NOT NULL,
+    fecha_sentencia DATE NOT NULL,
+    hechos_resumidos TEXT NOT NULL,
+    principios_aplicados TEXT NOT NULL,
+    fecha_archivo TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (precedente_id, revision)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_precedentes_revisiones_inmutable BEFORE UPDATE ON precedentes_revisiones
+BEGIN
+    SELECT RAISE(ABORT, 'Las revisiones de precedentes son inmutables');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_precedentes_revisiones_borrado BEFORE DELETE ON precedentes_revisiones
+BEGIN
+    SELECT RAISE(ABORT, 'Las revisiones de precedentes son inmutables');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_precedentes_revision_update
+AFTER UPDATE OF titulo, tribunal, fecha_sentencia, hechos_resumidos, principios_aplicados ON casos_precedentes
+WHEN NEW.revision = OLD.revision AND (
+    OLD.titulo IS NOT NEW.titulo OR OLD.tribunal IS NOT NEW.tribunal
+    OR OLD.fecha_sentencia IS NOT NEW.fecha_sentencia OR OLD.hechos_resumidos IS NOT NEW.hechos_resumidos
+    OR OLD.principios_aplicados IS NOT NEW.principios_aplicados
+)
+BEGIN
+    INSERT OR IGNORE INTO precedentes_revisiones (
+        precedente_id, revision, titulo, tribunal, fecha_sentencia, hechos_resumidos, principios_aplicados
+    ) VALUES (
+        OLD.id, OLD.revision, OLD.titulo, OLD.tribunal, OLD.fecha_sentencia, OLD.hechos_resumidos,
+        OLD.principios_aplicados
+    );
+    UPDATE casos_precedentes SET revision = OLD.revision + 1 WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_precedentes_revision_delete BEFORE DELETE ON casos_precedentes
+BEGIN
+    INSERT OR IGNORE INTO precedentes_revisiones (
+        precedente_id, revision, titulo, tribunal, fecha_sentencia, hechos_resumidos, principios_aplicados
+    ) VALUES (
+        OLD.id, OLD.revision, OLD.titulo, OLD.tribunal, OLD.fecha_sentencia, OLD.hechos_resumidos,
+        OLD.principios_aplicados
+    );
+END;